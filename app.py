@@ -13,16 +13,27 @@ from utils.data_manager import (
     get_student,
     load_conversation,
     save_conversation,
+    pending_score,
     load_guide_questions,
     get_student_sharing_status,
     update_student_sharing,
-    get_shared_conversations
+    get_shared_conversations,
+    count_shared_conversations
 )
-from utils.gemini_client import get_client
-from utils.prompts import get_author_role_prompt
-from utils.question_analyzer import analyze_question, get_score_level
+from utils.gemini_client import get_client, is_error_response, GenerationResult, PURPOSE_ANSWER, ERROR_BLOCKED
+from utils.answer_cache import get_cached_answer, store_answer
+from utils.similarity_index import find_similar_answer, add_to_similarity_index
+from utils.class_settings import get_class_setting
+from utils.read_cache import cached_file
+from utils.prompts import get_author_system_prompt, get_author_question_prompt
+from utils.question_analyzer import get_score_level
+from utils.scoring_queue import enqueue_scoring, start_workers
 from utils.report_generator import generate_report
 
+# 친구들 질문 보기 - 한 페이지에 보여줄 학생 수 / 학생별로 한 번에 보여줄 질문 수
+PEER_PAGE_SIZE = 10
+PEER_TURNS_PAGE_SIZE = 5
+
 # 페이지 설정
 st.set_page_config(
     page_title="AI 작가와의 대화",
@@ -81,9 +92,13 @@ st.markdown("""
 def load_story():
     """이야기 파일을 로드합니다."""
     story_path = Path(__file__).parent / "story.txt"
-    try:
+
+    def _read():
         with open(story_path, 'r', encoding='utf-8') as f:
             return f.read()
+
+    try:
+        return cached_file(story_path, _read)
     except FileNotFoundError:
         return "이야기 파일을 찾을 수 없습니다. story.txt 파일을 확인해주세요."
 
@@ -302,7 +317,7 @@ def show_my_conversation():
 
         if st.button("📤 질문하기", use_container_width=True, type="primary"):
             if user_question.strip():
-                process_question(user_question.strip())
+                process_question(user_question.strip(), chat_container)
             else:
                 st.warning("질문을 입력해주세요.")
 
@@ -331,10 +346,10 @@ def show_peer_discussions():
     sort_by = "recent" if sort_option == "최근 활동순" else "questions"
     filter_anonymous = (filter_option == "익명만")
 
-    # 공유된 대화 가져오기
-    shared_conversations = get_shared_conversations(sort_by=sort_by, filter_anonymous=filter_anonymous)
+    # 공유 학생 수 (페이지 계산용)
+    shared_count = count_shared_conversations(filter_anonymous=filter_anonymous)
 
-    if not shared_conversations:
+    if shared_count == 0:
         st.info("🌟 아직 공유된 질문이 없어요. 첫 번째로 공유해보세요!")
         st.markdown("---")
         st.markdown("💡 **공유하려면:**")
@@ -343,30 +358,61 @@ def show_peer_discussions():
         st.markdown("3. '내 질문을 다른 학생들과 공유하기'를 체크하세요")
         return
 
-    st.markdown(f"**총 {len(shared_conversations)}명의 학생이 질문을 공유했어요!**")
+    st.markdown(f"**총 {shared_count}명의 학생이 질문을 공유했어요!**")
+
+    # 현재 페이지의 학생만 가져오기
+    page_count = (shared_count + PEER_PAGE_SIZE - 1) // PEER_PAGE_SIZE
+    page = 1
+    if page_count > 1:
+        page = st.number_input("페이지", min_value=1, max_value=page_count, value=1, key="peer_page")
+        st.caption(f"{page} / {page_count} 페이지")
+    shared_conversations = get_shared_conversations(
+        sort_by=sort_by,
+        filter_anonymous=filter_anonymous,
+        offset=(page - 1) * PEER_PAGE_SIZE,
+        limit=PEER_PAGE_SIZE
+    )
+
     st.markdown("---")
 
-    # 학생별 카드 표시
+    # 학생별 카드 표시 (펼친 학생의 질문만 그림)
     for student_data in shared_conversations:
         student_id = student_data['student_id']
         display_name = student_data['display_name']
         conversations = student_data['conversations']
         question_count = student_data['question_count']
 
-        # 학생 카드
-        with st.expander(f"👤 {display_name} ({question_count}개 질문)", expanded=False):
-            if question_count == 0:
-                st.caption("아직 질문이 없어요")
-            else:
-                for i, conv in enumerate(conversations, 1):
-                    st.markdown(f"**질문 {i}**")
-                    with st.chat_message("user"):
-                        st.markdown(conv['question'])
-                    with st.chat_message("assistant", avatar="✍️"):
-                        st.markdown(conv['answer'])
-
-                    if i < len(conversations):
-                        st.markdown("---")
+        is_open = st.toggle(
+            f"👤 {display_name} ({question_count}개 질문)",
+            key=f"peer_open_{student_id}"
+        )
+        if not is_open:
+            continue
+
+        if question_count == 0:
+            st.caption("아직 질문이 없어요")
+            continue
+
+        # 질문은 몇 개씩 나눠서 표시
+        shown_key = f"peer_shown_{student_id}"
+        shown = st.session_state.get(shown_key, PEER_TURNS_PAGE_SIZE)
+        visible = conversations[:shown]
+
+        with st.container(border=True):
+            for i, conv in enumerate(visible, 1):
+                st.markdown(f"**질문 {i}**")
+                with st.chat_message("user"):
+                    st.markdown(conv['question'])
+                with st.chat_message("assistant", avatar="✍️"):
+                    st.markdown(conv['answer'])
+
+                if i < len(visible):
+                    st.markdown("---")
+
+            if shown < question_count:
+                if st.button("더 보기", key=f"peer_more_{student_id}"):
+                    st.session_state[shown_key] = shown + PEER_TURNS_PAGE_SIZE
+                    st.rerun()
 
 
 def main_page():
@@ -391,31 +437,70 @@ def main_page():
         show_peer_discussions()
 
 
-def process_question(question):
-    """질문 처리 로직"""
+def process_question(question, chat_container):
+    """질문 처리 로직 - 답변은 대화 컨테이너에 실시간으로 표시됩니다."""
     with st.spinner("작가님이 답변을 생각하고 있어요..."):
         try:
-            # 1. AI 작가 답변 생성
-            client = get_client()
-            prompt = get_author_role_prompt(st.session_state.story_content, question)
-            answer = client.generate_response(prompt)
+            # 1. AI 작가 답변 (같거나 비슷한 질문의 저장된 답변이 있으면 재사용,
+            #    없으면 생성하면서 조각이 도착하는 대로 표시)
+            system_prompt = get_author_system_prompt(st.session_state.story_content)
+            cached_answer = None
+            if get_class_setting("answer_cache_enabled"):
+                cached_answer = get_cached_answer(question, system_prompt)
+                if cached_answer is None and get_class_setting("similar_question_enabled"):
+                    cached_answer = find_similar_answer(
+                        question,
+                        system_prompt,
+                        get_class_setting("similar_question_threshold")
+                    )
+
+            with chat_container:
+                with st.chat_message("user"):
+                    st.markdown(question)
+                with st.chat_message("assistant", avatar="✍️"):
+                    if cached_answer is not None:
+                        st.markdown(cached_answer)
+                        answer = cached_answer
+                    else:
+                        client = get_client()
+                        prompt = get_author_question_prompt(question)
+                        result = GenerationResult()
+                        answer = st.write_stream(
+                            client.generate_response_stream(
+                                prompt, system_prompt=system_prompt, result=result, purpose=PURPOSE_ANSWER
+                            )
+                        )
+
+            if not isinstance(answer, str):
+                answer = "".join(str(part) for part in answer)
+            answer = answer.strip()
+
+            # 답변을 받지 못했거나 차단되었으면 대화 기록으로 저장하지 않음 (채점과 통계에도 넣지 않음)
+            if cached_answer is None and not result.ok:
+                print(f"[DEBUG] 답변 생성 실패, 저장하지 않음: {result}")
+                if result.error_type == ERROR_BLOCKED:
+                    st.warning("이 질문에는 답변할 수 없어서 기록하지 않았어요. 다른 질문을 해주세요.")
+                else:
+                    st.warning("답변을 받지 못해서 이 질문은 기록하지 않았어요. 잠시 후 다시 질문해주세요.")
+                return
 
-            # 2. 질문 분석 (백그라운드)
-            score_data = analyze_question(question, st.session_state.story_content)
-            print(f"[DEBUG] Score data: {score_data}")  # 디버깅
+            # 새로 받은 답변은 다음 학생을 위해 저장 (재사용 설정과 관계없이)
+            if cached_answer is None and not is_error_response(answer):
+                store_answer(question, system_prompt, answer)
+                add_to_similarity_index(question, system_prompt, answer)
 
-            # 3. 대화 이력에 추가
+            # 2. 대화 이력에 추가 (점수는 채점 작업자가 나중에 채움)
             new_conv = {
                 "timestamp": datetime.now().isoformat(),
                 "question": question,
                 "answer": answer,
-                "score": score_data
+                "score": pending_score()
             }
 
             st.session_state.conversation_data['conversations'].append(new_conv)
             print(f"[DEBUG] Added to session, total conversations: {len(st.session_state.conversation_data['conversations'])}")
 
-            # 4. 저장
+            # 3. 저장
             success = save_conversation(
                 st.session_state.student_id,
                 st.session_state.student_name,
@@ -423,6 +508,15 @@ def process_question(question):
             )
             print(f"[DEBUG] Save result: {success}")
 
+            # 4. 질문 분석은 백그라운드 채점 큐로
+            if success:
+                enqueue_scoring(
+                    st.session_state.student_id,
+                    new_conv['timestamp'],
+                    question,
+                    st.session_state.story_content
+                )
+
             # 5. 입력 필드 초기화를 위해 key 변경
             st.session_state.input_key += 1
 
@@ -440,6 +534,9 @@ def main():
     """메인 함수"""
     init_session_state()
 
+    # 이전 실행에서 남은 채점 작업 처리 시작
+    start_workers()
+
     if not st.session_state.logged_in:
         login_page()
     else:
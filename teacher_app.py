@@ -3,14 +3,29 @@ AI 작가와의 대화 - 교사용 대시보드 모듈
 교사가 모든 학생의 활동을 모니터링할 수 있습니다.
 """
 
+import io
+import zipfile
 import streamlit as st
 import pandas as pd
 from datetime import datetime
 
 # 유틸리티 임포트
-from utils.data_manager import get_all_students_with_stats, load_conversation
-from utils.report_generator import generate_report
-from utils.question_analyzer import get_score_level
+from utils.data_manager import (
+    get_all_students_with_stats, load_conversation_page, is_score_pending, is_score_failed,
+    get_conversation_buffer_stats, import_students
+)
+from utils.report_generator import generate_report, generate_class_reports
+from utils.question_analyzer import get_score_level, get_batch_scoring_stats
+from utils.read_cache import get_cache_stats
+from utils.class_settings import get_class_setting, save_class_setting
+from utils.answer_cache import get_answer_cache_stats, clear_answer_cache
+from utils.similarity_index import get_similarity_index_stats, clear_similarity_index
+from utils.score_cache import get_score_cache_stats
+from utils.rate_limiter import get_rate_limit_stats
+from utils.gemini_client import get_timeout_stats, get_backend_stats
+
+# 학생 상세 보기 - 한 페이지에 보여줄 대화 수
+HISTORY_PAGE_SIZE = 10
 
 # CSS 스타일 (교사 대시보드 전용)
 st.markdown("""
@@ -41,15 +56,12 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-def show_overview():
+def show_overview(students_data):
     """전체 통계 표시"""
     st.markdown('<div class="main-title">👨‍🏫 교사용 대시보드</div>', unsafe_allow_html=True)
     st.markdown("모든 학생의 학습 활동을 모니터링할 수 있습니다.")
     st.markdown("---")
 
-    # 전체 통계 데이터 로드
-    students_data = get_all_students_with_stats()
-
     if not students_data:
         st.warning("아직 활동한 학생이 없습니다.")
         return
@@ -96,13 +108,11 @@ def show_overview():
         """.format(overall_avg_score), unsafe_allow_html=True)
 
 
-def show_students_table():
+def show_students_table(students_data):
     """학생 목록 테이블 표시"""
     st.markdown("---")
     st.markdown("### 📊 학생 목록")
 
-    students_data = get_all_students_with_stats()
-
     if not students_data:
         return
 
@@ -125,6 +135,7 @@ def show_students_table():
             "질문 수": student['total_questions'],
             "평균 점수": f"{student['average_score']:.1f}",
             "수준": get_score_level(student['average_score']),
+            "채점 실패": student['failed_scores'],
             "마지막 활동": last_activity_str
         })
 
@@ -161,7 +172,14 @@ def show_students_table():
 
 def show_student_detail(student_id):
     """학생 상세 정보 표시"""
-    conv_data = load_conversation(student_id)
+    # 현재 페이지의 대화만 로드
+    page_key = f"history_page_{student_id}"
+    page = st.session_state.get(page_key, 1)
+    conv_data = load_conversation_page(
+        student_id,
+        offset=(page - 1) * HISTORY_PAGE_SIZE,
+        limit=HISTORY_PAGE_SIZE
+    )
 
     if not conv_data:
         st.error("학생 정보를 찾을 수 없습니다.")
@@ -180,6 +198,13 @@ def show_student_detail(student_id):
     with col2:
         st.metric("평균 점수", f"{avg_score:.1f}/5.0 ({get_score_level(avg_score)})")
 
+    # 항목별 평균 (누적 통계에서 바로 읽음)
+    dimension_averages = stats.get('dimension_averages', {})
+    dimension_labels = [("depth", "깊이"), ("creativity", "창의성"), ("comprehension", "이해도"), ("thinking", "사고력")]
+    for col, (key, label) in zip(st.columns(4), dimension_labels):
+        with col:
+            st.metric(f"{label} 평균", f"{dimension_averages.get(key, 0.0):.1f}/5")
+
     st.markdown("---")
 
     # 대화 이력
@@ -190,18 +215,33 @@ def show_student_detail(student_id):
     if not conversations:
         st.info("아직 대화 기록이 없습니다.")
     else:
-        for i, conv in enumerate(conversations, 1):
-            with st.expander(f"질문 {i}: {conv['question'][:50]}..."):
+        page_count = (total_q + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE
+        if page_count > 1:
+            st.number_input("페이지", min_value=1, max_value=page_count, key=page_key)
+            st.caption(f"{page} / {page_count} 페이지")
+
+        first_number = (page - 1) * HISTORY_PAGE_SIZE + 1
+        for i, conv in enumerate(conversations, first_number):
+            # 펼친 항목의 내용만 그림
+            if not st.toggle(f"질문 {i}: {conv['question'][:50]}...", key=f"history_open_{student_id}_{i}"):
+                continue
+
+            with st.container(border=True):
                 st.markdown(f"**질문**: {conv['question']}")
                 st.markdown(f"**답변**: {conv['answer']}")
 
                 score = conv.get('score', {})
-                st.markdown(f"**점수**: {score.get('total', 0):.1f}/5.0")
-                st.markdown(f"- 깊이: {score.get('depth', 0)}/5")
-                st.markdown(f"- 창의성: {score.get('creativity', 0)}/5")
-                st.markdown(f"- 이해도: {score.get('comprehension', 0)}/5")
-                st.markdown(f"- 사고력: {score.get('thinking', 0)}/5")
-                st.markdown(f"**평가**: {score.get('feedback', '')}")
+                if is_score_pending(score):
+                    st.markdown("**점수**: ⏳ 채점 대기 중")
+                elif is_score_failed(score):
+                    st.markdown("**점수**: ⚠️ 채점 실패 (재채점 때 다시 채점됩니다)")
+                else:
+                    st.markdown(f"**점수**: {score.get('total', 0):.1f}/5.0")
+                    st.markdown(f"- 깊이: {score.get('depth', 0)}/5")
+                    st.markdown(f"- 창의성: {score.get('creativity', 0)}/5")
+                    st.markdown(f"- 이해도: {score.get('comprehension', 0)}/5")
+                    st.markdown(f"- 사고력: {score.get('thinking', 0)}/5")
+                    st.markdown(f"**평가**: {score.get('feedback', '')}")
 
                 timestamp = conv.get('timestamp', '')
                 if timestamp:
@@ -227,6 +267,135 @@ def show_student_detail(student_id):
                 st.success("리포트가 생성되었습니다!")
 
 
+def show_class_reports(students_data):
+    """반 전체 리포트 생성 (여러 학생의 리포트를 동시에 요청)"""
+    st.markdown("---")
+    st.markdown("### 📚 반 전체 리포트")
+
+    active_students = [s for s in students_data if s['total_questions'] > 0]
+    if not active_students:
+        st.info("아직 질문한 학생이 없습니다.")
+        return
+
+    if st.button(f"📄 활동한 학생 {len(active_students)}명의 리포트 한 번에 생성", use_container_width=True):
+        with st.spinner("리포트 생성 중..."):
+            reports = generate_class_reports([s['student_id'] for s in active_students])
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for student in active_students:
+                zf.writestr(
+                    f"학습리포트_{student['student_id']}_{student['name']}.md",
+                    reports[student['student_id']]
+                )
+
+        st.download_button(
+            label="📥 리포트 모음 다운로드 (zip)",
+            data=buffer.getvalue(),
+            file_name=f"학습리포트_반전체_{datetime.now().strftime('%Y%m%d')}.zip",
+            mime="application/zip",
+            use_container_width=True
+        )
+        st.success(f"{len(reports)}명의 리포트가 생성되었습니다!")
+
+
+def show_roster_import():
+    """학생 명단 가져오기 (CSV: 학번, 이름)"""
+    st.markdown("---")
+    with st.expander("📥 학생 명단 가져오기"):
+        uploaded = st.file_uploader(
+            "CSV 파일 (첫 열: 학번, 둘째 열: 이름)",
+            type=["csv"],
+            help="이미 등록된 학번은 건너뜁니다"
+        )
+        if uploaded is not None and st.button("명단 가져오기"):
+            try:
+                roster = pd.read_csv(uploaded, dtype=str, header=None, encoding="utf-8-sig").fillna("")
+            except Exception as e:
+                st.error(f"CSV 파일을 읽지 못했습니다: {e}")
+                return
+            if roster.shape[1] < 2:
+                st.error("학번과 이름 두 열이 필요합니다.")
+                return
+            if roster.iloc[0, 0].strip() == "학번":
+                roster = roster.iloc[1:]
+
+            added = import_students([
+                {"student_id": row[0], "name": row[1]}
+                for row in roster.itertuples(index=False)
+            ])
+            st.success(f"✅ {len(roster)}명 중 {added}명을 새로 추가했습니다.")
+
+
+def show_class_settings():
+    """학급 설정 표시"""
+    st.markdown("---")
+    st.markdown("### ⚙️ 학급 설정")
+
+    use_answer_cache = st.checkbox(
+        "같은 질문에는 저장된 답변 재사용",
+        value=get_class_setting("answer_cache_enabled"),
+        help="끄면 학생이 같은 질문을 해도 항상 새 답변을 생성합니다"
+    )
+    if use_answer_cache != get_class_setting("answer_cache_enabled"):
+        save_class_setting("answer_cache_enabled", use_answer_cache)
+        st.success("✅ 설정이 저장되었습니다!")
+
+    use_similar = st.checkbox(
+        "비슷하게 바꿔 쓴 질문에도 저장된 답변 재사용",
+        value=get_class_setting("similar_question_enabled"),
+        help="인물·행동·의문사가 모두 같은 질문만 재사용합니다. "
+             "시험 측정(질문 1만 개, 기준 0.6, 의문 표현·어순·어미를 바꿔 쓴 질문): "
+             "바꿔 쓴 질문 88% 재사용 (띄어쓰기 없이 붙여 쓴 질문은 재사용 안 함), "
+             "인물이나 행동만 다른 질문 오답 0% (내용어 확인 없이는 87%)",
+        disabled=not use_answer_cache
+    )
+    if use_similar != get_class_setting("similar_question_enabled"):
+        save_class_setting("similar_question_enabled", use_similar)
+        st.success("✅ 설정이 저장되었습니다!")
+
+    threshold = st.slider(
+        "비슷한 질문으로 볼 유사도 기준",
+        min_value=0.5,
+        max_value=1.0,
+        value=float(get_class_setting("similar_question_threshold")),
+        step=0.05,
+        help="높을수록 거의 같은 질문일 때만 저장된 답변을 재사용합니다",
+        disabled=not (use_answer_cache and use_similar)
+    )
+    if threshold != get_class_setting("similar_question_threshold"):
+        save_class_setting("similar_question_threshold", threshold)
+
+    if st.button("저장된 답변 모두 지우기"):
+        clear_answer_cache()
+        clear_similarity_index()
+        st.success("저장된 답변을 지웠습니다.")
+
+
+def show_system_status():
+    """시스템 상태 (캐시 적중률 등) 표시"""
+    st.markdown("---")
+    with st.expander("⚙️ 시스템 상태"):
+        st.markdown("**AI 요청 대기열**")
+        st.json(get_rate_limit_stats())
+        st.markdown("**AI 요청 시간 초과**")
+        st.json(get_timeout_stats())
+        st.markdown("**AI 백엔드 (API 키/모델)**")
+        st.json(get_backend_stats())
+        st.markdown("**대화 저장 버퍼**")
+        st.json(get_conversation_buffer_stats())
+        st.markdown("**읽기 캐시**")
+        st.json(get_cache_stats())
+        st.markdown("**답변 캐시**")
+        st.json(get_answer_cache_stats())
+        st.markdown("**유사 질문 재사용**")
+        st.json(get_similarity_index_stats())
+        st.markdown("**점수 캐시**")
+        st.json(get_score_cache_stats())
+        st.markdown("**묶음 채점**")
+        st.json(get_batch_scoring_stats())
+
+
 def run():
     """교사 대시보드 실행 함수 (main.py에서 호출됨)"""
     # 세션 상태 초기화
@@ -239,11 +408,14 @@ def run():
         st.session_state.teacher_authenticated = False
         st.rerun()
 
+    # 전체 학생 통계를 한 번만 로드
+    students_data = get_all_students_with_stats()
+
     # 전체 통계 표시
-    show_overview()
+    show_overview(students_data)
 
     # 학생 목록 표시
-    students_sorted = show_students_table()
+    students_sorted = show_students_table(students_data)
 
     if students_sorted:
         st.markdown("---")
@@ -263,3 +435,8 @@ def run():
         # 선택된 학생 상세 정보 표시
         if st.session_state.selected_student:
             show_student_detail(st.session_state.selected_student)
+
+    show_class_reports(students_data)
+    show_roster_import()
+    show_class_settings()
+    show_system_status()
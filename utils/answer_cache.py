@@ -0,0 +1,234 @@
+"""
+답변 캐시 모듈
+모든 학생이 같은 이야기를 읽기 때문에 같은 질문이 자주 반복됩니다.
+정규화한 질문과 (이야기 + 작가 프롬프트) 해시를 키로 AI 작가의 답변을 저장해 두고,
+같은 질문이 다시 들어오면 모델을 호출하지 않고 저장된 답변을 돌려줍니다.
+
+캐시는 데이터베이스(data/app.db)의 answer_cache 테이블에 질문 키별 한 행으로 저장되므로
+답변 하나를 저장할 때 그 행만 씁니다. 최대 개수(LRU)와 유지 기간(TTL)으로 정리됩니다.
+예전 data/answer_cache.json이 있으면 처음 한 번 가져옵니다 (원본 파일은 그대로 둠).
+"""
+
+import hashlib
+import re
+import threading
+import unicodedata
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from .database import get_connection
+from .file_store import read_json
+
+# 데이터 디렉토리 경로
+BASE_DIR = Path(__file__).parent.parent
+DATA_DIR = BASE_DIR / "data"
+LEGACY_ANSWER_CACHE_FILE = DATA_DIR / "answer_cache.json"
+
+# 최대 저장 개수 (넘으면 가장 오래 쓰이지 않은 답변부터 삭제)
+ANSWER_CACHE_MAX_ENTRIES = 2000
+
+# 저장된 답변의 유지 기간
+ANSWER_CACHE_TTL = timedelta(days=30)
+
+_lock = threading.Lock()
+_prepared = False  # 이 프로세스에서 예전 JSON 가져오기를 마쳤는지
+_stats = {"hits": 0, "misses": 0}
+
+
+def normalize_question(question):
+    """
+    질문을 비교용으로 정규화합니다.
+    (유니코드 정규화, 소문자, 공백 정리, 끝 문장부호 제거)
+
+    Args:
+        question (str): 학생의 질문
+
+    Returns:
+        str: 정규화된 질문
+    """
+    text = unicodedata.normalize('NFKC', question).lower()
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text.rstrip('?!.~… ')
+
+
+def context_hash(context):
+    """
+    답변에 영향을 주는 고정 프롬프트(이야기 + 작가 역할)의 해시를 만듭니다.
+
+    Args:
+        context (str): 고정 프롬프트
+
+    Returns:
+        str: 해시 (앞 16자리)
+    """
+    return hashlib.sha256(context.encode('utf-8')).hexdigest()[:16]
+
+
+def _make_key(question, context):
+    return f"{context_hash(context)}:{normalize_question(question)}"
+
+
+def _prepare(conn):
+    """
+    예전 JSON 캐시를 가져옵니다 (처음 한 번, 이 프로세스에서 확인은 한 번).
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+    """
+    global _prepared
+    with _lock:
+        if _prepared:
+            return
+        with conn:
+            done = conn.execute("SELECT value FROM meta WHERE key = 'answer_cache_imported'").fetchone()
+            if not done:
+                saved = read_json(LEGACY_ANSWER_CACHE_FILE, {}) if LEGACY_ANSWER_CACHE_FILE.exists() else {}
+                conn.executemany(
+                    """INSERT OR IGNORE INTO answer_cache
+                       (key, context_hash, question, answer, created_at, last_used, hits)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                    [
+                        (
+                            key, key.split(':', 1)[0], entry.get('question', ''), entry['answer'],
+                            entry.get('created_at', ''), entry.get('last_used', ''), entry.get('hits', 0)
+                        )
+                        for key, entry in saved.get('entries', {}).items() if 'answer' in entry
+                    ]
+                )
+                conn.execute("INSERT INTO meta (key, value) VALUES ('answer_cache_imported', '1')")
+        _prepared = True
+
+
+def _is_expired(created_at, now):
+    try:
+        return datetime.fromisoformat(created_at) + ANSWER_CACHE_TTL < now
+    except (TypeError, ValueError):
+        return True
+
+
+def get_cached_answer(question, context):
+    """
+    같은 질문에 저장된 답변을 찾습니다.
+
+    Args:
+        question (str): 학생의 질문
+        context (str): 고정 프롬프트 (이야기 + 작가 역할)
+
+    Returns:
+        str: 저장된 답변 (없으면 None)
+    """
+    key = _make_key(question, context)
+    now = datetime.now()
+
+    answer = None
+    try:
+        conn = get_connection()
+        _prepare(conn)
+        row = conn.execute(
+            "SELECT answer, created_at FROM answer_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None:
+            with conn:
+                if _is_expired(row['created_at'], now):
+                    conn.execute("DELETE FROM answer_cache WHERE key = ?", (key,))
+                else:
+                    conn.execute(
+                        "UPDATE answer_cache SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                        (now.isoformat(), key)
+                    )
+                    answer = row['answer']
+    except Exception as e:
+        print(f"답변 캐시 조회 오류: {e}")
+
+    with _lock:
+        _stats['hits' if answer is not None else 'misses'] += 1
+    return answer
+
+
+def store_answer(question, context, answer):
+    """
+    답변을 캐시에 저장합니다.
+
+    Args:
+        question (str): 학생의 질문
+        context (str): 고정 프롬프트 (이야기 + 작가 역할)
+        answer (str): AI 작가의 답변
+    """
+    key = _make_key(question, context)
+    now = datetime.now().isoformat()
+
+    try:
+        conn = get_connection()
+        _prepare(conn)
+        with conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO answer_cache
+                   (key, context_hash, question, answer, created_at, last_used, hits)
+                   VALUES (?, ?, ?, ?, ?, ?, 0)""",
+                (key, context_hash(context), question, answer, now, now)
+            )
+            # 최대 개수를 넘은 만큼 가장 오래 쓰이지 않은 답변부터 삭제
+            conn.execute(
+                """DELETE FROM answer_cache WHERE key IN (
+                       SELECT key FROM answer_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                   )""",
+                (ANSWER_CACHE_MAX_ENTRIES,)
+            )
+    except Exception as e:
+        print(f"답변 캐시 저장 오류: {e}")
+
+
+def get_cached_answers(context):
+    """
+    같은 고정 프롬프트로 저장된 (만료되지 않은) 질문과 답변을 모두 반환합니다.
+    (유사도 색인을 만들 때 사용)
+
+    Args:
+        context (str): 고정 프롬프트 (이야기 + 작가 역할)
+
+    Returns:
+        list: [(질문, 답변)]
+    """
+    now = datetime.now()
+
+    try:
+        conn = get_connection()
+        _prepare(conn)
+        rows = conn.execute(
+            "SELECT question, answer, created_at FROM answer_cache WHERE context_hash = ? ORDER BY last_used",
+            (context_hash(context),)
+        ).fetchall()
+    except Exception as e:
+        print(f"답변 캐시 조회 오류: {e}")
+        return []
+    return [(row['question'], row['answer']) for row in rows if not _is_expired(row['created_at'], now)]
+
+
+def clear_answer_cache():
+    """저장된 답변을 모두 지웁니다."""
+    try:
+        conn = get_connection()
+        _prepare(conn)
+        with conn:
+            conn.execute("DELETE FROM answer_cache")
+    except Exception as e:
+        print(f"답변 캐시 삭제 오류: {e}")
+
+
+def get_answer_cache_stats():
+    """
+    답변 캐시 적중/실패 횟수와 저장 개수를 반환합니다.
+
+    Returns:
+        dict: {"hits", "misses", "entries"}
+    """
+    try:
+        conn = get_connection()
+        _prepare(conn)
+        entries = conn.execute("SELECT COUNT(*) FROM answer_cache").fetchone()[0]
+    except Exception as e:
+        print(f"답변 캐시 조회 오류: {e}")
+        entries = 0
+
+    with _lock:
+        return {**_stats, "entries": entries}
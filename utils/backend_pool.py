@@ -0,0 +1,159 @@
+"""
+API 백엔드 풀 모듈
+API 키 하나의 할당량이 반 전체 요청의 한계가 되지 않도록
+여러 (API 키, 모델) 조합을 백엔드로 두고 요청을 나눠 보냅니다.
+
+- 요청은 선호 모델의 백엔드 중 가장 한가한 곳(대기 + 진행 중인 요청이 적고
+  남은 분당 요청 수가 많은 곳)으로 보냅니다.
+- 할당량 초과(429)가 연달아 나는 백엔드는 잠시 제외했다가 다시 씁니다.
+- 백엔드마다 할당량이 따로 있으므로 요청 속도 제한기도 백엔드마다 하나씩 둡니다.
+"""
+
+import hashlib
+import threading
+import time
+
+from .rate_limiter import get_governor
+
+# 할당량 초과가 이 횟수만큼 연달아 나면 백엔드를 잠시 제외
+EJECT_AFTER_RATE_LIMITS = 3
+
+# 제외 시간 (초)
+EJECT_SECONDS = 60.0
+
+
+def mask_key(api_key):
+    """
+    화면과 로그에 표시할 수 있도록 API 키를 가립니다.
+
+    Args:
+        api_key (str): API 키
+
+    Returns:
+        str: 마지막 4자리만 남긴 키
+    """
+    return f"…{api_key[-4:]}" if api_key else "(없음)"
+
+
+class Backend:
+    """요청을 보낼 (API 키, 모델) 조합 하나"""
+
+    def __init__(self, api_key, model_name, model, context_cache=None):
+        """
+        Args:
+            api_key (str): API 키
+            model_name (str): 모델 이름
+            model: 이 키로 호출하는 모델 객체
+            context_cache (ContextCacheManager): 이 백엔드의 컨텍스트 캐시 (없으면 None)
+        """
+        self.name = f"{mask_key(api_key)}/{model_name}"
+        self.model_name = model_name
+        self.model = model
+        self.context_cache = context_cache
+        # 할당량은 키마다 따로이므로 요청 제한기는 전체 키의 해시로 구분
+        # (표시용 이름은 끝 4자리만 보여 주므로 끝이 같은 키끼리 겹칠 수 있음)
+        key_hash = hashlib.sha256((api_key or "").encode('utf-8')).hexdigest()[:12]
+        self.governor = get_governor(f"{key_hash}/{model_name}")
+        self.consecutive_rate_limits = 0
+        self.ejected_until = 0.0
+        self.stats = {"requests": 0, "errors": 0, "rate_limits": 0, "ejections": 0}
+
+    def is_ejected(self, now):
+        return self.ejected_until > now
+
+
+class BackendPool:
+    """백엔드 목록에서 요청마다 보낼 곳을 고르고 할당량 초과 백엔드를 잠시 제외합니다."""
+
+    def __init__(self, backends):
+        """
+        Args:
+            backends (list): Backend 목록 (앞쪽이 기본 백엔드)
+        """
+        if not backends:
+            raise ValueError("백엔드가 하나 이상 필요합니다.")
+        self.backends = backends
+        self._lock = threading.Lock()
+
+    @property
+    def max_in_flight(self):
+        """모든 백엔드의 동시 요청 한도 합계"""
+        return sum(backend.governor.max_in_flight for backend in self.backends)
+
+    def pick(self, model_name=None, exclude=None):
+        """
+        요청을 보낼 백엔드를 고릅니다.
+        선호 모델의 백엔드가 모두 제외되어 있으면 다른 모델의 백엔드를 쓰고,
+        모든 백엔드가 제외되어 있으면 가장 먼저 돌아오는 백엔드를 씁니다.
+
+        Args:
+            model_name (str): 선호 모델 (None이면 상관없음)
+            exclude (Backend): 방금 실패한 백엔드 (다른 곳이 있으면 피함)
+
+        Returns:
+            Backend: 고른 백엔드
+        """
+        now = time.monotonic()
+        with self._lock:
+            active = [backend for backend in self.backends if not backend.is_ejected(now)]
+        if not active:
+            return min(self.backends, key=lambda backend: backend.ejected_until)
+
+        candidates = [backend for backend in active if backend.model_name == model_name] or active
+        if exclude is not None and len(candidates) > 1:
+            candidates = [backend for backend in candidates if backend is not exclude]
+
+        def load(backend):
+            pending, rpm_left = backend.governor.get_load()
+            return pending, -rpm_left
+
+        return min(candidates, key=load)
+
+    def record_success(self, backend):
+        """요청이 성공했음을 기록합니다 (연속 할당량 초과 횟수 초기화)."""
+        with self._lock:
+            backend.stats['requests'] += 1
+            backend.consecutive_rate_limits = 0
+
+    def record_error(self, backend, rate_limited=False):
+        """
+        요청이 실패했음을 기록하고, 할당량 초과가 이어지면 백엔드를 잠시 제외합니다.
+
+        Args:
+            backend (Backend): 실패한 백엔드
+            rate_limited (bool): 할당량 초과(429) 오류인지 여부
+        """
+        with self._lock:
+            backend.stats['requests'] += 1
+            backend.stats['errors'] += 1
+            if not rate_limited:
+                return
+            backend.stats['rate_limits'] += 1
+            backend.consecutive_rate_limits += 1
+            if backend.consecutive_rate_limits >= EJECT_AFTER_RATE_LIMITS:
+                backend.consecutive_rate_limits = 0
+                backend.ejected_until = time.monotonic() + EJECT_SECONDS
+                backend.stats['ejections'] += 1
+                print(f"[DEBUG] 할당량 초과가 이어져 {EJECT_SECONDS:.0f}초 동안 제외: {backend.name}")
+
+    def get_stats(self):
+        """
+        백엔드별 상태를 반환합니다 (교사 대시보드 표시용).
+
+        Returns:
+            list: [{"backend", "model", "in_flight", "requests", "errors", "rate_limits", "ejected_seconds", ...}, ...]
+        """
+        now = time.monotonic()
+        stats = []
+        with self._lock:
+            for backend in self.backends:
+                governor_stats = backend.governor.get_stats()
+                stats.append({
+                    "backend": backend.name,
+                    "model": backend.model_name,
+                    "in_flight": governor_stats['in_flight'],
+                    "queue_depth": governor_stats['queue_depth'],
+                    **backend.stats,
+                    "ejected_seconds": round(max(0.0, backend.ejected_until - now), 1),
+                })
+        return stats
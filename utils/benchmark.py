@@ -0,0 +1,388 @@
+"""
+성능 측정 모듈
+실제 데이터나 모델 호출 없이 합성 데이터로 각 기능의 성능을 측정합니다.
+
+사용법:
+    python -m utils.benchmark similarity [질문 수]
+    python -m utils.benchmark storage [동시 쓰기 프로세스 수]   (잠금을 쓰는 저장에서 쓰기가 사라지면 종료 코드 1)
+    python -m utils.benchmark login [최대 학생 수]
+"""
+
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+from .file_store import LOCK_SUFFIX, read_json, update_json, flush_pending_syncs
+from .similarity_index import SimilarityIndex, DEFAULT_SIMILARITY_THRESHOLD
+
+# 저장소 벤치마크가 임시 파일을 만들 디렉토리 (실제 데이터와 같은 디스크)
+DATA_DIR = Path(__file__).parent.parent / "data"
+
+# 합성 질문 재료
+_SUBJECTS = [
+    "까치", "호랑이", "토끼", "할머니", "나그네", "선비", "나무꾼", "도깨비",
+    "여우", "거북이", "두꺼비", "왕", "공주", "농부", "어부", "구렁이"
+]
+_ACTIONS = [
+    "날개를 잃었", "집을 떠났", "거짓말을 했", "산으로 갔", "울었", "화가 났",
+    "약속을 지켰", "문을 열었", "보물을 숨겼", "노래를 불렀", "길을 잃었",
+    "친구를 도왔", "잠을 못 잤", "편지를 썼", "강을 건넜", "꿈을 꾸었"
+]
+_PLACES = [
+    "", "마을에서 ", "숲속에서 ", "밤에 ", "처음에 ", "마지막에 ", "장터에서 ", "겨울에 "
+]
+# 같은 질문을 다르게 쓴 형태
+_PARAPHRASES = [
+    # 어미, 조사, 띄어쓰기, 말머리만 다름
+    "{s}는 {p}왜 {a}어요?",
+    "{s}가 {p}왜 {a}나요",
+    "그런데 {s}는 {p}왜 {a}나요?",
+    "{s}는{p}왜{a}나요??",
+    # 의문 표현, 어순, 시제 어미까지 바꿔 씀
+    "{s}가 {p}{a}던 이유가 뭐예요?",
+    "{s}는 {p}무엇 때문에 {a}나요?",
+    "{s}는 {p}어째서 {a}을까요?",
+    "왜 {s}는 {p}{a}어요?",
+    "{p}{s}가 {a}던 까닭이 궁금해요",
+]
+
+
+def _percentile(values, ratio):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def benchmark_similarity(size=10000, queries=1000, threshold=DEFAULT_SIMILARITY_THRESHOLD, seed=0):
+    """
+    유사도 색인의 적중률과 검색 시간을 측정합니다.
+    색인된 질문을 다르게 쓴 질문(적중해야 함)과,
+    같은 방식으로 쓴 처음 보는 (인물, 행동)의 질문(적중하면 안 됨)을 번갈아 검색합니다.
+
+    Args:
+        size (int): 색인할 질문 수
+        queries (int): 검색할 질문 수
+        threshold (float): 유사도 기준
+        seed (int): 난수 시드
+
+    Returns:
+        dict: 측정 결과
+    """
+    rng = random.Random(seed)
+    pairs = [(s, a) for s in _SUBJECTS for a in _ACTIONS]
+    rng.shuffle(pairs)
+    # (인물, 행동) 조합의 1/5은 색인하지 않고 "처음 보는 질문"으로 남겨 둠
+    held_out = len(pairs) // 5
+    unseen = pairs[:held_out]
+    indexed = [(s, a, p) for s, a in pairs[held_out:] for p in _PLACES][:size]
+
+    index = SimilarityIndex()
+    start = time.perf_counter()
+    for i, (s, a, p) in enumerate(indexed):
+        index.add(f"{s}는 {p}왜 {a}나요?", f"답변 {i}")
+    # 조합이 모자라면 번호를 붙여 채움
+    for i in range(len(indexed), size):
+        index.add(f"{i}번째 장면에서 {rng.choice(_SUBJECTS)}는 무엇을 했나요?", f"답변 {i}")
+    build_seconds = time.perf_counter() - start
+
+    hits = {"paraphrase": 0, "near_miss": 0}
+    unchecked_hits = {"paraphrase": 0, "near_miss": 0}  # 내용어 확인 없이 유사도만 본 경우
+    totals = {"paraphrase": 0, "near_miss": 0}
+    latencies = []
+    for i in range(queries):
+        if i % 2 == 0:
+            kind = "paraphrase"
+            s, a, p = rng.choice(indexed)
+            question = rng.choice(_PARAPHRASES).format(s=s, a=a, p=p)
+        else:
+            kind = "near_miss"
+            s, a = rng.choice(unseen)
+            question = rng.choice(_PARAPHRASES).format(s=s, a=a, p=rng.choice(_PLACES))
+
+        start = time.perf_counter()
+        result = index.search(question)
+        latencies.append((time.perf_counter() - start) * 1000)
+        unchecked = index.search(question, check_content=False)
+
+        totals[kind] += 1
+        hits[kind] += result is not None and result[0] >= threshold
+        unchecked_hits[kind] += unchecked is not None and unchecked[0] >= threshold
+
+    return {
+        "indexed": len(index),
+        "build_seconds": round(build_seconds, 2),
+        "threshold": threshold,
+        "paraphrase_hit_rate": round(hits["paraphrase"] / max(totals["paraphrase"], 1), 3),
+        "near_miss_false_hit_rate": round(hits["near_miss"] / max(totals["near_miss"], 1), 3),
+        "unchecked_paraphrase_hit_rate": round(unchecked_hits["paraphrase"] / max(totals["paraphrase"], 1), 3),
+        "unchecked_near_miss_false_hit_rate": round(
+            unchecked_hits["near_miss"] / max(totals["near_miss"], 1), 3
+        ),
+        "lookup_ms_avg": round(sum(latencies) / len(latencies), 3),
+        "lookup_ms_p95": round(_percentile(latencies, 0.95), 3),
+    }
+
+
+def _storage_writer(path, writer_id, writes, locked, errors):
+    """저장소 벤치마크의 쓰기 프로세스 하나 (자기 카운터를 writes번 올리고 매번 파일을 다시 읽어 봄)"""
+    def _increment(data):
+        data['counts'][writer_id] = data['counts'].get(writer_id, 0) + 1
+
+    for _ in range(writes):
+        try:
+            if locked:
+                update_json(path, _increment, default={'counts': {}})
+            else:
+                # 예전 방식: 잠금 없이 읽고 같은 파일에 바로 덮어씀
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                _increment(data)
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f)
+            read_json(path)
+        except (ValueError, OSError):
+            with errors.get_lock():
+                errors.value += 1  # 반쯤 쓰인 파일을 읽음
+    flush_pending_syncs()
+
+
+def _sharing_writer(settings_file, db_file, writer_id, writes):
+    """
+    공유 설정 확인의 쓰기 프로세스 하나.
+    자기 공유 설정을 writes번 바꿈 (짝수 번째는 익명 공유, 홀수 번째는 이름 공개로 공유 안 함)
+    """
+    from . import database
+    from . import sharing_manager
+
+    sys.stdout = open(os.devnull, 'w')  # 프로세스마다 찍는 [DEBUG] 출력 숨김
+    database.DB_FILE = db_file
+    sharing_manager.SHARING_SETTINGS_FILE = settings_file
+    for i in range(writes):
+        sharing_manager.save_sharing_preference(
+            writer_id, f"학생{writer_id}", i % 2 == 0, "anonymous" if i % 2 == 0 else "named"
+        )
+    flush_pending_syncs()
+
+
+def _check_sharing_preferences(writers, writes):
+    """
+    여러 프로세스가 save_sharing_preference로 동시에 공유 설정을 바꿀 때
+    사라진 쓰기와 겹친 익명 번호가 없는지 확인합니다 (임시 설정 파일과 임시 데이터베이스 사용).
+
+    Args:
+        writers (int): 동시에 쓰는 프로세스 수 (학생 수)
+        writes (int): 프로세스마다 쓰는 횟수
+
+    Returns:
+        dict: 확인 결과
+    """
+    settings_file = DATA_DIR / f"sharing_benchmark_{os.getpid()}.json"
+    db_file = DATA_DIR / f"sharing_benchmark_{os.getpid()}.db"
+    processes = [
+        multiprocessing.Process(target=_sharing_writer, args=(settings_file, db_file, str(i), writes))
+        for i in range(writers)
+    ]
+
+    start = time.perf_counter()
+    try:
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        settings = read_json(settings_file, {}).get('sharing_settings', {})
+        expected_shared = (writes - 1) % 2 == 0
+        lost = sum(
+            1 for i in range(writers)
+            if settings.get(str(i), {}).get('is_shared') != expected_shared
+        )
+        anonymous_ids = [setting.get('anonymous_id') for setting in settings.values()]
+        duplicate_ids = len(anonymous_ids) - len(set(anonymous_ids))
+    finally:
+        for leftover in (settings_file, settings_file.with_name(settings_file.name + LOCK_SUFFIX),
+                         db_file, Path(f"{db_file}-wal"), Path(f"{db_file}-shm")):
+            if leftover.exists():
+                leftover.unlink()
+
+    return {
+        "sharing_lost_writes": lost,
+        "sharing_duplicate_anonymous_ids": duplicate_ids,
+        "sharing_failed_writers": sum(1 for process in processes if process.exitcode != 0),
+        "sharing_seconds": round(elapsed, 2),
+    }
+
+
+def benchmark_storage(writers=200, writes=5):
+    """
+    여러 프로세스가 data/ 아래 JSON 파일 하나를 동시에 고칠 때 쓰기가 사라지거나
+    반쯤 쓰인 파일이 보이는지 확인합니다.
+    잠금 + 원자적 쓰기(update_json)와 잠금 없는 읽기-수정-쓰기를 같은 조건으로 비교하고,
+    공유 설정 저장(save_sharing_preference)도 같은 수의 프로세스로 동시에 실행해 봅니다.
+    잠금을 쓰는 두 저장에서 사라진 쓰기가 하나도 없어야 "ok"가 True입니다.
+
+    Args:
+        writers (int): 동시에 쓰는 프로세스 수
+        writes (int): 프로세스마다 쓰는 횟수
+
+    Returns:
+        dict: 측정 결과
+    """
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    result = {"writers": writers, "writes_per_writer": writes, "expected_writes": writers * writes}
+
+    for mode, locked in (("locked", True), ("unlocked", False)):
+        path = DATA_DIR / f"storage_benchmark_{os.getpid()}.json"
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'counts': {}}, f)
+        errors = multiprocessing.Value('i', 0)
+        processes = [
+            multiprocessing.Process(target=_storage_writer, args=(path, str(i), writes, locked, errors))
+            for i in range(writers)
+        ]
+
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        try:
+            saved = sum(read_json(path)['counts'].values())
+        except ValueError:
+            saved = 0  # 마지막 파일까지 깨짐
+        result[f"{mode}_saved_writes"] = saved
+        result[f"{mode}_lost_writes"] = writers * writes - saved
+        result[f"{mode}_torn_reads"] = errors.value
+        result[f"{mode}_seconds"] = round(elapsed, 2)
+
+        for leftover in (path, path.with_name(path.name + LOCK_SUFFIX)):
+            if leftover.exists():
+                leftover.unlink()
+
+    result.update(_check_sharing_preferences(writers, writes))
+    result["ok"] = (
+        result["locked_lost_writes"] == 0
+        and result["locked_torn_reads"] == 0
+        and result["sharing_lost_writes"] == 0
+        and result["sharing_duplicate_anonymous_ids"] == 0
+        and result["sharing_failed_writers"] == 0
+    )
+    return result
+
+
+def _legacy_login(path, student_id, name):
+    """예전 students.json 방식의 로그인: 목록 전체를 읽어 선형 검색하고, 새 학생이면 전체를 다시 씀"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if any(s['student_id'] == student_id for s in data['students']):
+        return
+    data['students'].append({"student_id": student_id, "name": name, "created_at": ""})
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def benchmark_login(max_size=50000, logins=500, seed=0):
+    """
+    학생 수에 따른 로그인(get_student + save_student) 시간을 측정합니다.
+    임시 데이터베이스에 학생 명단을 한 번에 가져온 뒤(import_students),
+    등록된 학생과 새 학생의 로그인 시간을 예전 students.json 방식과 비교합니다.
+
+    Args:
+        max_size (int): 가장 큰 명단의 학생 수 (10배씩 줄인 크기도 함께 측정)
+        logins (int): 크기마다 측정할 로그인 수
+
+    Returns:
+        dict: 측정 결과
+    """
+    from . import database
+    from . import data_manager
+
+    rng = random.Random(seed)
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    db_file = DATA_DIR / f"login_benchmark_{os.getpid()}.db"
+    legacy_file = DATA_DIR / f"login_benchmark_{os.getpid()}.json"
+    # 실제 데이터베이스 대신 임시 데이터베이스 사용 (이 프로세스에서 처음 연결하기 전에 바꿔야 함)
+    database.DB_FILE = db_file
+
+    sizes = sorted({max(1, max_size // 10 ** i) for i in range(4)})
+    result = {"logins_per_size": logins}
+    roster = []
+    try:
+        for size in sizes:
+            new_students = [
+                {"student_id": f"{10000000 + i}", "name": f"학생{i}"} for i in range(len(roster), size)
+            ]
+            start = time.perf_counter()
+            data_manager.import_students(new_students)
+            result[f"{size}_import_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            roster.extend(new_students)
+
+            # 새로 시작한 프로세스처럼 메모리의 학생 목록을 다시 읽음 (첫 로그인 비용)
+            start = time.perf_counter()
+            data_manager.reload_students()
+            result[f"{size}_registry_load_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+            existing_times = []
+            for _ in range(logins):
+                student = rng.choice(roster)
+                start = time.perf_counter()
+                if data_manager.get_student(student['student_id']) is None:
+                    raise RuntimeError("등록된 학생을 찾지 못했습니다.")
+                data_manager.save_student(student['student_id'], student['name'])
+                existing_times.append(time.perf_counter() - start)
+
+            new_times = []
+            for i in range(min(logins, 50)):
+                student_id = f"9{size:08d}{i:04d}"
+                start = time.perf_counter()
+                data_manager.get_student(student_id)
+                data_manager.save_student(student_id, "새학생")
+                new_times.append(time.perf_counter() - start)
+
+            with open(legacy_file, 'w', encoding='utf-8') as f:
+                json.dump({"students": [dict(s, created_at="") for s in roster]}, f, ensure_ascii=False, indent=2)
+            legacy_times = []
+            for i in range(min(logins, 20)):
+                start = time.perf_counter()
+                _legacy_login(legacy_file, f"8{size:08d}{i:04d}", "새학생")
+                legacy_times.append(time.perf_counter() - start)
+
+            result[f"{size}_existing_login_p50_ms"] = round(_percentile(existing_times, 0.5) * 1000, 3)
+            result[f"{size}_existing_login_p95_ms"] = round(_percentile(existing_times, 0.95) * 1000, 3)
+            result[f"{size}_new_login_p50_ms"] = round(_percentile(new_times, 0.5) * 1000, 3)
+            result[f"{size}_legacy_json_login_p50_ms"] = round(_percentile(legacy_times, 0.5) * 1000, 3)
+    finally:
+        database.get_connection().close()
+        for leftover in (db_file, Path(f"{db_file}-wal"), Path(f"{db_file}-shm"), legacy_file):
+            if leftover.exists():
+                leftover.unlink()
+
+    return result
+
+
+BENCHMARKS = {
+    "similarity": benchmark_similarity,
+    "storage": benchmark_storage,
+    "login": benchmark_login,
+}
+
+
+def main(argv):
+    if not argv or argv[0] not in BENCHMARKS:
+        print(f"사용법: python -m utils.benchmark [{'|'.join(BENCHMARKS)}] [크기]")
+        return 1
+
+    args = [int(arg) for arg in argv[1:2]]
+    result = BENCHMARKS[argv[0]](*args)
+    for key, value in result.items():
+        print(f"{key}: {value}")
+    return 1 if result.get("ok") is False else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,79 @@
+"""
+학급 설정 모듈
+교사가 대시보드에서 바꾸는 학급 단위 설정을 class_settings.json으로 관리합니다.
+"""
+
+from pathlib import Path
+
+from .file_store import read_json, update_json
+from .read_cache import cached_file, invalidate_file
+
+# 데이터 디렉토리 경로
+BASE_DIR = Path(__file__).parent.parent
+DATA_DIR = BASE_DIR / "data"
+CLASS_SETTINGS_FILE = DATA_DIR / "class_settings.json"
+
+# 설정 기본값
+DEFAULT_CLASS_SETTINGS = {
+    "answer_cache_enabled": True,  # 같은 질문에 저장된 답변 재사용
+    # 비슷한 질문(바꿔 쓴 질문)에도 저장된 답변 재사용. 다른 질문에 엉뚱한 답이 나갈 수 있으므로
+    # 교사가 켰을 때만 사용 (유사도 기준은 utils.similarity_index.DEFAULT_SIMILARITY_THRESHOLD 참고)
+    "similar_question_enabled": False,
+    "similar_question_threshold": 0.6,  # 비슷한 질문으로 볼 유사도 기준 (0-1)
+}
+
+# 디렉토리가 없으면 생성
+DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+
+def load_class_settings():
+    """
+    학급 설정을 로드합니다. 저장되지 않은 항목은 기본값을 사용합니다.
+
+    Returns:
+        dict: 학급 설정
+    """
+    def _load():
+        return read_json(CLASS_SETTINGS_FILE, {})
+
+    settings = dict(DEFAULT_CLASS_SETTINGS)
+    try:
+        if CLASS_SETTINGS_FILE.exists():
+            settings.update(cached_file(CLASS_SETTINGS_FILE, _load))
+    except Exception as e:
+        print(f"학급 설정 로드 오류: {e}")
+    return settings
+
+
+def get_class_setting(key):
+    """
+    학급 설정 값 하나를 조회합니다.
+
+    Args:
+        key (str): 설정 이름
+
+    Returns:
+        설정 값
+    """
+    return load_class_settings().get(key, DEFAULT_CLASS_SETTINGS.get(key))
+
+
+def save_class_setting(key, value):
+    """
+    학급 설정 값 하나를 저장합니다.
+
+    Args:
+        key (str): 설정 이름
+        value: 설정 값
+
+    Returns:
+        bool: 성공 여부
+    """
+    try:
+        # 다른 세션이 그 사이에 바꾼 설정을 덮어쓰지 않도록 잠금 안에서 파일을 다시 읽어 고침
+        update_json(CLASS_SETTINGS_FILE, lambda settings: settings.update({key: value}), default={}, indent=2)
+        invalidate_file(CLASS_SETTINGS_FILE)
+        return True
+    except Exception as e:
+        print(f"학급 설정 저장 오류: {e}")
+        return False
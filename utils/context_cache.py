@@ -0,0 +1,220 @@
+"""
+컨텍스트 캐시 모듈
+모든 요청에 똑같이 붙는 고정 프롬프트(이야기 + 역할 지시문)를 제공자 쪽에 캐시해 두고
+요청마다 학생 질문만 보내도록 합니다.
+
+캐시 키는 고정 프롬프트 내용의 해시이므로 story.txt가 바뀌면 새 캐시가 만들어지고,
+오래된 캐시는 밀려나면서 삭제됩니다.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+# 캐시 유지 시간
+CONTEXT_CACHE_TTL = timedelta(hours=1)
+
+# 만료까지 이 시간보다 적게 남으면 새로 만듦
+REFRESH_MARGIN = timedelta(minutes=5)
+
+# 동시에 유지할 고정 프롬프트 수 (작가 답변 + 질문 분석 + 여유분)
+MAX_CACHED_PREFIXES = 4
+
+# 일시적인 오류(속도 제한, 서버 오류, 시간 초과)로 캐시를 못 만들었을 때 다시 시도하기까지의 시간
+FAILED_RETRY_AFTER = timedelta(minutes=5)
+
+
+def prefix_key(prefix):
+    """
+    고정 프롬프트의 캐시 키를 만듭니다.
+
+    Args:
+        prefix (str): 고정 프롬프트
+
+    Returns:
+        str: SHA-256 해시
+    """
+    return hashlib.sha256(prefix.encode('utf-8')).hexdigest()
+
+
+def _is_permanent_error(error):
+    """
+    캐시 생성 오류가 다시 시도해도 소용없는 오류인지 확인합니다
+    (예: 최소 토큰 수 미달, 지원하지 않는 모델). 분류는 gemini_client.classify_error를 따릅니다.
+
+    Args:
+        error (Exception): 발생한 예외
+
+    Returns:
+        bool: 다시 시도하지 않을 오류면 True
+    """
+    from .gemini_client import classify_error, ERROR_NON_RETRYABLE
+
+    return classify_error(error) == ERROR_NON_RETRYABLE
+
+
+class GeminiContextCache:
+    """Gemini CachedContent API를 사용하는 캐시 백엔드"""
+
+    def __init__(self, model_name, safety_settings, ttl=CONTEXT_CACHE_TTL):
+        self.model_name = model_name
+        self.safety_settings = safety_settings
+        self.ttl = ttl
+
+    def create(self, prefix):
+        """
+        고정 프롬프트로 캐시를 만들고 그 캐시를 사용하는 모델을 반환합니다.
+
+        Args:
+            prefix (str): 고정 프롬프트
+
+        Returns:
+            tuple: (캐시 이름, 모델)
+        """
+        import google.generativeai as genai
+        from google.generativeai import caching
+
+        cached = caching.CachedContent.create(
+            model=f"models/{self.model_name}",
+            system_instruction=prefix,
+            ttl=self.ttl
+        )
+        model = genai.GenerativeModel.from_cached_content(
+            cached,
+            safety_settings=self.safety_settings
+        )
+        return cached.name, model
+
+    def delete(self, name):
+        """제공자 쪽 캐시를 삭제합니다."""
+        from google.generativeai import caching
+
+        caching.CachedContent.get(name).delete()
+
+
+class _PrefixedModel:
+    """고정 프롬프트를 로컬에서 붙여 원래 모델로 보내는 모델 래퍼"""
+
+    def __init__(self, base_model, prefix):
+        self.base_model = base_model
+        self.prefix = prefix
+
+    def generate_content(self, contents, **kwargs):
+        return self.base_model.generate_content(f"{self.prefix}\n\n{contents}", **kwargs)
+
+    async def generate_content_async(self, contents, **kwargs):
+        return await self.base_model.generate_content_async(f"{self.prefix}\n\n{contents}", **kwargs)
+
+
+class LocalContextCache:
+    """
+    오프라인 테스트용 캐시 백엔드 (스텁)
+    제공자 API를 호출하지 않고 캐시 생성/삭제를 기록만 합니다.
+    """
+
+    def __init__(self, base_model=None, ttl=CONTEXT_CACHE_TTL):
+        self.base_model = base_model
+        self.ttl = ttl
+        self.created = []
+        self.deleted = []
+
+    def create(self, prefix):
+        name = f"local-cache/{len(self.created) + 1}"
+        self.created.append(name)
+        return name, _PrefixedModel(self.base_model, prefix)
+
+    def delete(self, name):
+        self.deleted.append(name)
+
+
+class ContextCacheManager:
+    """고정 프롬프트별 캐시 핸들을 만들고 재사용합니다."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._entries = OrderedDict()  # key -> {"name", "model", "expires_at"}
+        self._failed = {}  # key -> 다시 시도할 시각 (None이면 다시 시도하지 않음)
+        self._creating = set()  # 지금 다른 스레드가 캐시를 만드는 중인 키
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_model(self, prefix):
+        """
+        고정 프롬프트가 캐시된 모델을 반환합니다.
+        캐시를 만들 수 없으면 (예: 최소 토큰 수 미달) None을 반환하고,
+        호출자는 전체 프롬프트를 그대로 보내면 됩니다.
+
+        Args:
+            prefix (str): 고정 프롬프트
+
+        Returns:
+            모델 또는 None
+        """
+        key = prefix_key(prefix)
+        now = datetime.now()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry['expires_at'] - REFRESH_MARGIN > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry['model']
+
+            if key in self._failed:
+                retry_at = self._failed[key]
+                if retry_at is None or retry_at > now:
+                    return None
+                del self._failed[key]
+
+            if key in self._creating:
+                # 다른 스레드가 만드는 중이면 기다리지 않고 아직 유효한 캐시나 전체 프롬프트 사용
+                if entry and entry['expires_at'] > now:
+                    return entry['model']
+                return None
+
+            self._creating.add(key)
+            self.misses += 1
+
+        # 제공자 API 호출은 잠금 밖에서 (다른 고정 프롬프트의 요청을 막지 않도록)
+        try:
+            name, model = self.backend.create(prefix)
+        except Exception as e:
+            permanent = _is_permanent_error(e)
+            print(f"컨텍스트 캐시 생성 실패 (전체 프롬프트 사용"
+                  f"{'' if permanent else ', 잠시 후 다시 시도'}): {e}")
+            with self._lock:
+                self._creating.discard(key)
+                self._failed[key] = None if permanent else datetime.now() + FAILED_RETRY_AFTER
+            return None
+
+        stale_names = []
+        with self._lock:
+            self._creating.discard(key)
+            old_entry = self._entries.get(key)
+            if old_entry:
+                stale_names.append(old_entry['name'])
+
+            self._entries[key] = {
+                "name": name,
+                "model": model,
+                "expires_at": now + self.backend.ttl
+            }
+            self._entries.move_to_end(key)
+
+            # 오래된 캐시 (예: 이전 story.txt) 정리
+            while len(self._entries) > MAX_CACHED_PREFIXES:
+                _, old = self._entries.popitem(last=False)
+                stale_names.append(old['name'])
+
+        for stale_name in stale_names:
+            self._delete(stale_name)
+
+        return model
+
+    def _delete(self, name):
+        try:
+            self.backend.delete(name)
+        except Exception as e:
+            print(f"컨텍스트 캐시 삭제 오류: {e}")
@@ -1,37 +1,159 @@
 """
 데이터 관리 모듈
-학생 정보 및 대화 이력을 JSON 파일로 관리합니다.
+학생 정보 및 대화 이력을 SQLite 데이터베이스(utils.database)로 관리합니다.
+읽기 결과는 utils.read_cache에 데이터 버전(utils.database.get_data_version)을 키로 캐시되므로
+다른 프로세스가 쓴 내용도 다음 조회에 반영되고, 같은 프로세스의 쓰기 함수는 바뀐 항목을 바로 무효화합니다.
+
+대화 저장은 쓰기 지연 버퍼(utils.write_behind)를 거쳐 백그라운드에서 모아서 기록되고,
+대화를 읽는 함수는 그 학생의 저장이 남아 있으면 먼저 기록한 뒤 읽습니다.
 """
 
 import json
-import os
+import threading
 from datetime import datetime
 from pathlib import Path
 
+from .database import (
+    get_connection, get_data_version, bump_data_version,
+    VERSION_STUDENTS, VERSION_CONVERSATIONS, VERSION_SCORES
+)
+from .read_cache import cached_call, cached_file, invalidate, invalidate_prefix, clear_cache
+from .write_behind import WriteBehindBuffer
+
 # 데이터 디렉토리 경로
 BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "data"
-CONV_DIR = DATA_DIR / "conversations"
-STUDENTS_FILE = DATA_DIR / "students.json"
+CONVERSATION_JOURNAL_DIR = DATA_DIR / "conversation_journal"
+
+# 채점이 아직 끝나지 않은 대화 항목의 점수 상태
+SCORE_PENDING = "pending"
+
+# 여러 번 시도해도 채점하지 못한 대화 항목의 점수 상태 (재채점 대상)
+SCORE_FAILED = "failed"
+
+# 평가 항목 (깊이, 창의성, 이해도, 사고력)
+SCORE_DIMENSIONS = ["depth", "creativity", "comprehension", "thinking"]
 
 # 디렉토리가 없으면 생성
-CONV_DIR.mkdir(parents=True, exist_ok=True)
+DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+
+def pending_score():
+    """
+    채점 대기 중인 점수 상태를 만듭니다.
+
+    Returns:
+        dict: 대기 상태 점수
+    """
+    return {"status": SCORE_PENDING}
+
+
+def is_score_pending(score):
+    """
+    점수가 아직 채점 대기 중인지 확인합니다.
+
+    Args:
+        score (dict): 대화 항목의 score 필드
+
+    Returns:
+        bool: 대기 중이면 True
+    """
+    return isinstance(score, dict) and score.get('status') == SCORE_PENDING
+
+
+def failed_score(reason=""):
+    """
+    채점에 실패한 점수 상태를 만듭니다.
+
+    Args:
+        reason (str): 실패 이유
+
+    Returns:
+        dict: 실패 상태 점수
+    """
+    return {"status": SCORE_FAILED, "error": reason}
+
+
+def is_score_failed(score):
+    """
+    점수가 채점 실패 상태인지 확인합니다.
+
+    Args:
+        score (dict): 대화 항목의 score 필드
+
+    Returns:
+        bool: 채점에 실패했으면 True
+    """
+    return isinstance(score, dict) and score.get('status') == SCORE_FAILED
+
+
+# 학번 -> 학생 정보 (추가된 순서). 데이터베이스의 학생 버전이 바뀌었을 때만 다시 읽고,
+# 이 프로세스가 쓴 변경은 다시 읽지 않고 바로 반영
+_students = None
+_students_version = None
+_students_lock = threading.Lock()
+
+
+def _student_registry():
+    """
+    학생 목록을 메모리에 올립니다. 다른 프로세스가 학생을 추가하거나 이름을 바꿔
+    학생 버전이 바뀌었으면 다시 읽습니다. _students_lock 안에서 호출합니다.
+    """
+    global _students, _students_version
+    (version,) = get_data_version(VERSION_STUDENTS)
+    if _students is None or version != _students_version:
+        rows = get_connection().execute(
+            "SELECT student_id, name, created_at FROM students ORDER BY rowid"
+        ).fetchall()
+        _students = {row['student_id']: dict(row) for row in rows}
+        _students_version = version
+    return _students
+
+
+def _apply_student_write(version, update):
+    """
+    이 프로세스가 학생 목록에 쓴 변경을 메모리 목록에 반영합니다. _students_lock 안에서 호출합니다.
+    목록이 쓰기 직전 버전이면 바로 고치고, 그 사이 다른 프로세스의 변경이 있었으면
+    다음 조회 때 다시 읽도록 버립니다.
+
+    Args:
+        version (int): 쓰기 트랜잭션이 만든 학생 버전
+        update (callable): 메모리 목록(dict)을 받아 고치는 함수
+    """
+    global _students, _students_version
+    if _students is not None and _students_version == version - 1:
+        update(_students)
+        _students_version = version
+    else:
+        _students = None
+
+
+def reload_students():
+    """
+    메모리의 학생 목록을 버리고 데이터베이스에서 다시 읽습니다
+    (다른 도구가 데이터 버전을 올리지 않고 학생 목록을 직접 고쳤을 때).
+
+    Returns:
+        int: 학생 수
+    """
+    global _students
+    with _students_lock:
+        _students = None
+        count = len(_student_registry())
+    invalidate('roster')
+    return count
 
 
 def load_students():
     """
-    students.json 파일에서 학생 목록을 로드합니다.
+    학생 목록을 로드합니다.
 
     Returns:
         list: 학생 정보 리스트
     """
     try:
-        if STUDENTS_FILE.exists():
-            with open(STUDENTS_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data.get('students', [])
-        else:
-            return []
+        with _students_lock:
+            return [dict(student) for student in _student_registry().values()]
     except Exception as e:
         print(f"학생 데이터 로드 오류: {e}")
         return []
@@ -39,8 +161,9 @@ def load_students():
 
 def save_student(student_id, name):
     """
-    새 학생을 students.json에 추가합니다.
-    이미 존재하는 학생이면 추가하지 않습니다.
+    새 학생을 추가합니다.
+    이미 존재하는 학생이면 데이터베이스에 쓰지 않고 바로 돌아오므로
+    이미 등록된 학생의 로그인은 메모리 조회 한 번입니다.
 
     Args:
         student_id (str): 학번
@@ -50,31 +173,86 @@ def save_student(student_id, name):
         bool: 성공 여부
     """
     try:
-        students = load_students()
-
-        # 이미 존재하는 학생인지 확인
-        for student in students:
-            if student['student_id'] == student_id:
-                return True  # 이미 존재함
-
-        # 새 학생 추가
-        new_student = {
-            "student_id": student_id,
-            "name": name,
-            "created_at": datetime.now().isoformat()
-        }
-        students.append(new_student)
-
-        # 저장
-        with open(STUDENTS_FILE, 'w', encoding='utf-8') as f:
-            json.dump({"students": students}, f, ensure_ascii=False, indent=2)
-
+        with _students_lock:
+            if student_id in _student_registry():
+                return True
+
+        conn = get_connection()
+        with conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO students (student_id, name, created_at) VALUES (?, ?, ?)",
+                (student_id, name, datetime.now().isoformat())
+            )
+            if not cursor.rowcount:
+                return True  # 다른 프로세스가 먼저 추가함 (다음 조회 때 다시 읽음)
+            version = bump_data_version(conn, VERSION_STUDENTS)
+            row = conn.execute(
+                "SELECT student_id, name, created_at FROM students WHERE student_id = ?",
+                (student_id,)
+            ).fetchone()
+
+        with _students_lock:
+            _apply_student_write(version, lambda registry: registry.__setitem__(student_id, dict(row)))
+        invalidate('roster')
         return True
     except Exception as e:
         print(f"학생 저장 오류: {e}")
         return False
 
 
+def import_students(students):
+    """
+    학교 전체 명단처럼 많은 학생을 한 번에 추가합니다 (한 트랜잭션).
+    이미 존재하는 학생은 건너뜁니다.
+
+    Args:
+        students (list): [{"student_id", "name"}, ...]
+
+    Returns:
+        int: 새로 추가된 학생 수
+    """
+    global _students
+    now = datetime.now().isoformat()
+    try:
+        with _students_lock:
+            registry = _student_registry()
+            new_students = {}
+            for student in students:
+                student_id = str(student.get('student_id', '')).strip()
+                if student_id and student_id not in registry and student_id not in new_students:
+                    new_students[student_id] = {
+                        "student_id": student_id,
+                        "name": str(student.get('name', '')).strip(),
+                        "created_at": now
+                    }
+            if not new_students:
+                return 0
+
+            conn = get_connection()
+            with conn:
+                cursor = conn.executemany(
+                    "INSERT OR IGNORE INTO students (student_id, name, created_at) VALUES (?, ?, ?)",
+                    [(s['student_id'], s['name'], s['created_at']) for s in new_students.values()]
+                )
+                added = cursor.rowcount
+                if not added:
+                    return 0
+                version = bump_data_version(conn, VERSION_STUDENTS)
+
+            if added == len(new_students):
+                _apply_student_write(version, lambda registry: registry.update(new_students))
+            else:
+                # 다른 프로세스가 그 사이에 추가한 학생이 있으면 다음 조회 때 저장된 값으로 다시 읽음
+                _students = None
+
+        invalidate('roster')
+        print(f"[DEBUG] 학생 명단 가져오기: {added}명 추가")
+        return added
+    except Exception as e:
+        print(f"학생 명단 가져오기 오류: {e}")
+        return 0
+
+
 def get_student(student_id):
     """
     특정 학생 정보를 조회합니다.
@@ -85,11 +263,53 @@ def get_student(student_id):
     Returns:
         dict: 학생 정보 (없으면 None)
     """
-    students = load_students()
-    for student in students:
-        if student['student_id'] == student_id:
-            return student
-    return None
+    try:
+        with _students_lock:
+            student = _student_registry().get(student_id)
+        if student is None:
+            # 다른 프로세스가 추가한 학생일 수 있으므로 데이터베이스 확인
+            row = get_connection().execute(
+                "SELECT student_id, name, created_at FROM students WHERE student_id = ?",
+                (student_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            student = dict(row)
+            with _students_lock:
+                _student_registry()[student_id] = student
+        return dict(student)
+    except Exception as e:
+        print(f"학생 조회 오류: {e}")
+        return None
+
+
+def _empty_conversation(student_id):
+    """새 대화 이력 데이터를 만듭니다."""
+    return {
+        "student_id": student_id,
+        "name": "",
+        "conversations": [],
+        "statistics": {
+            "total_questions": 0,
+            "average_score": 0.0,
+            "pending_scores": 0,
+            "failed_scores": 0,
+            "last_activity": None,
+            "dimension_averages": {dim: 0.0 for dim in SCORE_DIMENSIONS}
+        }
+    }
+
+
+def _row_to_conversation(row):
+    """conversations 테이블의 행을 대화 항목 dict로 변환합니다."""
+    conv = {
+        "timestamp": row['timestamp'],
+        "question": row['question'],
+        "answer": row['answer']
+    }
+    if row['score'] is not None:
+        conv['score'] = json.loads(row['score'])
+    return conv
 
 
 def load_conversation(student_id):
@@ -102,40 +322,81 @@ def load_conversation(student_id):
     Returns:
         dict: 대화 이력 데이터
     """
-    conv_file = CONV_DIR / f"{student_id}.json"
+    def _load():
+        conn = get_connection()
+        conv_data = _empty_conversation(student_id)
+
+        student = conn.execute(
+            "SELECT name FROM students WHERE student_id = ?", (student_id,)
+        ).fetchone()
+        if student:
+            conv_data['name'] = student['name']
+
+        rows = conn.execute(
+            """SELECT timestamp, question, answer, score FROM conversations
+               WHERE student_id = ? ORDER BY id""",
+            (student_id,)
+        ).fetchall()
+        conv_data['conversations'] = [_row_to_conversation(row) for row in rows]
+        conv_data['statistics'] = _read_statistics(conn, student_id)
+        return conv_data
+
     try:
-        if conv_file.exists():
-            with open(conv_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        else:
-            # 새 대화 이력 생성
-            return {
-                "student_id": student_id,
-                "name": "",
-                "conversations": [],
-                "statistics": {
-                    "total_questions": 0,
-                    "average_score": 0.0,
-                    "last_activity": None
-                }
-            }
+        _conversation_buffer.flush_if_pending(student_id)
+        return cached_call('conversation', student_id, _load, version=get_data_version())
     except Exception as e:
         print(f"대화 이력 로드 오류: {e}")
-        return {
-            "student_id": student_id,
-            "name": "",
-            "conversations": [],
-            "statistics": {
-                "total_questions": 0,
-                "average_score": 0.0,
-                "last_activity": None
-            }
-        }
+        return _empty_conversation(student_id)
+
+
+def load_conversation_page(student_id, offset=0, limit=20):
+    """
+    특정 학생의 대화 이력을 한 페이지만 로드합니다 (교사 상세 보기용).
+
+    Args:
+        student_id (str): 학번
+        offset (int): 건너뛸 대화 수
+        limit (int): 가져올 최대 대화 수
+
+    Returns:
+        dict: 대화 이력 데이터 (conversations에는 해당 페이지만, total에는 전체 개수)
+    """
+    def _load():
+        conn = get_connection()
+        conv_data = _empty_conversation(student_id)
+
+        student = conn.execute(
+            "SELECT name FROM students WHERE student_id = ?", (student_id,)
+        ).fetchone()
+        if student:
+            conv_data['name'] = student['name']
+
+        rows = conn.execute(
+            """SELECT timestamp, question, answer, score FROM conversations
+               WHERE student_id = ? ORDER BY id LIMIT ? OFFSET ?""",
+            (student_id, limit, offset)
+        ).fetchall()
+        conv_data['conversations'] = [_row_to_conversation(row) for row in rows]
+        conv_data['statistics'] = _read_statistics(conn, student_id)
+        conv_data['total'] = conv_data['statistics']['total_questions']
+        return conv_data
+
+    try:
+        _conversation_buffer.flush_if_pending(student_id)
+        return cached_call('conversation_page', (student_id, offset, limit), _load, version=get_data_version())
+    except Exception as e:
+        print(f"대화 이력 로드 오류: {e}")
+        conv_data = _empty_conversation(student_id)
+        conv_data['total'] = 0
+        return conv_data
 
 
 def save_conversation(student_id, name, conversation_data):
     """
     학생의 대화 이력을 저장합니다.
+    새로 추가된 항목만 쓰기 지연 버퍼에 넣고 바로 돌아오며, 데이터베이스 기록은
+    백그라운드 스레드가 짧은 간격으로 여러 학생의 저장을 모아 한 트랜잭션으로 합니다.
+    (버퍼는 저널 파일에 먼저 기록하므로 그 사이에 앱이 죽어도 다음 실행에서 저장됩니다.)
 
     Args:
         student_id (str): 학번
@@ -145,41 +406,41 @@ def save_conversation(student_id, name, conversation_data):
     Returns:
         bool: 성공 여부
     """
-    conv_file = CONV_DIR / f"{student_id}.json"
     try:
         print(f"[DEBUG] Saving conversation for {student_id}")
 
-        # 이름과 통계 업데이트
         conversation_data['student_id'] = student_id
         conversation_data['name'] = name
-
-        # 통계 계산
         conversations = conversation_data.get('conversations', [])
-        print(f"[DEBUG] Total conversations to save: {len(conversations)}")
-
-        if conversations:
-            # 안전하게 점수 합계 계산
-            total_score = 0
-            valid_count = 0
-            for conv in conversations:
-                score = conv.get('score', {})
-                if isinstance(score, dict) and 'total_score' in score:
-                    total_score += score['total_score']
-                    valid_count += 1
-
-            avg_score = total_score / valid_count if valid_count > 0 else 0.0
-
-            conversation_data['statistics'] = {
-                "total_questions": len(conversations),
-                "average_score": round(avg_score, 2),
-                "last_activity": conversations[-1].get('timestamp') if conversations else None
-            }
-            print(f"[DEBUG] Statistics: questions={len(conversations)}, avg_score={avg_score:.2f}")
-
-        # 저장
-        print(f"[DEBUG] Writing to file: {conv_file}")
-        with open(conv_file, 'w', encoding='utf-8') as f:
-            json.dump(conversation_data, f, ensure_ascii=False, indent=2)
+
+        # 마지막으로 저장한 항목 이후의 항목만 버퍼에 넣음
+        last_saved = _last_saved_timestamp(student_id)
+        new_conversations = []
+        for conv in reversed(conversations):
+            if conv.get('timestamp', '') <= last_saved:
+                break
+            new_conversations.append(conv)
+        new_conversations.reverse()
+        print(f"[DEBUG] New conversations to save: {len(new_conversations)}")
+        if not new_conversations:
+            # 저장할 것이 없으면 저널과 버퍼를 건드리지 않음
+            return True
+
+        _conversation_buffer.add(
+            student_id,
+            {"name": name},
+            [(conv['timestamp'], conv) for conv in new_conversations]
+        )
+        with _last_saved_lock:
+            _last_saved[student_id] = new_conversations[-1]['timestamp']
+
+        # 화면에 보이는 통계는 기록을 기다리지 않고 바로 반영
+        stats = conversation_data.setdefault('statistics', _empty_conversation(student_id)['statistics'])
+        stats['total_questions'] = stats.get('total_questions', 0) + len(new_conversations)
+        stats['pending_scores'] = stats.get('pending_scores', 0) + sum(
+            1 for conv in new_conversations if is_score_pending(conv.get('score'))
+        )
+        stats['last_activity'] = new_conversations[-1]['timestamp']
 
         print(f"[DEBUG] Save successful!")
         return True
@@ -190,29 +451,415 @@ def save_conversation(student_id, name, conversation_data):
         return False
 
 
+# 학번 -> 마지막으로 저장(버퍼에 추가)한 대화 항목의 timestamp
+_last_saved = {}
+_last_saved_lock = threading.Lock()
+
+
+def _last_saved_timestamp(student_id):
+    """
+    학생의 마지막 저장 항목 timestamp를 반환합니다 (프로세스에서 처음 한 번만 데이터베이스 조회).
+
+    Args:
+        student_id (str): 학번
+
+    Returns:
+        str: timestamp (없으면 빈 문자열)
+    """
+    with _last_saved_lock:
+        last_saved = _last_saved.get(student_id)
+    if last_saved is None:
+        _conversation_buffer.flush_if_pending(student_id)
+        last_saved = get_connection().execute(
+            "SELECT MAX(timestamp) FROM conversations WHERE student_id = ?", (student_id,)
+        ).fetchone()[0] or ""
+        with _last_saved_lock:
+            last_saved = max(last_saved, _last_saved.get(student_id, ""))
+            _last_saved[student_id] = last_saved
+    return last_saved
+
+
+def _write_conversations(batch):
+    """
+    쓰기 지연 버퍼에 모인 대화 항목을 한 트랜잭션으로 기록합니다 (버퍼의 flush 함수).
+    이미 저장된 항목은 무시하므로 저널을 다시 적용해도 두 번 저장되지 않습니다.
+    (채점 작업자가 기록한 점수도 덮어쓰지 않습니다.)
+
+    Args:
+        batch (dict): {학번: {"meta": {"name"}, "items": [대화 항목, ...]}}
+    """
+    now = datetime.now().isoformat()
+    students_changed = False
+    added = 0
+    students_version = None
+    conn = get_connection()
+    with conn:
+        for student_id, pending in batch.items():
+            # 이름 업데이트 (학생 목록에 없으면 추가, 이름이 같으면 쓰지 않음)
+            cursor = conn.execute(
+                """INSERT INTO students (student_id, name, created_at) VALUES (?, ?, ?)
+                   ON CONFLICT (student_id) DO UPDATE SET name = excluded.name
+                   WHERE name IS NOT excluded.name""",
+                (student_id, pending['meta'].get('name', ''), now)
+            )
+            students_changed = students_changed or cursor.rowcount > 0
+
+            for conv in pending['items']:
+                cursor = conn.execute(
+                    """INSERT OR IGNORE INTO conversations
+                       (student_id, timestamp, question, answer, score)
+                       VALUES (?, ?, ?, ?, ?)""",
+                    (
+                        student_id,
+                        conv['timestamp'],
+                        conv.get('question', ''),
+                        conv.get('answer', ''),
+                        json.dumps(conv['score'], ensure_ascii=False) if 'score' in conv else None
+                    )
+                )
+                # 통계 누적 (새로 추가된 항목만)
+                if cursor.rowcount:
+                    _add_turn_to_statistics(conn, student_id, conv)
+                    added += 1
+
+        if added:
+            bump_data_version(conn, VERSION_CONVERSATIONS)
+        if students_changed:
+            students_version = bump_data_version(conn, VERSION_STUDENTS)
+
+    print(f"[DEBUG] 대화 저장 기록: 학생 {len(batch)}명, "
+          f"항목 {sum(len(pending['items']) for pending in batch.values())}개")
+
+    if students_version is not None:
+        def _update_names(registry):
+            for student_id, pending in batch.items():
+                student = registry.setdefault(student_id, {"student_id": student_id, "created_at": now})
+                student['name'] = pending['meta'].get('name', '')
+
+        with _students_lock:
+            _apply_student_write(students_version, _update_names)
+
+    for student_id in batch:
+        _invalidate_student(student_id)
+
+
+def _after_conversations_written(student_ids):
+    """
+    대화 기록이 끝난 뒤(버퍼의 flush 잠금 밖에서) 공유 중인 학생의 친구들 질문 피드를 갱신합니다.
+    피드 갱신은 대화를 다시 읽으므로 flush 함수 안에서 부르면 안 됩니다.
+
+    Args:
+        student_ids (list): 대화가 기록된 학번 목록
+    """
+    from utils.sharing_manager import refresh_shared_student
+    for student_id in student_ids:
+        refresh_shared_student(student_id)
+
+
+# 대화 저장 쓰기 지연 버퍼 (프로세스 전체에서 하나)
+_conversation_buffer = WriteBehindBuffer(
+    "conversation", _write_conversations, CONVERSATION_JOURNAL_DIR,
+    on_flushed=_after_conversations_written
+)
+
+
+def flush_conversations():
+    """
+    버퍼에 남은 대화 저장을 지금 기록합니다 (종료 전, 재채점 전 등).
+
+    Returns:
+        int: 기록한 항목 수
+    """
+    return _conversation_buffer.flush()
+
+
+def get_conversation_changes(after_id=0):
+    """
+    대화 항목 id가 after_id보다 큰 (그 뒤에 추가된) 대화의 학생을 조회합니다.
+    다른 프로세스가 추가한 대화를 공유 피드에 반영할 때 사용합니다.
+
+    Args:
+        after_id (int): 이미 반영한 마지막 대화 항목 id
+
+    Returns:
+        tuple: (마지막 대화 항목 id, 대화가 추가된 학번 목록)
+    """
+    rows = get_connection().execute(
+        "SELECT student_id, MAX(id) AS last_id FROM conversations WHERE id > ? GROUP BY student_id",
+        (after_id,)
+    ).fetchall()
+    last_id = max((row['last_id'] for row in rows), default=after_id)
+    return last_id, [row['student_id'] for row in rows]
+
+
+def get_conversation_buffer_stats():
+    """
+    대화 저장 버퍼의 상태를 반환합니다 (교사 대시보드 표시용).
+
+    Returns:
+        dict: WriteBehindBuffer.get_stats() 결과
+    """
+    return _conversation_buffer.get_stats()
+
+
+def update_conversation_score(student_id, timestamp, score_data):
+    """
+    채점이 끝난 대화 항목에 점수를 기록합니다 (채점 작업자용).
+
+    Args:
+        student_id (str): 학번
+        timestamp (str): 대화 항목의 timestamp
+        score_data (dict): 분석 결과
+
+    Returns:
+        bool: 항목을 찾아 갱신했으면 True
+    """
+    return update_conversation_scores([(student_id, timestamp, score_data)]) == 1
+
+
+def mark_score_failed(student_id, timestamp, reason=""):
+    """
+    끝내 채점하지 못한 대화 항목을 채점 실패로 기록합니다 (채점 작업자용).
+    실패한 항목은 통계의 failed_scores에 잡히고 재채점 때 다시 채점됩니다.
+
+    Args:
+        student_id (str): 학번
+        timestamp (str): 대화 항목의 timestamp
+        reason (str): 실패 이유
+
+    Returns:
+        bool: 항목을 찾아 갱신했으면 True
+    """
+    return update_conversation_score(student_id, timestamp, failed_score(reason))
+
+
+def update_conversation_scores(updates):
+    """
+    여러 대화 항목의 점수를 한 트랜잭션으로 기록합니다 (재채점용).
+    중간에 오류가 나면 하나도 반영되지 않습니다.
+
+    Args:
+        updates (list): [(학번, timestamp, 분석 결과), ...]
+
+    Returns:
+        int: 찾아서 갱신한 항목 수 (오류 시 0)
+    """
+    updated_count = 0
+    updated_students = set()
+    try:
+        # 채점할 항목이 아직 버퍼에만 있으면 먼저 기록
+        for student_id in {update[0] for update in updates}:
+            _conversation_buffer.flush_if_pending(student_id)
+
+        conn = get_connection()
+        with conn:
+            for student_id, timestamp, score_data in updates:
+                row = conn.execute(
+                    "SELECT score FROM conversations WHERE student_id = ? AND timestamp = ?",
+                    (student_id, timestamp)
+                ).fetchone()
+                if row is None:
+                    print(f"[DEBUG] 채점 대상 항목 없음: {student_id} {timestamp}")
+                    continue
+
+                conn.execute(
+                    "UPDATE conversations SET score = ? WHERE student_id = ? AND timestamp = ?",
+                    (json.dumps(score_data, ensure_ascii=False), student_id, timestamp)
+                )
+
+                # 이전 점수를 빼고 새 점수를 더함
+                old_score = json.loads(row['score']) if row['score'] is not None else None
+                _apply_score_to_statistics(conn, student_id, old_score, -1)
+                _apply_score_to_statistics(conn, student_id, score_data, 1)
+                updated_students.add(student_id)
+                updated_count += 1
+
+            if updated_count:
+                bump_data_version(conn, VERSION_SCORES)
+    except Exception as e:
+        print(f"점수 저장 오류: {e}")
+        return 0
+
+    for student_id in updated_students:
+        invalidate('conversation', student_id)
+        invalidate_prefix('conversation_page', student_id)
+    if updated_students:
+        invalidate('roster')
+    return updated_count
+
+
+def _add_turn_to_statistics(conn, student_id, conv):
+    """
+    새로 추가된 대화 항목 하나를 통계에 누적합니다.
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        student_id (str): 학번
+        conv (dict): 대화 항목
+    """
+    conn.execute(
+        """INSERT INTO conversation_stats (student_id, total_questions, last_activity)
+           VALUES (?, 1, ?)
+           ON CONFLICT (student_id) DO UPDATE SET
+               total_questions = total_questions + 1,
+               last_activity = MAX(COALESCE(last_activity, ''), excluded.last_activity)""",
+        (student_id, conv['timestamp'])
+    )
+    _apply_score_to_statistics(conn, student_id, conv.get('score'), 1)
+
+
+def _apply_score_to_statistics(conn, student_id, score, sign):
+    """
+    점수 하나를 통계에 더하거나 뺍니다. 채점 대기 중이거나 실패한 점수는 평균에 넣지 않습니다.
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        student_id (str): 학번
+        score (dict): 대화 항목의 score 필드
+        sign (int): 1이면 더하고 -1이면 뺌
+    """
+    if is_score_pending(score):
+        conn.execute(
+            "UPDATE conversation_stats SET pending_scores = pending_scores + ? WHERE student_id = ?",
+            (sign, student_id)
+        )
+    elif is_score_failed(score):
+        conn.execute(
+            "UPDATE conversation_stats SET failed_scores = failed_scores + ? WHERE student_id = ?",
+            (sign, student_id)
+        )
+    elif isinstance(score, dict) and 'total_score' in score:
+        dimension_sets = ", ".join(f"{dim}_sum = {dim}_sum + ?" for dim in SCORE_DIMENSIONS)
+        conn.execute(
+            f"""UPDATE conversation_stats
+                SET score_sum = score_sum + ?, scored_count = scored_count + ?, {dimension_sets}
+                WHERE student_id = ?""",
+            (
+                sign * score['total_score'],
+                sign,
+                *[sign * score.get(dim, 0) for dim in SCORE_DIMENSIONS],
+                student_id
+            )
+        )
+
+
+def _stats_row_to_statistics(row):
+    """conversation_stats 테이블의 행을 통계 dict로 변환합니다."""
+    if row is None:
+        return _empty_conversation('')['statistics']
+
+    scored_count = row['scored_count']
+    if scored_count > 0:
+        avg_score = row['score_sum'] / scored_count
+        dimension_averages = {
+            dim: round(row[f"{dim}_sum"] / scored_count, 2) for dim in SCORE_DIMENSIONS
+        }
+    else:
+        avg_score = 0.0
+        dimension_averages = {dim: 0.0 for dim in SCORE_DIMENSIONS}
+
+    return {
+        "total_questions": row['total_questions'],
+        "average_score": round(avg_score, 2),
+        "pending_scores": row['pending_scores'],
+        "failed_scores": row['failed_scores'],
+        "last_activity": row['last_activity'],
+        "dimension_averages": dimension_averages
+    }
+
+
+def _read_statistics(conn, student_id):
+    """
+    학생의 통계를 조회합니다 (대화 이력을 읽지 않음).
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        student_id (str): 학번
+
+    Returns:
+        dict: 통계 정보
+    """
+    row = conn.execute(
+        "SELECT * FROM conversation_stats WHERE student_id = ?", (student_id,)
+    ).fetchone()
+    return _stats_row_to_statistics(row)
+
+
+def rebuild_statistics():
+    """
+    저장된 전체 대화 이력으로 통계 테이블을 다시 만듭니다.
+    통계 테이블이 없던 데이터베이스를 처음 열 때 한 번 실행됩니다.
+
+    Returns:
+        bool: 성공 여부
+    """
+    try:
+        conn = get_connection()
+        with conn:
+            conn.execute("DELETE FROM conversation_stats")
+            for row in conn.execute(
+                "SELECT student_id, timestamp, score FROM conversations ORDER BY id"
+            ).fetchall():
+                conv = {"timestamp": row['timestamp']}
+                if row['score'] is not None:
+                    conv['score'] = json.loads(row['score'])
+                _add_turn_to_statistics(conn, row['student_id'], conv)
+            bump_data_version(conn, VERSION_SCORES)
+        clear_cache()
+        return True
+    except Exception as e:
+        print(f"통계 재계산 오류: {e}")
+        return False
+
+
 def get_all_students_with_stats():
     """
     모든 학생의 정보와 통계를 함께 가져옵니다 (교사 대시보드용).
+    저장할 때마다 갱신되는 통계 테이블을 학생 목록과 한 번에 조회하므로
+    학생별 대화 이력은 읽지 않습니다.
 
     Returns:
         list: 학생 정보 + 통계 리스트
     """
-    students = load_students()
-    result = []
+    def _load():
+        dimension_columns = ", ".join(f"c.{dim}_sum" for dim in SCORE_DIMENSIONS)
+        rows = get_connection().execute(
+            f"""SELECT s.student_id, s.name, c.total_questions, c.score_sum, c.scored_count,
+                      c.pending_scores, c.failed_scores, c.last_activity, {dimension_columns}
+               FROM students s
+               LEFT JOIN conversation_stats c ON c.student_id = s.student_id
+               ORDER BY s.rowid"""
+        ).fetchall()
+
+        result = []
+        for row in rows:
+            stats = _stats_row_to_statistics(row if row['total_questions'] is not None else None)
+
+            result.append({
+                "student_id": row['student_id'],
+                "name": row['name'],
+                "total_questions": stats['total_questions'],
+                "average_score": stats['average_score'],
+                "pending_scores": stats['pending_scores'],
+                "failed_scores": stats['failed_scores'],
+                "last_activity": stats['last_activity'],
+                "dimension_averages": stats['dimension_averages']
+            })
+        return result
 
-    for student in students:
-        student_id = student['student_id']
-        conv_data = load_conversation(student_id)
+    try:
+        _conversation_buffer.flush_if_pending()
+        return cached_call('roster', None, _load, version=get_data_version())
+    except Exception as e:
+        print(f"학생 통계 로드 오류: {e}")
+        return []
 
-        result.append({
-            "student_id": student_id,
-            "name": student['name'],
-            "total_questions": conv_data['statistics']['total_questions'],
-            "average_score": conv_data['statistics']['average_score'],
-            "last_activity": conv_data['statistics']['last_activity']
-        })
 
-    return result
+def _invalidate_student(student_id):
+    """학생의 대화가 바뀌었을 때 관련 캐시 항목을 무효화합니다."""
+    invalidate('conversation', student_id)
+    invalidate_prefix('conversation_page', student_id)
+    invalidate('roster')
 
 
 def load_guide_questions():
@@ -223,13 +870,17 @@ def load_guide_questions():
         list: 가이드 질문 리스트
     """
     guide_file = DATA_DIR / "guide_questions.json"
-    try:
+
+    def _load():
         if guide_file.exists():
             with open(guide_file, 'r', encoding='utf-8') as f:
                 data = json.load(f)
                 return data.get('questions', [])
         else:
             return []
+
+    try:
+        return cached_file(guide_file, _load)
     except Exception as e:
         print(f"가이드 질문 로드 오류: {e}")
         return []
@@ -270,17 +921,34 @@ def update_student_sharing(student_id, name, is_shared, display_as="named"):
     return save_sharing_preference(student_id, name, is_shared, display_as)
 
 
-def get_shared_conversations(sort_by="recent", filter_anonymous=False):
+def get_shared_conversations(sort_by="recent", filter_anonymous=False, offset=0, limit=None):
     """
-    공유된 모든 대화를 조회합니다.
+    공유된 대화를 학생 단위로 한 페이지씩 조회합니다.
     sharing_manager의 래퍼 함수입니다.
 
     Args:
         sort_by (str): 정렬 방식 ('recent' 또는 'questions')
         filter_anonymous (bool): True이면 익명만 표시
+        offset (int): 건너뛸 학생 수
+        limit (int): 가져올 최대 학생 수 (None이면 전부)
 
     Returns:
         list: 공유된 학생들의 대화 데이터
     """
     from utils.sharing_manager import get_shared_conversations as _get_shared
-    return _get_shared(sort_by, filter_anonymous)
+    return _get_shared(sort_by, filter_anonymous, offset, limit)
+
+
+def count_shared_conversations(filter_anonymous=False):
+    """
+    공유 중인 학생 수를 반환합니다.
+    sharing_manager의 래퍼 함수입니다.
+
+    Args:
+        filter_anonymous (bool): True이면 익명 공유 학생만 셈
+
+    Returns:
+        int: 학생 수
+    """
+    from utils.sharing_manager import count_shared_conversations as _count_shared
+    return _count_shared(filter_anonymous)
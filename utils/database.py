@@ -0,0 +1,287 @@
+"""
+데이터베이스 모듈
+학생 정보와 대화 이력을 저장하는 SQLite 데이터베이스 연결을 관리합니다.
+
+WAL 모드를 사용하므로 여러 Streamlit 세션이 동시에 읽는 동안에도 쓰기가 가능합니다.
+처음 열 때 예전 JSON 파일(students.json, conversations/*.json)이 있으면 한 번 가져옵니다.
+
+대화 항목은 conversations 테이블에 추가만 되고, 학생별 통계는 conversation_stats
+테이블에 따로 누적되므로 저장할 때 전체 이력을 다시 읽거나 쓰지 않습니다.
+
+쓰기 트랜잭션은 data_version 테이블의 버전을 올리므로, 학생 앱과 교사 대시보드처럼
+따로 실행된 프로세스도 버전만 읽어 보고 다른 프로세스가 쓴 내용을 알아챌 수 있습니다.
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+# 데이터 디렉토리 경로
+BASE_DIR = Path(__file__).parent.parent
+DATA_DIR = BASE_DIR / "data"
+DB_FILE = DATA_DIR / "app.db"
+
+# 예전 JSON 저장소 경로 (가져오기용)
+LEGACY_STUDENTS_FILE = DATA_DIR / "students.json"
+LEGACY_CONV_DIR = DATA_DIR / "conversations"
+
+# 다른 연결이 쓰는 중일 때 기다릴 최대 시간 (밀리초)
+BUSY_TIMEOUT_MS = 5000
+
+# 통계 테이블 형식 버전 (바뀌면 통계를 다시 계산)
+STATS_VERSION = "2"
+
+# 통계 테이블에 나중에 추가된 열 (예전 데이터베이스에 추가)
+STATS_ADDED_COLUMNS = {
+    "depth_sum": "REAL NOT NULL DEFAULT 0",
+    "creativity_sum": "REAL NOT NULL DEFAULT 0",
+    "comprehension_sum": "REAL NOT NULL DEFAULT 0",
+    "thinking_sum": "REAL NOT NULL DEFAULT 0",
+    "failed_scores": "INTEGER NOT NULL DEFAULT 0",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    student_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS conversations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    score TEXT,
+    UNIQUE (student_id, timestamp)
+);
+
+CREATE INDEX IF NOT EXISTS idx_conversations_student
+    ON conversations (student_id, id);
+
+CREATE TABLE IF NOT EXISTS conversation_stats (
+    student_id TEXT PRIMARY KEY,
+    total_questions INTEGER NOT NULL DEFAULT 0,
+    score_sum REAL NOT NULL DEFAULT 0,
+    scored_count INTEGER NOT NULL DEFAULT 0,
+    pending_scores INTEGER NOT NULL DEFAULT 0,
+    failed_scores INTEGER NOT NULL DEFAULT 0,
+    last_activity TEXT,
+    depth_sum REAL NOT NULL DEFAULT 0,
+    creativity_sum REAL NOT NULL DEFAULT 0,
+    comprehension_sum REAL NOT NULL DEFAULT 0,
+    thinking_sum REAL NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS data_version (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS score_cache (
+    key TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    question TEXT NOT NULL,
+    score TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    last_used TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_score_cache_last_used
+    ON score_cache (last_used);
+
+CREATE TABLE IF NOT EXISTS answer_cache (
+    key TEXT PRIMARY KEY,
+    context_hash TEXT NOT NULL,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    last_used TEXT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_answer_cache_last_used
+    ON answer_cache (last_used);
+
+CREATE INDEX IF NOT EXISTS idx_answer_cache_context
+    ON answer_cache (context_hash);
+"""
+
+# 데이터 버전 이름 (학생 목록 / 대화 항목 추가 / 점수와 통계)
+VERSION_STUDENTS = "students"
+VERSION_CONVERSATIONS = "conversations"
+VERSION_SCORES = "scores"
+DATA_VERSION_NAMES = (VERSION_STUDENTS, VERSION_CONVERSATIONS, VERSION_SCORES)
+
+# 디렉토리가 없으면 생성
+DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = False
+
+
+def get_connection():
+    """
+    현재 스레드의 데이터베이스 연결을 반환합니다.
+    sqlite3 연결은 스레드 간에 공유하지 않으므로 스레드마다 하나씩 엽니다.
+
+    Returns:
+        sqlite3.Connection: 데이터베이스 연결
+    """
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(DB_FILE, timeout=BUSY_TIMEOUT_MS / 1000)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        _local.conn = conn
+        _initialize(conn)
+    return conn
+
+
+def _initialize(conn):
+    """스키마를 만들고 예전 JSON 데이터를 가져옵니다 (프로세스당 한 번)."""
+    global _initialized
+    with _init_lock:
+        if _initialized:
+            return
+        conn.executescript(SCHEMA)
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO data_version (name, version) VALUES (?, 0)",
+                [(name,) for name in DATA_VERSION_NAMES]
+            )
+        _import_legacy_json(conn)
+
+        # 예전 통계 테이블에 없는 열 추가
+        columns = {row['name'] for row in conn.execute("PRAGMA table_info(conversation_stats)")}
+        for column, definition in STATS_ADDED_COLUMNS.items():
+            if column not in columns:
+                conn.execute(f"ALTER TABLE conversation_stats ADD COLUMN {column} {definition}")
+
+        # 통계 형식이 바뀌었으면 통계를 한 번 다시 계산
+        built = conn.execute("SELECT value FROM meta WHERE key = 'stats_built'").fetchone()
+        if not built or built['value'] != STATS_VERSION:
+            from .data_manager import rebuild_statistics
+            rebuild_statistics()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('stats_built', ?)",
+                    (STATS_VERSION,)
+                )
+
+        _initialized = True
+
+
+def get_data_version(*names):
+    """
+    모든 프로세스가 함께 보는 데이터 버전을 반환합니다 (읽기 캐시의 키로 사용).
+
+    Args:
+        *names (str): 버전 이름 (생략하면 DATA_VERSION_NAMES 전부)
+
+    Returns:
+        tuple: 이름 순서대로의 버전
+    """
+    rows = get_connection().execute("SELECT name, version FROM data_version").fetchall()
+    versions = {row['name']: row['version'] for row in rows}
+    return tuple(versions.get(name, 0) for name in (names or DATA_VERSION_NAMES))
+
+
+def bump_data_version(conn, name):
+    """
+    쓰기 트랜잭션 안에서 데이터 버전을 하나 올립니다 (트랜잭션마다 이름별로 한 번).
+    트랜잭션이 쓰기 잠금을 잡고 있으므로 반환된 버전에서 1을 뺀 값이
+    이 트랜잭션 직전의 버전입니다.
+
+    Args:
+        conn (sqlite3.Connection): 트랜잭션 중인 연결
+        name (str): 버전 이름
+
+    Returns:
+        int: 새 버전
+    """
+    conn.execute("UPDATE data_version SET version = version + 1 WHERE name = ?", (name,))
+    return conn.execute("SELECT version FROM data_version WHERE name = ?", (name,)).fetchone()[0]
+
+
+def _import_legacy_json(conn):
+    """
+    예전 JSON 파일 저장소의 데이터를 데이터베이스로 가져옵니다.
+    이미 가져온 적이 있으면 아무것도 하지 않습니다. 원본 파일은 그대로 둡니다.
+    """
+    done = conn.execute("SELECT value FROM meta WHERE key = 'legacy_imported'").fetchone()
+    if done:
+        return
+
+    try:
+        with conn:
+            if LEGACY_STUDENTS_FILE.exists():
+                with open(LEGACY_STUDENTS_FILE, 'r', encoding='utf-8') as f:
+                    students = json.load(f).get('students', [])
+                conn.executemany(
+                    "INSERT OR IGNORE INTO students (student_id, name, created_at) VALUES (?, ?, ?)",
+                    [(s['student_id'], s.get('name', ''), s.get('created_at', '')) for s in students]
+                )
+
+            if LEGACY_CONV_DIR.exists():
+                for conv_file in sorted(LEGACY_CONV_DIR.glob("*.json")):
+                    with open(conv_file, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                    student_id = data.get('student_id') or conv_file.stem
+                    conn.execute(
+                        "INSERT OR IGNORE INTO students (student_id, name, created_at) VALUES (?, ?, '')",
+                        (student_id, data.get('name', ''))
+                    )
+                    conn.executemany(
+                        """INSERT OR IGNORE INTO conversations
+                           (student_id, timestamp, question, answer, score)
+                           VALUES (?, ?, ?, ?, ?)""",
+                        [
+                            (
+                                student_id,
+                                conv.get('timestamp', ''),
+                                conv.get('question', ''),
+                                conv.get('answer', ''),
+                                json.dumps(conv['score'], ensure_ascii=False) if 'score' in conv else None
+                            )
+                            for conv in data.get('conversations', [])
+                        ]
+                    )
+
+            conn.execute("INSERT INTO meta (key, value) VALUES ('legacy_imported', '1')")
+        print("[DEBUG] 예전 JSON 데이터 가져오기 완료")
+    except Exception as e:
+        print(f"예전 JSON 데이터 가져오기 오류: {e}")
+
+
+def compact_storage():
+    """
+    WAL 로그를 본 데이터베이스 파일에 합치고 빈 공간을 정리합니다.
+    수업이 끝난 뒤처럼 쓰기가 없을 때 실행하는 것이 좋습니다.
+
+    Returns:
+        bool: 성공 여부
+    """
+    try:
+        conn = get_connection()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("VACUUM")
+        print("[DEBUG] 데이터베이스 정리 완료")
+        return True
+    except Exception as e:
+        print(f"데이터베이스 정리 오류: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    compact_storage()
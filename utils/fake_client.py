@@ -0,0 +1,81 @@
+"""
+가짜 Gemini 클라이언트 모듈
+API 키나 네트워크 없이 채점/재채점 흐름을 시험할 때 GeminiClient 대신 사용합니다.
+질문 내용으로 점수를 정하므로 같은 질문은 항상 같은 점수를 받습니다.
+"""
+
+import hashlib
+import json
+import re
+import time
+
+
+class FakeGeminiClient:
+    """GeminiClient와 같은 generate_response / generate_response_stream을 제공하는 가짜 클라이언트"""
+
+    def __init__(self, latency=0.0, failure_rate=0.0):
+        """
+        Args:
+            latency (float): 호출마다 기다릴 시간 (초)
+            failure_rate (float): 오류 문구를 돌려줄 비율 (0-1, 질문 내용으로 결정)
+        """
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.calls = 0
+
+    def _score(self, question):
+        digest = hashlib.sha256(question.encode('utf-8')).digest()
+        dims = {
+            "depth": 1 + digest[0] % 5,
+            "creativity": 1 + digest[1] % 5,
+            "comprehension": 1 + digest[2] % 5,
+            "thinking": 1 + digest[3] % 5,
+        }
+        total = round(sum(dims.values()) / 4, 1)
+        return {"total_score": total, **dims, "feedback": "가짜 클라이언트가 매긴 점수입니다."}
+
+    def _fails(self, prompt):
+        return hashlib.sha256(prompt.encode('utf-8')).digest()[4] < self.failure_rate * 256
+
+    def generate_response(self, prompt, max_retries=3, system_prompt=None, deadline=None, timeout=None,
+                          purpose=None):
+        """
+        질문 분석 프롬프트면 점수 JSON을, 그 밖에는 고정 답변을 돌려줍니다.
+
+        Args:
+            prompt (str): 프롬프트
+            max_retries (int): 사용하지 않음 (GeminiClient와 같은 형태)
+            system_prompt (str): 사용하지 않음
+            deadline (float): 사용하지 않음
+            timeout (float): 사용하지 않음
+            purpose (str): 사용하지 않음
+
+        Returns:
+            str: 응답 텍스트
+        """
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self._fails(prompt):
+            return "오류가 발생했습니다: 가짜 클라이언트 오류"
+
+        # 묶음 채점: "1. 질문" 형식의 목록
+        numbered = re.findall(r'^(\d+)\. (.*)$', prompt, re.MULTILINE)
+        if numbered:
+            items = [{"index": int(i), **self._score(question)} for i, question in numbered]
+            return json.dumps(items, ensure_ascii=False)
+
+        # 질문 하나 채점
+        match = re.search(r'\[학생의 질문\]\n(.*)', prompt, re.DOTALL)
+        if match:
+            return json.dumps(self._score(match.group(1).strip()), ensure_ascii=False)
+
+        return "좋은 질문이에요. 이야기를 다시 읽으며 함께 생각해 볼까요?"
+
+    def generate_response_stream(self, prompt, max_retries=3, system_prompt=None, result=None,
+                                 deadline=None, timeout=None, purpose=None):
+        """generate_response의 결과를 한 번에 내보냅니다."""
+        text = self.generate_response(prompt, max_retries, system_prompt)
+        if result is not None:
+            result.text = text
+        yield text
@@ -0,0 +1,200 @@
+"""
+JSON 파일 저장 모듈
+여러 Streamlit 세션(스레드)이나 프로세스가 같은 JSON 파일을 동시에 고쳐도
+쓰기가 사라지거나 반쯤 쓰인 파일이 남지 않도록 하는 공통 저장 함수입니다.
+
+- 잠금: 파일 옆의 .lock 파일에 fcntl.flock을 걸어 프로세스 사이의 읽기-수정-쓰기를 차례로 처리
+  (fcntl이 없는 환경에서는 프로세스 안의 스레드끼리만 잠금)
+- 원자적 쓰기: 같은 디렉토리의 고유한 임시 파일에 쓴 뒤 os.replace로 교체
+  (읽는 쪽은 잠금 없이도 항상 이전 파일이나 새 파일 전체를 봄)
+- fsync: 'always'와 'batch'는 교체하기 전에 임시 파일을 fsync하고, 교체한 디렉토리 항목은
+  'always'는 바로, 'batch'는 잠시 모았다가 한 번에 fsync. 'off'는 운영체제에 맡김
+  (전원이 나가도 교체된 파일이 비어 있거나 반쯤 쓰인 채로 남지 않음)
+"""
+
+import atexit
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# fsync 방식 ('always', 'batch', 'off')과 batch 방식에서 모았다가 처리하는 간격 (초)
+FSYNC_MODE = os.getenv("DATA_FSYNC", "batch")
+FSYNC_BATCH_SECONDS = float(os.getenv("DATA_FSYNC_INTERVAL", "1.0"))
+
+LOCK_SUFFIX = ".lock"
+
+_thread_locks = {}  # 파일 경로 -> 프로세스 안의 잠금
+_thread_locks_lock = threading.Lock()
+
+_pending_sync = set()  # batch 방식에서 아직 fsync하지 않은 디렉토리
+_sync_lock = threading.Lock()
+_sync_timer = None
+
+
+def _thread_lock(path):
+    with _thread_locks_lock:
+        lock = _thread_locks.get(path)
+        if lock is None:
+            lock = threading.Lock()
+            _thread_locks[path] = lock
+        return lock
+
+
+@contextmanager
+def file_lock(path):
+    """
+    파일에 대한 배타 잠금을 잡습니다 (프로세스와 스레드 모두).
+    읽기-수정-쓰기 전체를 이 잠금 안에서 해야 다른 쓰기가 사라지지 않습니다.
+
+    Args:
+        path (Path): 잠글 파일 경로 (잠금은 옆의 .lock 파일에 걸림)
+    """
+    path = Path(path)
+    with _thread_lock(str(path)):
+        if fcntl is None:
+            yield
+            return
+
+        lock_file = path.with_name(path.name + LOCK_SUFFIX)
+        with open(lock_file, 'a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def read_json(path, default=None):
+    """
+    JSON 파일을 읽습니다. 원자적으로 교체되므로 잠금 없이 읽어도 됩니다.
+    파일이 없을 때만 기본값을 돌려주고, 내용이 깨졌으면 예외를 그대로 던져
+    빈 값으로 덮어써서 데이터를 잃는 일이 없게 합니다.
+
+    Args:
+        path (Path): 파일 경로
+        default: 파일이 없을 때 돌려줄 값 (복사해서 돌려줌)
+
+    Returns:
+        읽은 값
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return json.loads(json.dumps(default))
+
+
+def write_json(path, data, indent=None):
+    """
+    JSON 파일을 원자적으로 씁니다 (고유한 임시 파일에 쓴 뒤 교체).
+    여러 곳에서 같은 파일을 고치는 경우에는 file_lock 안에서 호출하거나 update_json을 사용하세요.
+
+    Args:
+        path (Path): 파일 경로
+        data: 저장할 값
+        indent (int): 들여쓰기 (None이면 한 줄)
+    """
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp")
+    try:
+        # mkstemp는 소유자만 읽을 수 있게 만들므로 기존 파일(없으면 일반 파일)과 같은 권한으로 맞춤
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(tmp_name, mode)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+            f.flush()
+            # 내용을 먼저 디스크에 기록해야 교체한 뒤 전원이 나가도 빈 파일이 남지 않음
+            if FSYNC_MODE != "off":
+                os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.remove(tmp_name)
+        except OSError:
+            pass
+        raise
+
+    if FSYNC_MODE == "always":
+        _fsync_dir(path.parent)
+    elif FSYNC_MODE == "batch":
+        _schedule_sync(path.parent)
+
+
+def update_json(path, update, default=None, indent=None):
+    """
+    잠금을 잡은 채로 JSON 파일을 읽고, 고치고, 원자적으로 씁니다.
+
+    Args:
+        path (Path): 파일 경로
+        update (callable): 읽은 값을 받아 고치는 함수 (새 값을 반환하면 그 값을 저장)
+        default: 파일이 없을 때 시작할 값
+        indent (int): 들여쓰기 (None이면 한 줄)
+
+    Returns:
+        저장한 값
+    """
+    with file_lock(path):
+        data = read_json(path, default)
+        result = update(data)
+        if result is not None:
+            data = result
+        write_json(path, data, indent)
+        return data
+
+
+def _fsync_dir(directory):
+    """디렉토리 항목(파일 교체)을 디스크에 기록합니다 (지원하지 않는 환경은 건너뜀)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _schedule_sync(directory):
+    """batch 방식: 디렉토리를 fsync 대기 목록에 넣고, 처리 예약이 없으면 예약합니다."""
+    global _sync_timer
+    with _sync_lock:
+        _pending_sync.add(str(directory))
+        if _sync_timer is None:
+            _sync_timer = threading.Timer(FSYNC_BATCH_SECONDS, flush_pending_syncs)
+            _sync_timer.daemon = True
+            _sync_timer.start()
+
+
+def flush_pending_syncs():
+    """
+    batch 방식에서 모아 둔 디렉토리(파일 교체 기록)를 한 번에 fsync합니다.
+    파일 내용은 교체하기 전에 이미 fsync되어 있습니다.
+
+    Returns:
+        int: fsync한 디렉토리 수
+    """
+    global _sync_timer
+    with _sync_lock:
+        directories = list(_pending_sync)
+        _pending_sync.clear()
+        _sync_timer = None
+
+    for directory in directories:
+        _fsync_dir(directory)
+    return len(directories)
+
+
+atexit.register(flush_pending_syncs)
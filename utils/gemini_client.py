@@ -3,28 +3,400 @@ Gemini API 클라이언트
 Google Gemini API를 사용하여 AI 응답을 생성합니다.
 """
 
+import asyncio
 import os
+import random
+import weakref
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 from dotenv import load_dotenv
+import threading
 import time
 import streamlit as st
 
+from .backend_pool import Backend, BackendPool
+from .context_cache import ContextCacheManager, GeminiContextCache, LocalContextCache
+from .rate_limiter import estimate_tokens
+
 # 환경 변수 로드
 load_dotenv()
 
+# 사용할 모델
+MODEL_NAME = 'gemini-2.5-flash'
+
+# 모델 등급별 모델 (환경 변수로 조정)
+MODEL_TIERS = {
+    "standard": os.getenv("GEMINI_MODEL", MODEL_NAME),
+    "fast": os.getenv("GEMINI_MODEL_FAST", "gemini-2.5-flash-lite"),
+}
+
+# 요청 용도와 용도별 선호 모델 등급 (환경 변수로 조정)
+PURPOSE_ANSWER = "answer"      # 작가 답변
+PURPOSE_SCORING = "scoring"    # 질문 채점
+PURPOSE_REPORT = "report"      # 학습 리포트
+PURPOSE_TIERS = {
+    PURPOSE_ANSWER: os.getenv("GEMINI_TIER_ANSWER", "standard"),
+    PURPOSE_SCORING: os.getenv("GEMINI_TIER_SCORING", "standard"),
+    PURPOSE_REPORT: os.getenv("GEMINI_TIER_REPORT", "standard"),
+}
+
+# 고정 프롬프트 컨텍스트 캐시 방식 ('gemini', 'local' (오프라인 스텁), 'off')
+CONTEXT_CACHE_MODE = os.getenv("GEMINI_CONTEXT_CACHE", "gemini")
+
+# 정상 답변 대신 돌려주는 안내 문구
+BLOCKED_MESSAGE = "죄송합니다. 이 질문에 대해서는 답변을 드릴 수 없습니다. 다른 질문을 해주세요."
+EMPTY_MESSAGE = "죄송합니다. 답변을 생성할 수 없습니다. 다시 시도해주세요."
+UNAVAILABLE_MESSAGE = "응답을 생성할 수 없습니다. 나중에 다시 시도해주세요."
+TIMEOUT_MESSAGE = "응답이 너무 오래 걸려서 중단했습니다. 잠시 후 다시 시도해주세요."
+ERROR_MESSAGE_PREFIX = "오류가 발생했습니다"
+STREAM_ERROR_PREFIX = "(답변 중 오류가 발생했습니다"
+
+# 오류 종류
+ERROR_RATE_LIMIT = "rate_limit"      # 429 / 할당량 초과 (재시도)
+ERROR_SERVER = "server"              # 5xx (재시도)
+ERROR_TIMEOUT = "timeout"            # 시간 초과 (재시도)
+ERROR_NON_RETRYABLE = "non_retryable"  # 잘못된 요청, 인증 오류 등 (재시도 안 함)
+ERROR_EMPTY = "empty"                # 빈 응답
+ERROR_BLOCKED = "blocked"            # 안전 필터로 차단된 응답 (재시도 안 함)
+RETRYABLE_ERRORS = (ERROR_RATE_LIMIT, ERROR_SERVER, ERROR_TIMEOUT)
+
+# 응답 후보가 차단되어 끝났음을 뜻하는 finish_reason
+BLOCKED_FINISH_REASONS = {"SAFETY", "PROHIBITED_CONTENT", "BLOCKLIST", "SPII"}
+
+# 재시도 대기 시간 (지수 백오프: 기본값 * 2^시도, 최대값까지, 0~그 값 사이 무작위)
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+
+# 시간 제한 (초): API 호출 한 번 / 대기열과 재시도를 모두 포함한 요청 전체
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("GEMINI_REQUEST_TIMEOUT", "30"))
+DEFAULT_DEADLINE_SECONDS = float(os.getenv("GEMINI_DEADLINE", "60"))
+
+# 시간 초과 횟수 (호출 한 번이 시간 초과 / 요청 전체 시간 초과)
+_timeout_stats = {"call_timeouts": 0, "deadline_exceeded": 0}
+_timeout_stats_lock = threading.Lock()
+
+
+def is_error_response(text):
+    """
+    응답이 정상 답변이 아닌 안내/오류 문구인지 확인합니다.
+    (오류 문구는 답변 캐시 등에 저장하지 않기 위해 사용)
+
+    Args:
+        text (str): 응답 텍스트
+
+    Returns:
+        bool: 안내/오류 문구이면 True
+    """
+    return (
+        text in (BLOCKED_MESSAGE, EMPTY_MESSAGE, UNAVAILABLE_MESSAGE, TIMEOUT_MESSAGE)
+        or text.startswith(ERROR_MESSAGE_PREFIX)
+        or STREAM_ERROR_PREFIX in text
+    )
+
+class GenerationResult:
+    """AI 응답 생성 결과 (실패 여부와 오류 종류를 함께 전달)"""
+
+    def __init__(self, text="", error_type=None, error=None, attempts=0):
+        self.text = text
+        self.error_type = error_type  # None이면 성공
+        self.error = error
+        self.attempts = attempts
+
+    @property
+    def ok(self):
+        """정상 응답이면 True (대화 기록으로 저장해도 되는 응답)"""
+        return self.error_type is None
+
+    def __repr__(self):
+        return f"GenerationResult(ok={self.ok}, error_type={self.error_type!r}, attempts={self.attempts})"
+
+
+def classify_error(error):
+    """
+    API 오류를 재시도 여부에 따라 분류합니다.
+
+    Args:
+        error (Exception): 발생한 예외
+
+    Returns:
+        str: ERROR_RATE_LIMIT / ERROR_SERVER / ERROR_TIMEOUT / ERROR_NON_RETRYABLE
+    """
+    if isinstance(error, (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests)):
+        return ERROR_RATE_LIMIT
+    if isinstance(error, (google_exceptions.DeadlineExceeded, TimeoutError)):
+        return ERROR_TIMEOUT
+    if isinstance(error, (google_exceptions.ServerError, google_exceptions.ServiceUnavailable, ConnectionError)):
+        return ERROR_SERVER
+
+    # HTTP 상태 코드가 있는 다른 라이브러리의 예외
+    code = getattr(error, 'code', None) or getattr(error, 'status_code', None)
+    if code == 429:
+        return ERROR_RATE_LIMIT
+    if isinstance(code, int) and code >= 500:
+        return ERROR_SERVER
+    if 'timeout' in type(error).__name__.lower() or 'timed out' in str(error).lower():
+        return ERROR_TIMEOUT
+    return ERROR_NON_RETRYABLE
+
+
+def _retry_after(error):
+    """오류에 담긴 재시도 권장 대기 시간 (초, 없으면 0)"""
+    # google.rpc.RetryInfo
+    for detail in getattr(error, 'details', None) or []:
+        retry_delay = getattr(detail, 'retry_delay', None)
+        if retry_delay is not None:
+            return retry_delay.seconds + retry_delay.nanos / 1e9
+
+    # HTTP Retry-After 헤더
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after') or headers.get('Retry-After') or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def backoff_delay(attempt, error=None):
+    """
+    재시도 전 대기 시간을 계산합니다 (지수 백오프 + 무작위 지터, Retry-After 우선).
+
+    Args:
+        attempt (int): 지금까지 실패한 시도 번호 (0부터)
+        error (Exception): 발생한 예외
+
+    Returns:
+        float: 대기 시간 (초)
+    """
+    delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt)))
+    if error is not None:
+        delay = max(delay, min(_retry_after(error), BACKOFF_MAX_SECONDS))
+    return delay
+
+
+def _record_timeout(kind):
+    with _timeout_stats_lock:
+        _timeout_stats[kind] += 1
+
+
+def get_timeout_stats():
+    """
+    시간 초과 횟수를 반환합니다.
+
+    Returns:
+        dict: {"call_timeouts", "deadline_exceeded"}
+    """
+    with _timeout_stats_lock:
+        return dict(_timeout_stats)
+
+
+def _deadline_result(attempts):
+    """요청 전체 시간을 다 써서 포기할 때의 결과"""
+    _record_timeout("deadline_exceeded")
+    print("[DEBUG] 요청 시간 제한 초과")
+    return GenerationResult(TIMEOUT_MESSAGE, ERROR_TIMEOUT, "deadline exceeded", attempts=attempts)
+
+
+def model_for_purpose(purpose):
+    """
+    요청 용도에 맞는 선호 모델을 반환합니다.
+
+    Args:
+        purpose (str): PURPOSE_ANSWER / PURPOSE_SCORING / PURPOSE_REPORT (None이면 기본 등급)
+
+    Returns:
+        str: 모델 이름
+    """
+    tier = PURPOSE_TIERS.get(purpose, "standard")
+    return MODEL_TIERS.get(tier, MODEL_TIERS["standard"])
+
+
+def _load_api_keys():
+    """
+    설정된 API 키 목록을 읽습니다 (GEMINI_API_KEY가 기본 키, GEMINI_API_KEYS는 쉼표로 구분한 추가 키).
+
+    Returns:
+        list: API 키 목록 (중복 제거, 기본 키가 맨 앞)
+    """
+    keys = [st.secrets["GEMINI_API_KEY"]]
+    extra = st.secrets.get("GEMINI_API_KEYS", os.getenv("GEMINI_API_KEYS", ""))
+    if isinstance(extra, str):
+        extra = extra.split(",")
+    for key in extra:
+        key = key.strip()
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+class KeyedModel:
+    """
+    추가 API 키로 호출하는 모델
+    google.generativeai는 API 키를 프로세스 전체에 하나만 설정할 수 있으므로
+    추가 키는 키마다 클라이언트를 만들 수 있는 google-genai의 Client(api_key=...)로 호출합니다.
+    GenerativeModel과 같은 generate_content / generate_content_async 형식으로 부를 수 있습니다.
+    """
+
+    def __init__(self, api_key, model_name, safety_settings):
+        """
+        Args:
+            api_key (str): API 키
+            model_name (str): 모델 이름
+            safety_settings (list): 안전 설정
+        """
+        try:
+            from google import genai as google_genai
+        except ImportError as e:
+            raise ImportError(
+                "여러 API 키(GEMINI_API_KEYS)를 쓰려면 google-genai 패키지가 필요합니다: pip install google-genai"
+            ) from e
+        self._client = google_genai.Client(api_key=api_key)
+        self.model_name = model_name
+        self.safety_settings = safety_settings
+
+    def _config(self, request_options):
+        config = {"safety_settings": self.safety_settings}
+        timeout = (request_options or {}).get("timeout")
+        if timeout:
+            config["http_options"] = {"timeout": int(timeout * 1000)}  # 밀리초
+        return config
+
+    def generate_content(self, contents, stream=False, request_options=None):
+        models = self._client.models
+        generate = models.generate_content_stream if stream else models.generate_content
+        return generate(model=self.model_name, contents=contents, config=self._config(request_options))
+
+    async def generate_content_async(self, contents, request_options=None):
+        return await self._client.aio.models.generate_content(
+            model=self.model_name, contents=contents, config=self._config(request_options)
+        )
+
+
+def _usage_tokens(response):
+    """응답의 실제 토큰 사용량 (알 수 없으면 None)"""
+    try:
+        return response.usage_metadata.total_token_count or None
+    except Exception:
+        return None
+
+
+def _is_blocked(response):
+    """응답(또는 스트림 조각)이 안전 필터로 차단되었는지 확인합니다."""
+    prompt_feedback = getattr(response, 'prompt_feedback', None)
+    if prompt_feedback is not None and getattr(prompt_feedback, 'block_reason', None):
+        return True
+
+    for candidate in getattr(response, 'candidates', None) or []:
+        finish_reason = getattr(candidate, 'finish_reason', None)
+        if getattr(finish_reason, 'name', str(finish_reason)) in BLOCKED_FINISH_REASONS:
+            return True
+    return False
+
+
+def _response_text(response):
+    """응답 텍스트 (내용이 없어 SDK가 ValueError를 내면 빈 문자열)"""
+    try:
+        return response.text or ""
+    except ValueError:
+        return ""
+
+
+def _response_result(response, attempts):
+    """받은 응답을 GenerationResult로 바꿉니다 (차단/빈 응답은 실패로)."""
+    # 응답이 차단되었는지 확인
+    if _is_blocked(response):
+        return GenerationResult(BLOCKED_MESSAGE, ERROR_BLOCKED, "blocked by safety filter", attempts=attempts)
+
+    # 응답 텍스트 반환
+    text = _response_text(response).strip()
+    if text:
+        return GenerationResult(text, attempts=attempts)
+    else:
+        return GenerationResult(EMPTY_MESSAGE, ERROR_EMPTY, attempts=attempts)
+
+
+class RetryPolicy:
+    """
+    요청 하나의 재시도 규칙 (동기, 스트리밍, async 호출이 함께 사용)
+    - 오류를 분류해 할당량 초과, 서버 오류, 시간 초과만 재시도
+    - 실패한 백엔드를 기록하고 다음 시도에 쓸 백엔드를 고름 (할당량 초과로 백엔드를 바꾸면 바로 재시도)
+    - 지수 백오프 + 지터로 대기하되, 요청 전체 시간 제한 안에서만 재시도
+    대기 자체는 호출하는 쪽이 합니다 (time.sleep / asyncio.sleep).
+    """
+
+    def __init__(self, client, purpose, max_retries, deadline=None, timeout=None):
+        """
+        Args:
+            client (GeminiClient): 백엔드 풀을 가진 클라이언트
+            purpose (str): 요청 용도 (선호 모델 등급을 정함)
+            max_retries (int): 최대 시도 횟수
+            deadline (float): 요청 전체 시간 제한 (초, 기본 DEFAULT_DEADLINE_SECONDS)
+            timeout (float): API 호출 한 번의 시간 제한 (초, 기본 REQUEST_TIMEOUT_SECONDS)
+        """
+        self.client = client
+        self.model_name = model_for_purpose(purpose)
+        self.max_retries = max_retries
+        self.expires = time.monotonic() + (deadline or DEFAULT_DEADLINE_SECONDS)
+        self.timeout = timeout or REQUEST_TIMEOUT_SECONDS
+        self.backend = client.pool.pick(self.model_name)
+
+    def remaining(self):
+        """요청 전체 시간 제한까지 남은 시간 (초)"""
+        return max(0.0, self.expires - time.monotonic())
+
+    def call_timeout(self):
+        """이번 API 호출의 시간 제한 (초)"""
+        return min(self.timeout, max(1.0, self.remaining()))
+
+    def on_error(self, error, attempt, retry=True):
+        """
+        실패한 시도를 처리하고 다시 시도할지 정합니다.
+
+        Args:
+            error (Exception): 발생한 예외
+            attempt (int): 실패한 시도 번호 (0부터)
+            retry (bool): False이면 재시도하지 않음 (스트림이 이미 일부를 보낸 경우)
+
+        Returns:
+            tuple: (오류 종류, 재시도 전 대기 시간, 포기할 때의 결과)
+                - 재시도하면 (오류 종류, 대기 시간, None)
+                - 포기하면 (오류 종류, None, GenerationResult)
+        """
+        error_type = classify_error(error)
+        if error_type == ERROR_TIMEOUT:
+            _record_timeout("call_timeouts")
+        self.backend, switched = self.client._next_backend(self.backend, error_type, self.model_name)
+
+        if retry and error_type in RETRYABLE_ERRORS and attempt < self.max_retries - 1:
+            # 재시도 전 대기 (시도할수록 길게) - 남은 시간 안에 다시 보낼 수 없으면 포기
+            delay = 0.0 if switched and error_type == ERROR_RATE_LIMIT else backoff_delay(attempt, error)
+            if time.monotonic() + delay >= self.expires:
+                return error_type, None, _deadline_result(attempt + 1)
+            print(f"[DEBUG] API 오류 ({error_type}), {delay:.1f}초 후 재시도: {error}")
+            return error_type, delay, None
+
+        # 재시도할 수 없는 오류이거나 최대 시도 횟수 초과
+        print(f"API 오류 ({error_type}): {error}")
+        return error_type, None, GenerationResult(
+            f"{ERROR_MESSAGE_PREFIX}: {str(error)}\n다시 시도해주세요.",
+            error_type,
+            str(error),
+            attempts=attempt + 1
+        )
+
+
 class GeminiClient:
     def __init__(self):
         """Gemini API 클라이언트 초기화"""
-        api_key = st.secrets["GEMINI_API_KEY"]
+        api_keys = _load_api_keys()
 
-        if not api_key:
+        if not api_keys[0]:
             raise ValueError(
                 "GEMINI_API_KEY가 설정되지 않았습니다. "
                 ".env 파일을 생성하고 API 키를 설정해주세요."
             )
 
-        # Gemini API 설정
-        genai.configure(api_key=api_key)
+        # Gemini API 설정 (기본 키)
+        genai.configure(api_key=api_keys[0])
 
         # 안전 설정 (초등학생 대상이므로 엄격하게)
         self.safety_settings = [
@@ -46,47 +418,255 @@ class GeminiClient:
             },
         ]
 
-        # 모델 초기화
-        self.model = genai.GenerativeModel(
-            'gemini-2.5-flash',
-            safety_settings=self.safety_settings
-        )
+        # (API 키, 모델) 조합마다 백엔드 하나 - 용도별 등급에서 쓰는 모델만
+        model_names = list(dict.fromkeys(model_for_purpose(purpose) for purpose in PURPOSE_TIERS))
+        self.pool = BackendPool([
+            self._create_backend(api_key, model_name, is_default_key=(index == 0))
+            for index, api_key in enumerate(api_keys)
+            for model_name in model_names
+        ])
+
+        # 기본 백엔드의 모델 (기존 코드 호환용)
+        self.model = self.pool.backends[0].model
 
-    def generate_response(self, prompt, max_retries=3):
+    def _create_backend(self, api_key, model_name, is_default_key):
+        """
+        (API 키, 모델) 조합의 백엔드를 만듭니다.
+        추가 키의 모델은 그 키로 만든 google-genai 클라이언트를 사용합니다 (KeyedModel).
+
+        Args:
+            api_key (str): API 키
+            model_name (str): 모델 이름
+            is_default_key (bool): genai.configure에 설정한 기본 키인지 여부
+
+        Returns:
+            Backend: 백엔드
+        """
+        if is_default_key:
+            model = genai.GenerativeModel(
+                model_name,
+                safety_settings=self.safety_settings
+            )
+        else:
+            model = KeyedModel(api_key, model_name, self.safety_settings)
+
+        # 고정 프롬프트(이야기 + 역할 지시문) 컨텍스트 캐시
+        # (Gemini 캐시 API는 기본 키로만 호출되므로 추가 키는 전체 프롬프트를 보냄)
+        if CONTEXT_CACHE_MODE == "gemini" and is_default_key:
+            context_cache = ContextCacheManager(
+                GeminiContextCache(model_name, self.safety_settings)
+            )
+        elif CONTEXT_CACHE_MODE == "local":
+            context_cache = ContextCacheManager(LocalContextCache(model))
+        else:
+            context_cache = None
+
+        return Backend(api_key, model_name, model, context_cache)
+
+    def _resolve_model(self, backend, prompt, system_prompt):
+        """
+        요청에 사용할 모델과 프롬프트를 결정합니다.
+        고정 프롬프트가 캐시되어 있으면 학생 질문 부분만 보내고,
+        그렇지 않으면 고정 프롬프트를 앞에 붙인 전체 프롬프트를 보냅니다.
+
+        Args:
+            backend (Backend): 요청을 보낼 백엔드
+            prompt (str): 요청마다 달라지는 프롬프트
+            system_prompt (str): 고정 프롬프트 (없으면 None)
+
+        Returns:
+            tuple: (모델, 보낼 프롬프트)
+        """
+        if not system_prompt:
+            return backend.model, prompt
+
+        if backend.context_cache is not None:
+            cached_model = backend.context_cache.get_model(system_prompt)
+            if cached_model is not None:
+                return cached_model, prompt
+
+        return backend.model, f"{system_prompt}\n\n{prompt}"
+
+    def _next_backend(self, backend, error_type, model_name):
+        """
+        실패한 요청을 다시 보낼 백엔드를 고릅니다.
+
+        Args:
+            backend (Backend): 방금 실패한 백엔드
+            error_type (str): 오류 종류
+            model_name (str): 선호 모델
+
+        Returns:
+            tuple: (다음 백엔드, 다른 백엔드로 바꿨는지 여부)
+        """
+        self.pool.record_error(backend, rate_limited=(error_type == ERROR_RATE_LIMIT))
+        next_backend = self.pool.pick(model_name, exclude=backend)
+        if next_backend is not backend:
+            print(f"[DEBUG] 다른 백엔드로 재시도: {backend.name} -> {next_backend.name}")
+        return next_backend, next_backend is not backend
+
+    def generate(self, prompt, max_retries=3, system_prompt=None, deadline=None, timeout=None, purpose=None):
+        """
+        프롬프트에 대한 AI 응답을 생성하고 성공 여부를 함께 돌려줍니다.
+        할당량 초과, 서버 오류, 시간 초과는 지수 백오프로 재시도하고
+        잘못된 요청처럼 다시 보내도 소용없는 오류는 바로 실패로 돌려줍니다.
+        할당량 초과는 다른 백엔드가 있으면 기다리지 않고 그쪽으로 다시 보냅니다.
+        대기열 대기와 재시도를 포함한 전체 시간이 deadline을 넘으면 포기합니다.
+        (재시도 규칙은 RetryPolicy 참고)
+
+        Args:
+            prompt (str): 입력 프롬프트
+            max_retries (int): 최대 시도 횟수
+            system_prompt (str): 컨텍스트 캐시에 올릴 고정 프롬프트 (선택)
+            deadline (float): 요청 전체 시간 제한 (초, 기본 DEFAULT_DEADLINE_SECONDS)
+            timeout (float): API 호출 한 번의 시간 제한 (초, 기본 REQUEST_TIMEOUT_SECONDS)
+            purpose (str): 요청 용도 (선호 모델 등급을 정함, 선택)
+
+        Returns:
+            GenerationResult: 응답 (실패하면 text에 안내 문구)
+        """
+        policy = RetryPolicy(self, purpose, max_retries, deadline, timeout)
+
+        for attempt in range(max_retries):
+            backend = policy.backend
+            try:
+                model, request_prompt = self._resolve_model(backend, prompt, system_prompt)
+                estimated_tokens = estimate_tokens(request_prompt)
+
+                # 할당량 안에서 차례가 올 때까지 대기 (남은 시간만큼만)
+                if not backend.governor.acquire(estimated_tokens, timeout=policy.remaining()):
+                    return _deadline_result(attempt)
+                response = None
+                try:
+                    response = model.generate_content(
+                        request_prompt, request_options={"timeout": policy.call_timeout()}
+                    )
+                finally:
+                    backend.governor.release(estimated_tokens, _usage_tokens(response))
+                self.pool.record_success(backend)
+                return _response_result(response, attempt + 1)
+
+            except Exception as e:
+                _, delay, failure = policy.on_error(e, attempt)
+                if failure is not None:
+                    return failure
+                time.sleep(delay)
+
+        return GenerationResult(UNAVAILABLE_MESSAGE, ERROR_NON_RETRYABLE, attempts=max_retries)
+
+
+    def generate_response(self, prompt, max_retries=3, system_prompt=None, deadline=None, timeout=None,
+                          purpose=None):
         """
         프롬프트에 대한 AI 응답 생성
 
         Args:
             prompt (str): 입력 프롬프트
             max_retries (int): 최대 재시도 횟수
+            system_prompt (str): 컨텍스트 캐시에 올릴 고정 프롬프트 (선택)
+            deadline (float): 요청 전체 시간 제한 (초, 선택)
+            timeout (float): API 호출 한 번의 시간 제한 (초, 선택)
+            purpose (str): 요청 용도 (선택)
 
         Returns:
-            str: AI 생성 응답
+            str: AI 생성 응답 (실패하면 안내 문구 - 구분하려면 generate 사용)
         """
+        return self.generate(prompt, max_retries, system_prompt, deadline, timeout, purpose).text
+
+    def generate_response_stream(self, prompt, max_retries=3, system_prompt=None, result=None,
+                                 deadline=None, timeout=None, purpose=None):
+        """
+        프롬프트에 대한 AI 응답을 조각(chunk) 단위로 생성합니다.
+        첫 조각을 받기 전에 오류가 나면 generate와 같은 규칙(RetryPolicy)으로 재시도합니다.
+
+        Args:
+            prompt (str): 입력 프롬프트
+            max_retries (int): 최대 재시도 횟수
+            system_prompt (str): 컨텍스트 캐시에 올릴 고정 프롬프트 (선택)
+            result (GenerationResult): 넘기면 스트림이 끝난 뒤 성공 여부와 오류 종류를 채움 (선택)
+            deadline (float): 요청 전체 시간 제한 (초, 기본 DEFAULT_DEADLINE_SECONDS)
+            timeout (float): API 호출 한 번의 시간 제한 (초, 기본 REQUEST_TIMEOUT_SECONDS)
+            purpose (str): 요청 용도 (선호 모델 등급을 정함, 선택)
+
+        Yields:
+            str: AI 생성 응답 조각
+        """
+        if result is None:
+            result = GenerationResult()
+        policy = RetryPolicy(self, purpose, max_retries, deadline, timeout)
+
         for attempt in range(max_retries):
+            result.attempts = attempt + 1
+            started = False
+            error = None
+            backend = policy.backend
+            model, request_prompt = self._resolve_model(backend, prompt, system_prompt)
+            estimated_tokens = estimate_tokens(request_prompt)
+
+            # 할당량 안에서 차례가 올 때까지 대기 (스트림이 끝날 때까지 자리를 차지)
+            if not backend.governor.acquire(estimated_tokens, timeout=policy.remaining()):
+                timed_out = _deadline_result(attempt)
+                result.text, result.error_type, result.error = timed_out.text, timed_out.error_type, timed_out.error
+                yield result.text
+                return
+            response = None
             try:
-                response = self.model.generate_content(prompt)
+                response = model.generate_content(
+                    request_prompt, stream=True, request_options={"timeout": policy.call_timeout()}
+                )
+
+                for chunk in response:
+                    # 전체 시간 제한을 넘기면 받은 데까지만 보여주고 중단
+                    if policy.remaining() <= 0:
+                        raise TimeoutError("deadline exceeded while streaming")
+
+                    # 응답이 차단되었는지 확인 (받은 조각이 있어도 차단된 답변으로 처리)
+                    if _is_blocked(chunk):
+                        result.error_type, result.error = ERROR_BLOCKED, "blocked by safety filter"
+                        message = f"\n\n{BLOCKED_MESSAGE}" if started else BLOCKED_MESSAGE
+                        result.text += message
+                        yield message
+                        return
 
-                # 응답이 차단되었는지 확인
-                if hasattr(response, 'prompt_feedback') and response.prompt_feedback.block_reason:
-                    return "죄송합니다. 이 질문에 대해서는 답변을 드릴 수 없습니다. 다른 질문을 해주세요."
+                    text = _response_text(chunk)
+                    if text:
+                        started = True
+                        result.text += text
+                        yield text
 
-                # 응답 텍스트 반환
-                if response.text:
-                    return response.text.strip()
-                else:
-                    return "죄송합니다. 답변을 생성할 수 없습니다. 다시 시도해주세요."
+                if not started:
+                    result.text, result.error_type = EMPTY_MESSAGE, ERROR_EMPTY
+                    yield EMPTY_MESSAGE
+                return
 
             except Exception as e:
-                if attempt < max_retries - 1:
-                    # 재시도 전 잠시 대기
-                    time.sleep(1)
-                    continue
-                else:
-                    # 최대 재시도 횟수 초과
-                    return f"오류가 발생했습니다: {str(e)}\n다시 시도해주세요."
+                error = e
+            finally:
+                backend.governor.release(estimated_tokens, _usage_tokens(response))
+                if error is None:
+                    self.pool.record_success(backend)
 
-        return "응답을 생성할 수 없습니다. 나중에 다시 시도해주세요."
+            # 이미 일부를 보냈으면 재시도하지 않음 (답변이 중간에 끊김)
+            error_type, delay, failure = policy.on_error(error, attempt, retry=not started)
+            if started:
+                result.error_type, result.error = error_type, str(error)
+                yield f"\n\n{STREAM_ERROR_PREFIX}: {str(error)})"
+                return
+            if failure is not None:
+                result.text, result.error_type, result.error = failure.text, failure.error_type, failure.error
+                yield result.text
+                return
+            time.sleep(delay)
+
+
+    def get_backend_stats(self):
+        """
+        백엔드별 요청 수, 할당량 초과 횟수, 제외 상태를 반환합니다.
+
+        Returns:
+            list: BackendPool.get_stats() 결과
+        """
+        return self.pool.get_stats()
 
 
 # 전역 클라이언트 인스턴스
@@ -98,3 +678,144 @@ def get_client():
     if _client is None:
         _client = GeminiClient()
     return _client
+
+
+def get_backend_stats():
+    """
+    전역 클라이언트의 백엔드별 상태를 반환합니다 (교사 대시보드 표시용).
+
+    Returns:
+        list: 백엔드별 상태 (클라이언트가 아직 없으면 빈 목록)
+    """
+    if _client is None:
+        return []
+    return _client.get_backend_stats()
+
+
+class AsyncGeminiClient:
+    """
+    asyncio용 Gemini 클라이언트
+    GeminiClient의 백엔드 풀(모델, 컨텍스트 캐시, 요청 제한기)을 그대로 쓰고
+    재시도 규칙(오류 분류, 지수 백오프, 시간 제한)도 같습니다.
+    반 전체 리포트나 재채점처럼 많은 요청을 이벤트 루프 하나에서 동시에 보낼 때 사용합니다.
+    """
+
+    def __init__(self, client=None):
+        """
+        Args:
+            client (GeminiClient): 설정을 함께 쓸 동기 클라이언트 (기본: 전역 클라이언트)
+        """
+        self._client = client or get_client()
+        # 이벤트 루프별 동시 요청 수 제한 (제한기 대기로 스레드가 쌓이지 않도록)
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _semaphore(self):
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self._client.pool.max_in_flight)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    async def generate(self, prompt, max_retries=3, system_prompt=None, deadline=None, timeout=None, purpose=None):
+        """
+        프롬프트에 대한 AI 응답을 생성합니다 (GeminiClient.generate의 async 버전, 재시도 규칙은 RetryPolicy).
+
+        Args:
+            prompt (str): 입력 프롬프트
+            max_retries (int): 최대 시도 횟수
+            system_prompt (str): 컨텍스트 캐시에 올릴 고정 프롬프트 (선택)
+            deadline (float): 요청 전체 시간 제한 (초, 기본 DEFAULT_DEADLINE_SECONDS)
+            timeout (float): API 호출 한 번의 시간 제한 (초, 기본 REQUEST_TIMEOUT_SECONDS)
+            purpose (str): 요청 용도 (선호 모델 등급을 정함, 선택)
+
+        Returns:
+            GenerationResult: 응답 (실패하면 text에 안내 문구)
+        """
+        client = self._client
+
+        async with self._semaphore():
+            policy = RetryPolicy(client, purpose, max_retries, deadline, timeout)
+
+            for attempt in range(max_retries):
+                backend = policy.backend
+                try:
+                    # 컨텍스트 캐시 생성은 네트워크 호출이라 스레드에서 처리
+                    model, request_prompt = await asyncio.to_thread(
+                        client._resolve_model, backend, prompt, system_prompt
+                    )
+                    estimated_tokens = estimate_tokens(request_prompt)
+
+                    # 할당량 안에서 차례가 올 때까지 대기 (남은 시간만큼만)
+                    acquired = await asyncio.to_thread(
+                        backend.governor.acquire, estimated_tokens, policy.remaining()
+                    )
+                    if not acquired:
+                        return _deadline_result(attempt)
+                    response = None
+                    try:
+                        response = await model.generate_content_async(
+                            request_prompt, request_options={"timeout": policy.call_timeout()}
+                        )
+                    finally:
+                        backend.governor.release(estimated_tokens, _usage_tokens(response))
+                    client.pool.record_success(backend)
+                    return _response_result(response, attempt + 1)
+
+                except Exception as e:
+                    _, delay, failure = policy.on_error(e, attempt)
+                    if failure is not None:
+                        return failure
+                    await asyncio.sleep(delay)
+
+        return GenerationResult(UNAVAILABLE_MESSAGE, ERROR_NON_RETRYABLE, attempts=max_retries)
+
+
+    async def generate_response(self, prompt, max_retries=3, system_prompt=None, deadline=None, timeout=None,
+                                purpose=None):
+        """
+        프롬프트에 대한 AI 응답 생성 (GeminiClient.generate_response의 async 버전)
+
+        Returns:
+            str: AI 생성 응답 (실패하면 안내 문구 - 구분하려면 generate 사용)
+        """
+        result = await self.generate(prompt, max_retries, system_prompt, deadline, timeout, purpose)
+        return result.text
+
+
+# 전역 async 클라이언트 인스턴스
+_async_client = None
+
+
+def get_async_client():
+    """전역 AsyncGeminiClient 인스턴스 반환"""
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncGeminiClient()
+    return _async_client
+
+
+# async 요청을 실행하는 프로세스 전체의 이벤트 루프 (백그라운드 스레드에서 계속 실행)
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def run_async(coro):
+    """
+    코루틴을 백그라운드 이벤트 루프에서 실행하고 결과를 기다립니다 (동기 코드에서 호출용).
+    SDK의 async 클라이언트(grpc.aio)는 처음 사용한 이벤트 루프에 묶이므로
+    호출할 때마다 asyncio.run으로 새 루프를 만들면 두 번째 실행부터
+    "attached to a different loop" 오류가 납니다. 그래서 루프 하나를 계속 씁니다.
+
+    Args:
+        coro: 실행할 코루틴
+
+    Returns:
+        코루틴의 결과
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="gemini-async", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _loop).result()
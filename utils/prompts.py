@@ -3,8 +3,8 @@ AI 작가와의 대화 - 프롬프트 템플릿
 초등학교 6학년 학생들을 위한 AI 프롬프트
 """
 
-def get_author_role_prompt(story_content, question):
-    """AI 작가 역할 프롬프트 생성"""
+def get_author_system_prompt(story_content):
+    """AI 작가 역할 고정 프롬프트 (이야기 + 역할 지시문, 컨텍스트 캐시 대상)"""
     return f"""당신은 이 이야기를 쓴 작가입니다. 초등학교 6학년 학생들이 당신의 작품을 읽고 질문을 합니다.
 
 [이야기 내용]
@@ -16,24 +16,31 @@ def get_author_role_prompt(story_content, question):
 - 학생들의 사고를 자극하는 답변을 제공하세요
 - 이야기의 배경, 캐릭터의 감정, 작가의 의도 등을 설명하세요
 - 때로는 반문을 통해 학생 스스로 생각하게 만드세요
-- 답변은 3-5문장으로 간결하게 해주세요
+- 답변은 3-5문장으로 간결하게 해주세요"""
+
 
-학생의 질문: {question}
+def get_author_question_prompt(question):
+    """AI 작가 역할 프롬프트 중 학생 질문 부분"""
+    return f"""학생의 질문: {question}
 
 작가로서 답변해주세요 (한국어, 초등학생 수준):"""
 
 
-def get_question_analysis_prompt(story_content, question):
-    """질문 분석 프롬프트 생성"""
-    return f"""다음은 초등학교 6학년 학생이 이야기를 읽고 작가에게 한 질문입니다.
-이 질문의 질을 1-5점으로 평가해주세요.
+def get_author_role_prompt(story_content, question):
+    """AI 작가 역할 프롬프트 생성"""
+    return f"""{get_author_system_prompt(story_content)}
+
+{get_author_question_prompt(question)}"""
+
+
+def get_question_analysis_system_prompt(story_content):
+    """질문 분석 고정 프롬프트 (이야기 + 평가 기준, 컨텍스트 캐시 대상)"""
+    return f"""다음은 초등학교 6학년 학생이 이야기를 읽고 작가에게 한 질문을 평가하는 작업입니다.
+질문의 질을 1-5점으로 평가해주세요.
 
 [이야기]
 {story_content}
 
-[학생의 질문]
-{question}
-
 평가 기준:
 1. 깊이 (1점: 매우 표면적 → 5점: 매우 깊이 있음)
    - 단순 사실 확인 vs 의미/주제 탐구
@@ -64,6 +71,34 @@ def get_question_analysis_prompt(story_content, question):
 }}"""
 
 
+def get_question_analysis_question_prompt(question):
+    """질문 분석 프롬프트 중 학생 질문 부분"""
+    return f"""[학생의 질문]
+{question}"""
+
+
+def get_question_batch_analysis_question_prompt(questions):
+    """여러 질문을 한 번에 평가하는 프롬프트 중 학생 질문 부분 (고정 프롬프트는 질문 하나일 때와 같음)"""
+    numbered = "\n".join(f"{i}. {question}" for i, question in enumerate(questions, 1))
+    return f"""[학생들의 질문 {len(questions)}개]
+{numbered}
+
+위 질문들을 각각 따로 평가해주세요.
+질문마다 위 JSON 형식의 객체를 만들고 "index"에 질문 번호를 넣어,
+질문 번호 순서대로 담은 JSON 배열로만 답변해주세요 (다른 텍스트 없이):
+[
+  {{"index": 1, "total_score": ..., "depth": ..., "creativity": ..., "comprehension": ..., "thinking": ..., "feedback": "..."}},
+  ...
+]"""
+
+
+def get_question_analysis_prompt(story_content, question):
+    """질문 분석 프롬프트 생성"""
+    return f"""{get_question_analysis_system_prompt(story_content)}
+
+{get_question_analysis_question_prompt(question)}"""
+
+
 def get_report_generation_prompt(student_id, student_name, total_questions, avg_score, sample_questions):
     """학습 리포트 생성 프롬프트"""
     return f"""초등학교 6학년 학생의 독해 및 질문 활동을 분석하여 학습 리포트를 작성해주세요.
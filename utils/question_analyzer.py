@@ -3,19 +3,45 @@
 AI를 사용하여 학생 질문의 질을 분석합니다.
 """
 
+import asyncio
 import json
 import re
-from .gemini_client import get_client
-from .prompts import get_question_analysis_prompt
+import threading
+import time
+from .gemini_client import get_client, get_async_client, is_error_response, PURPOSE_SCORING
+from .prompts import (
+    get_question_analysis_system_prompt,
+    get_question_analysis_question_prompt,
+    get_question_batch_analysis_question_prompt
+)
+from .score_cache import get_cached_score, store_score
+from .answer_cache import normalize_question
 
+# 분석에 실패했을 때 기본 점수에 붙는 평가 문구 (이런 점수는 캐시하지 않음)
+FALLBACK_FEEDBACKS = ("분석 중 오류가 발생했습니다.", "질문을 분석했습니다.")
 
-def analyze_question(question, story_content):
+# 한 번의 모델 호출로 채점할 최대 질문 수
+BATCH_SIZE = 20
+
+# 채점 요청 전체 시간 제한 (초) - 넘기면 기본 점수로 처리되고 채점 큐가 나중에 다시 시도
+SCORING_DEADLINE_SECONDS = 45
+BATCH_SCORING_DEADLINE_SECONDS = 120
+
+# 묶음 채점 누적 통계 (호출 한 번에 몇 문항을 처리했는지)
+_batch_stats = {"calls": 0, "items": 0, "seconds": 0.0, "split_retries": 0}
+_batch_stats_lock = threading.Lock()
+
+
+def analyze_question(question, story_content, client=None, use_cache=True):
     """
     학생의 질문을 분석하여 점수를 매깁니다.
+    같은 이야기의 같은 질문을 이미 채점했다면 저장된 점수를 바로 돌려줍니다.
 
     Args:
         question (str): 학생의 질문
         story_content (str): 이야기 내용
+        client: 사용할 클라이언트 (기본: Gemini 클라이언트, 테스트용 가짜 클라이언트 가능)
+        use_cache (bool): 점수 캐시를 읽고 쓸지 여부
 
     Returns:
         dict: 분석 결과
@@ -29,31 +55,274 @@ def analyze_question(question, story_content):
             }
     """
     try:
+        # 저장된 점수가 있으면 모델을 호출하지 않음
+        cached_score = get_cached_score(question, story_content) if use_cache else None
+        if cached_score is not None:
+            print(f"[DEBUG] 저장된 점수 사용: {question[:30]}")
+            return cached_score
+
         # Gemini 클라이언트 가져오기
-        client = get_client()
+        if client is None:
+            client = get_client()
 
-        # 프롬프트 생성
-        prompt = get_question_analysis_prompt(story_content, question)
+        # 프롬프트 생성 (이야기 + 평가 기준은 컨텍스트 캐시로)
+        system_prompt = get_question_analysis_system_prompt(story_content)
+        prompt = get_question_analysis_question_prompt(question)
 
         # AI 응답 생성
-        response = client.generate_response(prompt)
+        response = client.generate_response(
+            prompt, system_prompt=system_prompt, deadline=SCORING_DEADLINE_SECONDS,
+            purpose=PURPOSE_SCORING
+        )
 
-        # JSON 파싱
-        score_data = parse_json_response(response)
+        return _finish_analysis(question, story_content, response, use_cache)
 
-        return score_data
+    except Exception as e:
+        print(f"질문 분석 오류: {e}")
+        return _analysis_error_score()
+
+
+async def analyze_question_async(question, story_content, client=None, use_cache=True):
+    """
+    analyze_question의 async 버전입니다. 여러 질문을 asyncio.gather로 동시에 채점할 때 사용합니다.
+
+    Args:
+        question (str): 학생의 질문
+        story_content (str): 이야기 내용
+        client: 사용할 async 클라이언트 (기본: AsyncGeminiClient)
+        use_cache (bool): 점수 캐시를 읽고 쓸지 여부
+
+    Returns:
+        dict: 분석 결과 (analyze_question과 같은 형식)
+    """
+    try:
+        # 점수 캐시 파일 읽기/쓰기는 이벤트 루프를 막지 않도록 스레드에서 처리
+        cached_score = await asyncio.to_thread(get_cached_score, question, story_content) if use_cache else None
+        if cached_score is not None:
+            return cached_score
+
+        if client is None:
+            client = get_async_client()
+
+        system_prompt = get_question_analysis_system_prompt(story_content)
+        prompt = get_question_analysis_question_prompt(question)
+        response = await client.generate_response(
+            prompt, system_prompt=system_prompt, deadline=SCORING_DEADLINE_SECONDS,
+            purpose=PURPOSE_SCORING
+        )
+
+        return await asyncio.to_thread(_finish_analysis, question, story_content, response, use_cache)
 
     except Exception as e:
         print(f"질문 분석 오류: {e}")
-        # 오류 발생시 기본 점수 반환
-        return {
-            "total_score": 3.0,
-            "depth": 3,
-            "creativity": 3,
-            "comprehension": 3,
-            "thinking": 3,
-            "feedback": "분석 중 오류가 발생했습니다."
-        }
+        return _analysis_error_score()
+
+
+async def analyze_questions_async(questions, story_content, client=None, use_cache=True):
+    """
+    여러 질문을 이벤트 루프 하나에서 동시에 채점합니다 (질문당 모델 호출 한 번).
+
+    Args:
+        questions (list): 학생 질문 목록
+        story_content (str): 이야기 내용
+        client: 사용할 async 클라이언트 (기본: AsyncGeminiClient)
+        use_cache (bool): 점수 캐시를 읽고 쓸지 여부
+
+    Returns:
+        list: 질문 순서대로의 분석 결과
+    """
+    return await asyncio.gather(*[
+        analyze_question_async(question, story_content, client, use_cache) for question in questions
+    ])
+
+
+def _finish_analysis(question, story_content, response, use_cache):
+    """모델 응답을 점수로 바꾸고, 제대로 채점된 경우에만 캐시에 저장합니다."""
+    score_data = parse_json_response(response)
+
+    if use_cache and not is_error_response(response) and score_data['feedback'] not in FALLBACK_FEEDBACKS:
+        store_score(question, story_content, score_data)
+
+    return score_data
+
+
+def _analysis_error_score():
+    """오류 발생시 기본 점수"""
+    return {
+        "total_score": 3.0,
+        "depth": 3,
+        "creativity": 3,
+        "comprehension": 3,
+        "thinking": 3,
+        "feedback": "분석 중 오류가 발생했습니다."
+    }
+
+
+def analyze_questions_batch(questions, story_content, batch_size=BATCH_SIZE, client=None, use_cache=True):
+    """
+    여러 질문을 한 번의 모델 호출로 묶어 채점합니다. (재채점, 일괄 채점용)
+    이미 채점된 질문은 점수 캐시에서 가져오고, 같은 질문은 한 번만 채점합니다.
+    응답 전체를 읽지 못하면 묶음을 반으로 나눠 다시 시도하고,
+    일부 문항만 빠졌으면 그 문항만 더 작은 묶음으로 다시 채점합니다.
+
+    Args:
+        questions (list): 학생 질문 목록
+        story_content (str): 이야기 내용
+        batch_size (int): 한 번에 보낼 최대 질문 수
+        client: 사용할 클라이언트 (기본: Gemini 클라이언트)
+        use_cache (bool): 점수 캐시를 읽고 쓸지 여부
+
+    Returns:
+        list: 질문 순서대로의 분석 결과 (analyze_question과 같은 형식)
+    """
+    results = [None] * len(questions)
+
+    # 캐시에 있는 질문은 바로 채우고, 나머지는 정규화된 질문별로 한 번만 채점
+    todo = {}  # 정규화된 질문 -> [위치]
+    for i, question in enumerate(questions):
+        cached_score = get_cached_score(question, story_content) if use_cache else None
+        if cached_score is not None:
+            results[i] = cached_score
+        else:
+            todo.setdefault(normalize_question(question), []).append(i)
+
+    unique_questions = [questions[positions[0]] for positions in todo.values()]
+    print(f"[DEBUG] 묶음 채점: {len(questions)}개 중 {len(unique_questions)}개 새로 채점")
+
+    start = time.perf_counter()
+    calls_before = _batch_stats['calls']
+    scores = {}
+    for offset in range(0, len(unique_questions), batch_size):
+        chunk = unique_questions[offset:offset + batch_size]
+        scores.update(_score_chunk(chunk, story_content, client, use_cache))
+    elapsed = time.perf_counter() - start
+
+    for question, positions in zip(unique_questions, todo.values()):
+        for i in positions:
+            results[i] = dict(scores[question])
+
+    if unique_questions:
+        calls = _batch_stats['calls'] - calls_before
+        print(
+            f"[DEBUG] 묶음 채점 완료: {len(unique_questions)}개, 호출 {calls}회, "
+            f"문항당 {elapsed / len(unique_questions) * 1000:.0f}ms"
+        )
+    return results
+
+
+def _score_chunk(chunk, story_content, client=None, use_cache=True):
+    """
+    질문 묶음 하나를 채점합니다. 실패한 문항은 더 작은 묶음으로 다시 채점합니다.
+
+    Args:
+        chunk (list): 질문 목록 (중복 없음)
+        story_content (str): 이야기 내용
+        client: 사용할 클라이언트 (기본: Gemini 클라이언트)
+        use_cache (bool): 점수 캐시에 저장할지 여부
+
+    Returns:
+        dict: {질문: 분석 결과}
+    """
+    if len(chunk) == 1:
+        return {chunk[0]: analyze_question(chunk[0], story_content, client, use_cache)}
+
+    scores = {}
+    try:
+        if client is None:
+            client = get_client()
+        system_prompt = get_question_analysis_system_prompt(story_content)
+        prompt = get_question_batch_analysis_question_prompt(chunk)
+
+        start = time.perf_counter()
+        response = client.generate_response(
+            prompt, system_prompt=system_prompt, deadline=BATCH_SCORING_DEADLINE_SECONDS,
+            purpose=PURPOSE_SCORING
+        )
+        elapsed = time.perf_counter() - start
+
+        if not is_error_response(response):
+            scores = parse_json_array_response(response, len(chunk))
+            scores = {chunk[i]: score for i, score in scores.items()}
+
+        with _batch_stats_lock:
+            _batch_stats['calls'] += 1
+            _batch_stats['items'] += len(scores)
+            _batch_stats['seconds'] += elapsed
+    except Exception as e:
+        print(f"묶음 채점 오류: {e}")
+
+    if use_cache:
+        for question, score_data in scores.items():
+            store_score(question, story_content, score_data)
+
+    # 빠진 문항은 반으로 나눠 다시 채점
+    missing = [question for question in chunk if question not in scores]
+    if missing:
+        with _batch_stats_lock:
+            _batch_stats['split_retries'] += 1
+        print(f"[DEBUG] 묶음 채점 {len(chunk)}개 중 {len(missing)}개 실패, 나눠서 다시 채점")
+        half = max(1, min(len(missing), len(chunk) // 2))
+        for offset in range(0, len(missing), half):
+            scores.update(_score_chunk(missing[offset:offset + half], story_content, client, use_cache))
+
+    return scores
+
+
+def parse_json_array_response(response, count):
+    """
+    묶음 채점 응답에서 JSON 배열을 파싱합니다. 문항별로 따로 검사하므로
+    일부 문항이 잘못되어도 나머지 문항의 점수는 사용합니다.
+
+    Args:
+        response (str): AI 응답 텍스트
+        count (int): 보낸 질문 수
+
+    Returns:
+        dict: {질문 위치(0부터): 분석 결과} - 읽지 못한 문항은 빠짐
+    """
+    json_match = re.search(r'```(?:json)?\s*(\[.*\])\s*```', response, re.DOTALL)
+    if json_match:
+        json_str = json_match.group(1)
+    else:
+        start, end = response.find('['), response.rfind(']')
+        json_str = response[start:end + 1] if start != -1 and end > start else response
+
+    try:
+        items = json.loads(json_str)
+    except json.JSONDecodeError as e:
+        print(f"[ERROR] 묶음 JSON 파싱 오류: {e}")
+        return {}
+    if not isinstance(items, list):
+        print("[ERROR] 묶음 채점 응답이 배열이 아닙니다")
+        return {}
+
+    scores = {}
+    for position, item in enumerate(items):
+        try:
+            index = int(item.get("index", position + 1)) - 1
+            if not 0 <= index < count or index in scores:
+                continue
+            if not all(key in item for key in ("depth", "creativity", "comprehension", "thinking")):
+                continue
+            scores[index] = normalize_score_data(item)
+        except (AttributeError, TypeError, ValueError) as e:
+            print(f"[ERROR] 묶음 채점 {position + 1}번 문항 파싱 오류: {e}")
+    return scores
+
+
+def get_batch_scoring_stats():
+    """
+    묶음 채점 누적 통계를 반환합니다.
+
+    Returns:
+        dict: {"calls", "items", "seconds", "split_retries", "items_per_call", "ms_per_item"}
+    """
+    with _batch_stats_lock:
+        stats = dict(_batch_stats)
+    stats['items_per_call'] = round(stats['items'] / stats['calls'], 1) if stats['calls'] else 0.0
+    stats['ms_per_item'] = round(stats['seconds'] / stats['items'] * 1000, 1) if stats['items'] else 0.0
+    stats['seconds'] = round(stats['seconds'], 2)
+    return stats
 
 
 def parse_json_response(response):
@@ -98,28 +367,7 @@ def parse_json_response(response):
         data = json.loads(json_str)
         print(f"[DEBUG] Parsed JSON successfully: {data}")
 
-        # 필수 필드 확인 및 기본값 설정
-        result = {
-            "total_score": float(data.get("total_score", 3.0)),
-            "depth": int(data.get("depth", 3)),
-            "creativity": int(data.get("creativity", 3)),
-            "comprehension": int(data.get("comprehension", 3)),
-            "thinking": int(data.get("thinking", 3)),
-            "feedback": data.get("feedback", "좋은 질문입니다!")
-        }
-
-        # 점수 범위 검증 (1-5)
-        for key in ["depth", "creativity", "comprehension", "thinking"]:
-            if result[key] < 1:
-                result[key] = 1
-            elif result[key] > 5:
-                result[key] = 5
-
-        # total_score 범위 검증
-        if result["total_score"] < 1.0:
-            result["total_score"] = 1.0
-        elif result["total_score"] > 5.0:
-            result["total_score"] = 5.0
+        result = normalize_score_data(data)
 
         print(f"[DEBUG] Final score result: {result}")
         return result
@@ -150,6 +398,42 @@ def parse_json_response(response):
         }
 
 
+def normalize_score_data(data):
+    """
+    파싱된 점수에 빠진 항목을 채우고 점수 범위를 맞춥니다.
+
+    Args:
+        data (dict): 파싱된 JSON 데이터
+
+    Returns:
+        dict: 분석 결과
+    """
+    # 필수 필드 확인 및 기본값 설정
+    result = {
+        "total_score": float(data.get("total_score", 3.0)),
+        "depth": int(data.get("depth", 3)),
+        "creativity": int(data.get("creativity", 3)),
+        "comprehension": int(data.get("comprehension", 3)),
+        "thinking": int(data.get("thinking", 3)),
+        "feedback": data.get("feedback", "좋은 질문입니다!")
+    }
+
+    # 점수 범위 검증 (1-5)
+    for key in ["depth", "creativity", "comprehension", "thinking"]:
+        if result[key] < 1:
+            result[key] = 1
+        elif result[key] > 5:
+            result[key] = 5
+
+    # total_score 범위 검증
+    if result["total_score"] < 1.0:
+        result["total_score"] = 1.0
+    elif result["total_score"] > 5.0:
+        result["total_score"] = 5.0
+
+    return result
+
+
 def get_score_level(score):
     """
     점수를 레벨로 변환합니다.
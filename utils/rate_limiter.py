@@ -0,0 +1,235 @@
+"""
+API 요청 속도 제한 모듈
+한 반 학생들이 동시에 질문해도 Gemini API 할당량(분당 요청 수, 분당 토큰 수)을 넘지 않도록
+모든 요청이 프로세스 하나에서 공유하는 제한기를 거치게 합니다.
+
+- 분당 요청 수(RPM), 분당 토큰 수(TPM): 토큰 버킷
+- 동시에 진행 중인 요청 수: 최대 개수 제한
+- 한도를 넘는 요청은 도착한 순서대로(FIFO) 기다립니다.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+# 분당 최대 요청 수 / 토큰 수 (환경 변수로 조정)
+DEFAULT_RPM = int(os.getenv("GEMINI_RPM", "60"))
+DEFAULT_TPM = int(os.getenv("GEMINI_TPM", "1000000"))
+
+# 동시에 진행할 수 있는 최대 요청 수
+DEFAULT_MAX_IN_FLIGHT = int(os.getenv("GEMINI_MAX_IN_FLIGHT", "8"))
+
+# 토큰 수 추정 (한국어 위주라 글자 2개를 토큰 1개로 봄) 및 응답 길이 예상치
+CHARS_PER_TOKEN = 2
+EXPECTED_OUTPUT_TOKENS = 500
+
+# 대기 시간 통계를 낼 최근 요청 수
+WAIT_HISTORY_SIZE = 200
+
+
+def estimate_tokens(*texts):
+    """
+    요청에 쓰일 토큰 수를 대략 추정합니다 (입력 + 예상 응답).
+
+    Args:
+        *texts (str): 보낼 프롬프트들
+
+    Returns:
+        int: 추정 토큰 수
+    """
+    chars = sum(len(text) for text in texts if text)
+    return chars // CHARS_PER_TOKEN + EXPECTED_OUTPUT_TOKENS
+
+
+class TokenBucket:
+    """분당 capacity만큼 채워지는 토큰 버킷 (잠금은 호출하는 쪽에서)"""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._last = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def time_until(self, amount, now):
+        """amount만큼 쓸 수 있을 때까지 남은 시간 (초)"""
+        self._refill(now)
+        # 버킷보다 큰 요청은 가득 찼을 때 보냄
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount):
+        self.tokens -= min(amount, self.capacity)
+
+    def refund(self, amount):
+        """추정치와 실제 사용량의 차이를 돌려주거나(양수) 더 차감(음수)합니다."""
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RequestGovernor:
+    """RPM/TPM 토큰 버킷과 동시 요청 수 제한을 함께 적용하는 공정(FIFO) 대기열"""
+
+    def __init__(self, rpm=DEFAULT_RPM, tpm=DEFAULT_TPM, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_in_flight = max_in_flight
+        self._in_flight = 0
+        self._waiting = deque()  # 대기 중인 요청 표식 (도착 순)
+        self._cond = threading.Condition()
+        self._waits = deque(maxlen=WAIT_HISTORY_SIZE)  # 최근 대기 시간 (초)
+        self._stats = {"acquired": 0, "timed_out": 0}
+
+    def acquire(self, estimated_tokens, timeout=None):
+        """
+        요청을 보낼 차례가 될 때까지 기다립니다.
+        앞에 기다리는 요청이 있으면 한도가 남아도 먼저 온 요청을 앞지르지 않습니다.
+
+        Args:
+            estimated_tokens (int): 요청의 추정 토큰 수
+            timeout (float): 최대 대기 시간 (초, None이면 무한)
+
+        Returns:
+            bool: 차례를 얻었으면 True, 시간 초과면 False
+        """
+        ticket = object()
+        start = time.monotonic()
+        deadline = start + timeout if timeout is not None else None
+
+        with self._cond:
+            self._waiting.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._waiting[0] is ticket and self._in_flight < self.max_in_flight:
+                        delay = max(
+                            self.requests.time_until(1, now),
+                            self.tokens.time_until(estimated_tokens, now)
+                        )
+                        if delay <= 0:
+                            break
+                    else:
+                        delay = None  # 차례나 동시 요청 자리가 나면 깨어남
+
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            self._stats['timed_out'] += 1
+                            return False
+                        delay = remaining if delay is None else min(delay, remaining)
+                    self._cond.wait(delay)
+
+                self.requests.consume(1)
+                self.tokens.consume(estimated_tokens)
+                self._in_flight += 1
+                self._stats['acquired'] += 1
+                self._waits.append(time.monotonic() - start)
+                return True
+            finally:
+                self._waiting.remove(ticket)
+                self._cond.notify_all()
+
+    def release(self, estimated_tokens=0, actual_tokens=None):
+        """
+        요청이 끝났음을 알립니다.
+
+        Args:
+            estimated_tokens (int): acquire 때 쓴 추정 토큰 수
+            actual_tokens (int): 실제 사용한 토큰 수 (알 수 있으면)
+        """
+        with self._cond:
+            self._in_flight -= 1
+            if actual_tokens is not None:
+                self.tokens.refund(estimated_tokens - actual_tokens)
+            self._cond.notify_all()
+
+    def get_load(self):
+        """
+        새 요청을 어디로 보낼지 고를 때 쓰는 부하 정보를 반환합니다.
+
+        Returns:
+            tuple: (대기 + 진행 중인 요청 수 / 동시 요청 한도, 남은 분당 요청 비율)
+        """
+        with self._cond:
+            self.requests._refill(time.monotonic())
+            pending = len(self._waiting) + self._in_flight
+            return pending / max(1, self.max_in_flight), self.requests.tokens / max(1.0, self.requests.capacity)
+
+    def get_stats(self):
+        """
+        대기열 상태를 반환합니다.
+
+        Returns:
+            dict: {"queue_depth", "in_flight", "acquired", "timed_out", "wait_ms_avg", "wait_ms_max", ...}
+        """
+        with self._cond:
+            waits = list(self._waits)
+            now = time.monotonic()
+            self.requests._refill(now)
+            self.tokens._refill(now)
+            return {
+                "queue_depth": len(self._waiting),
+                "in_flight": self._in_flight,
+                "max_in_flight": self.max_in_flight,
+                **self._stats,
+                "wait_ms_avg": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+                "wait_ms_max": round(max(waits) * 1000, 1) if waits else 0.0,
+                "rpm_available": int(self.requests.tokens),
+                "tpm_available": int(self.tokens.tokens),
+            }
+
+
+# 프로세스 전체(모든 Streamlit 세션)에서 공유하는 제한기 (API 키/모델별로 하나씩)
+_governors = {}
+_governor_lock = threading.Lock()
+
+
+def get_governor(name="default"):
+    """
+    이름별 전역 RequestGovernor 인스턴스 반환
+
+    Args:
+        name (str): 제한기 이름 (할당량을 따로 받는 API 키/모델마다 하나)
+
+    Returns:
+        RequestGovernor: 제한기
+    """
+    with _governor_lock:
+        governor = _governors.get(name)
+        if governor is None:
+            governor = RequestGovernor()
+            _governors[name] = governor
+        return governor
+
+
+def get_rate_limit_stats():
+    """
+    모든 제한기의 대기열 상태를 합쳐 반환합니다 (교사 대시보드 표시용).
+
+    Returns:
+        dict: RequestGovernor.get_stats()와 같은 형식 (개수는 합계, 대기 시간 최대는 최댓값)
+    """
+    with _governor_lock:
+        governors = list(_governors.values())
+    if not governors:
+        governors = [RequestGovernor()]  # 아직 요청이 없으면 빈 상태
+
+    all_stats = [governor.get_stats() for governor in governors]
+    if len(all_stats) == 1:
+        return all_stats[0]
+
+    combined = {key: sum(stats[key] for stats in all_stats)
+                for key in ("queue_depth", "in_flight", "max_in_flight", "acquired", "timed_out",
+                            "rpm_available", "tpm_available")}
+    acquired = combined['acquired']
+    combined['wait_ms_avg'] = round(
+        sum(stats['wait_ms_avg'] * stats['acquired'] for stats in all_stats) / acquired, 1
+    ) if acquired else 0.0
+    combined['wait_ms_max'] = max(stats['wait_ms_max'] for stats in all_stats)
+    combined['governors'] = len(all_stats)
+    return combined
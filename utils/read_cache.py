@@ -0,0 +1,157 @@
+"""
+읽기 캐시 모듈
+Streamlit은 위젯을 조작할 때마다 스크립트를 다시 실행하므로, 같은 데이터를
+매번 디스크나 데이터베이스에서 읽지 않도록 프로세스 메모리에 캐시합니다.
+
+- 파일 읽기: 파일이 교체되거나 수정 시각(mtime)과 크기가 바뀌면 자동으로 다시 읽습니다.
+- 데이터베이스 읽기: 모든 프로세스가 함께 보는 데이터 버전(utils.database.get_data_version)이
+  바뀌면 다시 읽으므로 다른 프로세스(교사 대시보드, 재채점 도구 등)의 쓰기도 반영되고,
+  같은 프로세스의 쓰기 함수는 invalidate()로 해당 항목을 바로 무효화합니다.
+
+캐시된 값은 호출자가 수정해도 캐시에 영향이 없도록 복사본을 반환합니다.
+"""
+
+import copy
+import os
+import threading
+from collections import defaultdict
+
+_ALL = object()
+
+_entries = {}  # (namespace, key) -> (version, value)
+_hits = defaultdict(int)
+_misses = defaultdict(int)
+_lock = threading.Lock()
+
+# 무효화할 때마다 증가 - 읽는 도중 무효화되면 읽은 값을 캐시하지 않음
+_generation = 0
+
+
+def cached_call(namespace, key, loader, version=None):
+    """
+    캐시된 값을 반환하고, 없거나 버전이 다르면 loader()를 호출해 캐시에 저장합니다.
+    loader가 예외를 던지면 캐시하지 않고 그대로 전달합니다.
+
+    Args:
+        namespace (str): 캐시 구역 (예: 'conversation')
+        key: 구역 안의 키 (예: 학번)
+        loader (callable): 값을 읽어오는 함수
+        version: 데이터 버전 (캐시할 때와 다르면 다시 읽음, 선택)
+
+    Returns:
+        캐시된 값의 복사본
+    """
+    return _get((namespace, key), version, loader)
+
+
+def cached_file(path, loader):
+    """
+    파일 내용을 읽는 함수의 결과를 파일의 inode/mtime/크기 기준으로 캐시합니다.
+
+    Args:
+        path (Path): 파일 경로
+        loader (callable): 파일을 읽어 값을 반환하는 함수
+
+    Returns:
+        캐시된 값의 복사본 (파일이 없으면 loader()를 매번 호출)
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        with _lock:
+            _misses['file'] += 1
+        return loader()
+
+    # 원자적 쓰기(os.replace)는 파일을 새로 만들므로 inode도 함께 비교
+    return _get(('file', str(path)), (stat.st_ino, stat.st_mtime_ns, stat.st_size), loader)
+
+
+def _get(cache_key, version, loader):
+    namespace = cache_key[0]
+    with _lock:
+        entry = _entries.get(cache_key)
+        if entry is not None and entry[0] == version:
+            _hits[namespace] += 1
+            return copy.deepcopy(entry[1])
+        _misses[namespace] += 1
+        generation = _generation
+
+    value = loader()
+
+    with _lock:
+        if generation == _generation:
+            _entries[cache_key] = (version, value)
+    return copy.deepcopy(value)
+
+
+def invalidate(namespace, key=_ALL):
+    """
+    캐시 항목을 무효화합니다.
+
+    Args:
+        namespace (str): 캐시 구역
+        key: 무효화할 키 (생략하면 구역 전체)
+    """
+    global _generation
+    with _lock:
+        _generation += 1
+        if key is _ALL:
+            for cache_key in [k for k in _entries if k[0] == namespace]:
+                del _entries[cache_key]
+        else:
+            _entries.pop((namespace, key), None)
+
+
+def invalidate_prefix(namespace, key_prefix):
+    """
+    튜플 키의 첫 요소가 key_prefix인 캐시 항목을 모두 무효화합니다.
+    (예: 한 학생의 모든 페이지 캐시)
+
+    Args:
+        namespace (str): 캐시 구역
+        key_prefix: 키 튜플의 첫 요소
+    """
+    global _generation
+    with _lock:
+        _generation += 1
+        for cache_key in [
+            k for k in _entries
+            if k[0] == namespace and isinstance(k[1], tuple) and k[1][:1] == (key_prefix,)
+        ]:
+            del _entries[cache_key]
+
+
+def invalidate_file(path):
+    """파일 캐시 항목을 무효화합니다 (같은 mtime 안에 다시 쓴 경우 대비)."""
+    invalidate('file', str(path))
+
+
+def clear_cache():
+    """모든 캐시 항목을 지웁니다."""
+    global _generation
+    with _lock:
+        _generation += 1
+        _entries.clear()
+
+
+def get_cache_stats():
+    """
+    캐시 구역별 적중/실패 횟수를 반환합니다.
+
+    Returns:
+        dict: {구역: {"hits": int, "misses": int, "entries": int}}
+    """
+    with _lock:
+        entry_counts = defaultdict(int)
+        for namespace, _ in _entries:
+            entry_counts[namespace] += 1
+
+        namespaces = set(_hits) | set(_misses) | set(entry_counts)
+        return {
+            namespace: {
+                "hits": _hits[namespace],
+                "misses": _misses[namespace],
+                "entries": entry_counts[namespace]
+            }
+            for namespace in sorted(namespaces)
+        }
@@ -3,11 +3,16 @@
 학생의 활동을 분석하여 학습 리포트를 생성합니다.
 """
 
+import asyncio
 from datetime import datetime
 from .data_manager import load_conversation
-from .gemini_client import get_client
+from .gemini_client import get_client, get_async_client, run_async, PURPOSE_REPORT
 from .prompts import get_report_generation_prompt
 
+# 리포트 생성 요청 전체 시간 제한 (초) / 호출 한 번의 시간 제한 (초, 리포트는 길어서 넉넉히)
+REPORT_DEADLINE_SECONDS = 90
+REPORT_CALL_TIMEOUT_SECONDS = 60
+
 
 def generate_report(student_id):
     """
@@ -20,59 +25,177 @@ def generate_report(student_id):
         str: 마크다운 형식의 리포트
     """
     try:
-        # 학생 대화 이력 로드
-        conv_data = load_conversation(student_id)
+        report_data = _prepare_report(student_id)
+        if 'report' in report_data:
+            return report_data['report']
 
-        if not conv_data or not conv_data.get('conversations'):
-            return generate_empty_report(student_id, conv_data.get('name', ''))
+        # AI에게 리포트 생성 요청
+        client = get_client()
+        result = client.generate(
+            report_data['prompt'], deadline=REPORT_DEADLINE_SECONDS, timeout=REPORT_CALL_TIMEOUT_SECONDS,
+            purpose=PURPOSE_REPORT
+        )
+        return _compose_report(report_data, result)
 
-        # 통계 정보
-        student_name = conv_data.get('name', '')
-        conversations = conv_data.get('conversations', [])
-        stats = conv_data.get('statistics', {})
+    except Exception as e:
+        print(f"리포트 생성 오류: {e}")
+        return f"# 리포트 생성 오류\n\n리포트를 생성하는 중 오류가 발생했습니다: {str(e)}"
 
-        total_questions = stats.get('total_questions', len(conversations))
-        avg_score = stats.get('average_score', 0.0)
 
-        # 대표 질문 선정 (점수가 높은 상위 3개와 낮은 1개)
-        sorted_convs = sorted(conversations, key=lambda x: x.get('score', {}).get('total', 0), reverse=True)
+async def generate_report_async(student_id, client=None):
+    """
+    generate_report의 async 버전입니다.
 
-        sample_questions = []
-        # 좋은 질문 (상위 3개)
-        for i, conv in enumerate(sorted_convs[:3]):
-            score = conv.get('score', {}).get('total', 0)
-            sample_questions.append(f"{i+1}. [{score:.1f}점] {conv['question']}")
+    Args:
+        student_id (str): 학번
+        client: 사용할 async 클라이언트 (기본: AsyncGeminiClient)
 
-        # 개선이 필요한 질문 (하위 1개)
-        if len(sorted_convs) > 3:
-            low_conv = sorted_convs[-1]
-            low_score = low_conv.get('score', {}).get('total', 0)
-            sample_questions.append(f"\n[참고] 개선이 필요한 질문 [{low_score:.1f}점]: {low_conv['question']}")
+    Returns:
+        str: 마크다운 형식의 리포트
+    """
+    try:
+        # 대화 이력 읽기(데이터베이스)는 이벤트 루프를 막지 않도록 스레드에서 처리
+        report_data = await asyncio.to_thread(_prepare_report, student_id)
+        if 'report' in report_data:
+            return report_data['report']
+
+        if client is None:
+            client = get_async_client()
+        result = await client.generate(
+            report_data['prompt'], deadline=REPORT_DEADLINE_SECONDS, timeout=REPORT_CALL_TIMEOUT_SECONDS,
+            purpose=PURPOSE_REPORT
+        )
+        return _compose_report(report_data, result)
 
-        sample_questions_str = "\n".join(sample_questions)
+    except Exception as e:
+        print(f"리포트 생성 오류: {e}")
+        return f"# 리포트 생성 오류\n\n리포트를 생성하는 중 오류가 발생했습니다: {str(e)}"
 
-        # AI에게 리포트 생성 요청
-        client = get_client()
-        prompt = get_report_generation_prompt(
-            student_id,
-            student_name,
-            total_questions,
-            avg_score,
-            sample_questions_str
-        )
 
-        ai_report = client.generate_response(prompt)
+async def generate_reports_async(student_ids, client=None):
+    """
+    여러 학생의 리포트를 이벤트 루프 하나에서 동시에 생성합니다.
 
-        # 최종 리포트 조합
-        report = f"""# {student_name} 학생 학습 리포트
+    Args:
+        student_ids (list): 학번 목록
+        client: 사용할 async 클라이언트 (기본: AsyncGeminiClient)
 
-**학번**: {student_id}
+    Returns:
+        dict: {학번: 리포트}
+    """
+    reports = await asyncio.gather(*[
+        generate_report_async(student_id, client) for student_id in student_ids
+    ])
+    return dict(zip(student_ids, reports))
+
+
+def generate_class_reports(student_ids):
+    """
+    반 전체 리포트를 동시에 생성합니다 (동기 코드에서 호출용).
+    버튼을 누를 때마다 새 이벤트 루프를 만들지 않고 gemini_client의 이벤트 루프 하나에서 실행합니다.
+
+    Args:
+        student_ids (list): 학번 목록
+
+    Returns:
+        dict: {학번: 리포트}
+    """
+    return run_async(generate_reports_async(student_ids))
+
+
+def _prepare_report(student_id):
+    """
+    리포트에 들어갈 통계와 대표 질문, AI 요청 프롬프트를 준비합니다.
+
+    Args:
+        student_id (str): 학번
+
+    Returns:
+        dict: 리포트 재료 (활동이 없으면 {"report": 빈 리포트})
+    """
+    # 학생 대화 이력 로드
+    conv_data = load_conversation(student_id)
+
+    if not conv_data or not conv_data.get('conversations'):
+        return {"report": generate_empty_report(student_id, conv_data.get('name', ''))}
+
+    # 통계 정보
+    student_name = conv_data.get('name', '')
+    conversations = conv_data.get('conversations', [])
+    stats = conv_data.get('statistics', {})
+
+    total_questions = stats.get('total_questions', len(conversations))
+    avg_score = stats.get('average_score', 0.0)
+
+    # 대표 질문 선정 (점수가 높은 상위 3개와 낮은 1개)
+    sorted_convs = sorted(conversations, key=lambda x: x.get('score', {}).get('total', 0), reverse=True)
+
+    sample_questions = []
+    # 좋은 질문 (상위 3개)
+    for i, conv in enumerate(sorted_convs[:3]):
+        score = conv.get('score', {}).get('total', 0)
+        sample_questions.append(f"{i+1}. [{score:.1f}점] {conv['question']}")
+
+    # 개선이 필요한 질문 (하위 1개)
+    if len(sorted_convs) > 3:
+        low_conv = sorted_convs[-1]
+        low_score = low_conv.get('score', {}).get('total', 0)
+        sample_questions.append(f"\n[참고] 개선이 필요한 질문 [{low_score:.1f}점]: {low_conv['question']}")
+
+    sample_questions_str = "\n".join(sample_questions)
+
+    prompt = get_report_generation_prompt(
+        student_id,
+        student_name,
+        total_questions,
+        avg_score,
+        sample_questions_str
+    )
+
+    return {
+        "student_id": student_id,
+        "student_name": student_name,
+        "total_questions": total_questions,
+        "avg_score": avg_score,
+        "sample_questions": sample_questions_str,
+        "prompt": prompt
+    }
+
+
+def _compose_report(report_data, result):
+    """
+    AI 응답과 통계로 최종 리포트를 조합합니다.
+
+    Args:
+        report_data (dict): _prepare_report의 결과
+        result (GenerationResult): AI 응답
+
+    Returns:
+        str: 마크다운 형식의 리포트
+    """
+    if result.ok:
+        ai_report = result.text
+    else:
+        # AI 평가 없이 활동 요약과 대표 질문만으로 리포트를 만듦
+        print(f"[DEBUG] 리포트 AI 평가 생성 실패 ({result.error_type}), 요약만 제공")
+        ai_report = f"""## 대표 질문
+{report_data['sample_questions']}
+
+*AI 종합 평가를 지금 생성하지 못했습니다. 잠시 후 다시 리포트를 생성해주세요.*"""
+
+    student_name = report_data['student_name']
+    avg_score = report_data['avg_score']
+
+    # 최종 리포트 조합
+    return f"""# {student_name} 학생 학습 리포트
+
+**학번**: {report_data['student_id']}
 **생성 일자**: {datetime.now().strftime('%Y년 %m월 %d일')}
 
 ---
 
 ## 활동 요약
-- 총 질문 개수: **{total_questions}개**
+- 총 질문 개수: **{report_data['total_questions']}개**
 - 평균 질문 점수: **{avg_score:.1f}/5.0** ({get_score_level(avg_score)})
 
 ---
@@ -84,12 +207,6 @@ def generate_report(student_id):
 *이 리포트는 AI가 자동으로 생성한 것입니다.*
 """
 
-        return report
-
-    except Exception as e:
-        print(f"리포트 생성 오류: {e}")
-        return f"# 리포트 생성 오류\n\n리포트를 생성하는 중 오류가 발생했습니다: {str(e)}"
-
 
 def generate_empty_report(student_id, student_name):
     """
@@ -0,0 +1,320 @@
+"""
+전체 대화 재채점 모듈
+질문 분석 프롬프트(평가 기준)를 바꾼 뒤 저장된 모든 질문을 새 기준으로 다시 채점합니다.
+
+대화는 SQLite 저장소(data/app.db)에서 읽습니다. 예전 data/conversations/*.json 파일은
+앱이 처음 실행될 때 저장소로 옮겨지므로 함께 재채점됩니다.
+
+사용법:
+    python -m utils.rescore                   # 이어서 재채점 (체크포인트가 있으면)
+    python -m utils.rescore --restart         # 처음부터 다시
+    python -m utils.rescore --failed-only     # 채점 작업이 포기한 질문만 다시 채점
+    python -m utils.rescore --fake            # 가짜 클라이언트로 흐름만 확인 (저장하지 않음)
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+from .answer_cache import context_hash
+from .database import get_connection
+from .data_manager import update_conversation_scores, is_score_pending, is_score_failed, flush_conversations
+from .fake_client import FakeGeminiClient
+from .question_analyzer import analyze_questions_batch, FALLBACK_FEEDBACKS, BATCH_SIZE
+from .rate_limiter import RequestGovernor, estimate_tokens
+from .score_cache import PROMPT_VERSION
+
+# 데이터 디렉토리 경로
+BASE_DIR = Path(__file__).parent.parent
+DATA_DIR = BASE_DIR / "data"
+CHECKPOINT_FILE = DATA_DIR / "rescore_checkpoint.jsonl"
+STORY_FILE = BASE_DIR / "story.txt"
+
+# 기본 작업자 수와 분당 최대 모델 호출 수
+DEFAULT_WORKERS = 4
+DEFAULT_RPM = 60
+
+# 점수가 이만큼 이상 달라진 질문 수를 따로 셈
+DRIFT_REPORT_THRESHOLD = 1.0
+
+
+class RateLimitedClient:
+    """
+    모델 호출 전에 재채점 전용 RequestGovernor(분당 호출 수 + 동시 호출 수)를 거치도록
+    클라이언트를 감쌉니다. governor가 None이면 제한 없이 호출합니다.
+    """
+
+    def __init__(self, client, governor=None):
+        self.client = client
+        self.governor = governor
+        self.calls = 0
+        self._calls_lock = threading.Lock()
+
+    def generate_response(self, prompt, max_retries=3, system_prompt=None, **kwargs):
+        with self._calls_lock:
+            self.calls += 1
+
+        if self.governor is None:
+            return self.client.generate_response(prompt, max_retries=max_retries, system_prompt=system_prompt, **kwargs)
+
+        estimated_tokens = estimate_tokens(system_prompt, prompt)
+        self.governor.acquire(estimated_tokens)
+        try:
+            return self.client.generate_response(prompt, max_retries=max_retries, system_prompt=system_prompt, **kwargs)
+        finally:
+            self.governor.release(estimated_tokens)
+
+
+def load_checkpoint(story_hash):
+    """
+    이전 재채점의 체크포인트를 읽습니다. 평가 기준이나 이야기가 바뀌었으면 무시합니다.
+    체크포인트는 첫 줄이 머리글이고 이후 한 줄에 묶음 하나의 완료 id가 붙는 JSONL 파일입니다.
+
+    Args:
+        story_hash (str): 현재 이야기 해시
+
+    Returns:
+        set: 이미 재채점한 대화 id (쓸 수 있는 체크포인트가 없으면 None)
+    """
+    try:
+        if not CHECKPOINT_FILE.exists():
+            return None
+        with open(CHECKPOINT_FILE, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        header = json.loads(lines[0]) if lines else {}
+        if header.get('prompt_version') != PROMPT_VERSION or header.get('story_hash') != story_hash:
+            print("[DEBUG] 평가 기준이나 이야기가 바뀌어 체크포인트를 무시합니다")
+            return None
+
+        done_ids = set()
+        for line in lines[1:]:
+            try:
+                done_ids.update(json.loads(line)['done_ids'])
+            except (ValueError, KeyError):
+                continue  # 쓰는 도중 중단된 마지막 줄
+        return done_ids
+    except Exception as e:
+        print(f"체크포인트 로드 오류: {e}")
+        return None
+
+
+def start_checkpoint(story_hash):
+    """
+    새 체크포인트를 머리글만 있는 상태로 시작합니다 (예전 체크포인트는 버림).
+
+    Args:
+        story_hash (str): 현재 이야기 해시
+    """
+    with open(CHECKPOINT_FILE, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({
+            "prompt_version": PROMPT_VERSION,
+            "story_hash": story_hash,
+            "started_at": datetime.now().isoformat()
+        }) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def save_checkpoint(finished_ids):
+    """
+    묶음 하나에서 재채점한 대화 id를 체크포인트 끝에 한 줄로 덧붙입니다.
+    (전체 목록을 다시 쓰지 않으므로 묶음마다 드는 시간이 일정합니다.)
+
+    Args:
+        finished_ids (list): 이번 묶음에서 재채점한 대화 id
+    """
+    with open(CHECKPOINT_FILE, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({"done_ids": sorted(finished_ids)}) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def load_rows(done_ids, failed_only=False):
+    """
+    재채점할 대화 항목을 읽습니다.
+
+    Args:
+        done_ids (set): 건너뛸 대화 id
+        failed_only (bool): 채점 실패로 기록된 항목만 읽을지 여부
+
+    Returns:
+        list: [{"id", "student_id", "timestamp", "question", "score"}, ...]
+    """
+    # 끝난 실행이 저널에 남긴 대화까지 기록한 뒤 읽음
+    flush_conversations()
+    rows = get_connection().execute(
+        "SELECT id, student_id, timestamp, question, score FROM conversations ORDER BY id"
+    ).fetchall()
+    result = [
+        {
+            "id": row['id'],
+            "student_id": row['student_id'],
+            "timestamp": row['timestamp'],
+            "question": row['question'],
+            "score": json.loads(row['score']) if row['score'] else None
+        }
+        for row in rows if row['id'] not in done_ids
+    ]
+    if failed_only:
+        result = [row for row in result if is_score_failed(row['score'])]
+    return result
+
+
+def rescore_all(story_content, client=None, workers=DEFAULT_WORKERS, rpm=DEFAULT_RPM,
+                batch_size=BATCH_SIZE, restart=False, dry_run=False, use_cache=True, failed_only=False):
+    """
+    저장된 모든 질문을 다시 채점하고 결과를 저장소에 씁니다.
+    묶음 하나의 점수는 한 트랜잭션으로 기록하고, 기록이 끝난 묶음은 체크포인트에 남겨
+    중단된 뒤 다시 실행하면 남은 항목부터 이어서 처리합니다.
+
+    Args:
+        story_content (str): 이야기 내용
+        client: 사용할 클라이언트 (기본: Gemini 클라이언트)
+        workers (int): 동시에 채점할 작업자 수
+        rpm (int): 분당 최대 모델 호출 수 (0이면 제한 없음)
+        batch_size (int): 한 번에 채점할 질문 수
+        restart (bool): 체크포인트를 무시하고 처음부터
+        dry_run (bool): 채점만 하고 저장하지 않음 (가짜 클라이언트는 항상 저장하지 않음)
+        use_cache (bool): 점수 캐시를 읽고 쓸지 여부
+        failed_only (bool): 채점 실패로 기록된 항목만 다시 채점
+
+    Returns:
+        dict: 처리 결과 요약
+    """
+    if client is None:
+        from .gemini_client import get_client
+        client = get_client()
+    elif isinstance(client, FakeGeminiClient) and not dry_run:
+        # 가짜 점수가 실제 저장소와 체크포인트에 들어가지 않도록 항상 저장 없이 실행
+        print("가짜 클라이언트는 저장하지 않고 실행합니다 (dry_run)")
+        dry_run = True
+    governor = RequestGovernor(rpm=rpm, max_in_flight=workers) if rpm > 0 else None
+    client = RateLimitedClient(client, governor)
+
+    story_hash = context_hash(story_content)
+    done_ids = None if restart else load_checkpoint(story_hash)
+    if done_ids is None:
+        done_ids = set()
+        if not dry_run:
+            start_checkpoint(story_hash)
+    rows = load_rows(done_ids, failed_only=failed_only)
+    batches = [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+    print(f"재채점 대상: {len(rows)}개 (이미 완료 {len(done_ids)}개), 묶음 {len(batches)}개")
+
+    summary = {"rescored": 0, "written": 0, "errors": 0, "drift_sum": 0.0, "drift_abs_sum": 0.0,
+               "drift_count": 0, "drift_large": 0}
+    lock = threading.Lock()
+
+    def process(batch):
+        scores = analyze_questions_batch(
+            [row['question'] for row in batch], story_content,
+            batch_size=batch_size, client=client, use_cache=use_cache
+        )
+
+        updates = []
+        finished = []
+        errors = 0
+        drifts = []
+        for row, score_data in zip(batch, scores):
+            if score_data.get('feedback') in FALLBACK_FEEDBACKS:
+                errors += 1  # 이전 점수를 그대로 두고 다음 실행에서 다시 시도
+                continue
+            updates.append((row['student_id'], row['timestamp'], score_data))
+            finished.append(row['id'])
+            old_score = row['score']
+            if isinstance(old_score, dict) and not is_score_pending(old_score) and 'total_score' in old_score:
+                drifts.append(score_data['total_score'] - old_score['total_score'])
+
+        written = 0
+        if updates and not dry_run:
+            written = update_conversation_scores(updates)
+            if written == 0:
+                errors += len(updates)
+                finished = []
+
+        with lock:
+            summary['rescored'] += len(updates)
+            summary['written'] += written
+            summary['errors'] += errors
+            for drift in drifts:
+                summary['drift_sum'] += drift
+                summary['drift_abs_sum'] += abs(drift)
+                summary['drift_count'] += 1
+                summary['drift_large'] += abs(drift) >= DRIFT_REPORT_THRESHOLD
+            if finished and not dry_run:
+                done_ids.update(finished)
+                save_checkpoint(finished)
+            print(f"  묶음 완료: {len(updates)}개 채점, 오류 {errors}개 (누적 {summary['rescored']}개)")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(process, batch) for batch in batches]
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"재채점 묶음 오류: {e}")
+                summary['errors'] += 1
+    elapsed = time.perf_counter() - start
+
+    drift_count = summary['drift_count']
+    return {
+        "rows": len(rows),
+        "rescored": summary['rescored'],
+        "written": summary['written'],
+        "errors": summary['errors'],
+        "model_calls": client.calls,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(summary['rescored'] / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_drift": round(summary['drift_sum'] / drift_count, 3) if drift_count else 0.0,
+        "mean_abs_drift": round(summary['drift_abs_sum'] / drift_count, 3) if drift_count else 0.0,
+        f"drift_over_{DRIFT_REPORT_THRESHOLD}": summary['drift_large'],
+        "prompt_version": PROMPT_VERSION,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="저장된 모든 질문을 현재 평가 기준으로 다시 채점합니다.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="동시에 채점할 작업자 수")
+    parser.add_argument("--rpm", type=int, default=DEFAULT_RPM, help="분당 최대 모델 호출 수 (0이면 제한 없음)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="한 번에 채점할 질문 수")
+    parser.add_argument("--story", default=str(STORY_FILE), help="이야기 파일 경로")
+    parser.add_argument("--restart", action="store_true", help="체크포인트를 무시하고 처음부터")
+    parser.add_argument("--dry-run", action="store_true", help="채점만 하고 저장하지 않음")
+    parser.add_argument("--failed-only", action="store_true", help="채점 실패로 기록된 질문만 다시 채점")
+    parser.add_argument("--no-cache", action="store_true", help="점수 캐시를 쓰지 않고 모두 새로 채점")
+    parser.add_argument("--fake", action="store_true",
+                        help="가짜 클라이언트 사용 (API 호출 없음, 점수 캐시와 저장 사용 안 함)")
+    args = parser.parse_args(argv)
+
+    with open(args.story, 'r', encoding='utf-8') as f:
+        story_content = f.read()
+
+    client = None
+    if args.fake:
+        client = FakeGeminiClient()
+
+    result = rescore_all(
+        story_content,
+        client=client,
+        workers=args.workers,
+        rpm=args.rpm,
+        batch_size=args.batch_size,
+        restart=args.restart,
+        dry_run=args.dry_run,
+        use_cache=not (args.no_cache or args.fake),
+        failed_only=args.failed_only
+    )
+    for key, value in result.items():
+        print(f"{key}: {value}")
+    return 0 if result['errors'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+질문 점수 캐시 모듈
+같은 이야기에 대한 같은 질문(정규화 기준)은 다시 채점하지 않고 저장된 점수를 돌려줍니다.
+모델을 다시 부르지 않아도 되고, 같은 질문이 학생마다 다른 점수를 받는 일도 없어집니다.
+
+캐시는 데이터베이스(data/app.db)의 score_cache 테이블에 질문 키별 한 행으로 저장되므로
+점수 하나를 저장할 때 그 행만 씁니다. 최대 개수를 넘으면 가장 오래 쓰이지 않은 점수부터 지웁니다.
+질문 분석 프롬프트(평가 기준)가 바뀌면 버전이 달라져 이전 점수는 자동으로 버려집니다.
+예전 data/score_cache.json이 있으면 처음 한 번 가져옵니다 (원본 파일은 그대로 둠).
+"""
+
+import hashlib
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from .answer_cache import normalize_question, context_hash
+from .database import get_connection
+from .file_store import read_json
+from .prompts import get_question_analysis_prompt
+
+# 데이터 디렉토리 경로
+BASE_DIR = Path(__file__).parent.parent
+DATA_DIR = BASE_DIR / "data"
+LEGACY_SCORE_CACHE_FILE = DATA_DIR / "score_cache.json"
+
+# 최대 저장 개수 (넘으면 가장 오래 쓰이지 않은 점수부터 삭제)
+SCORE_CACHE_MAX_ENTRIES = 5000
+
+_lock = threading.Lock()
+_prepared = False  # 이 프로세스에서 예전 점수 정리와 JSON 가져오기를 마쳤는지
+_stats = {"hits": 0, "misses": 0}
+
+
+def get_prompt_version():
+    """
+    질문 분석 프롬프트 틀의 버전(해시)을 만듭니다.
+    이야기와 질문 자리는 고정된 표시로 채워 평가 기준 문구만 반영합니다.
+
+    Returns:
+        str: 버전 (앞 12자리)
+    """
+    template = get_question_analysis_prompt("{story}", "{question}")
+    return hashlib.sha256(template.encode('utf-8')).hexdigest()[:12]
+
+
+PROMPT_VERSION = get_prompt_version()
+
+
+def _make_key(question, story_content):
+    return f"{context_hash(story_content)}:{normalize_question(question)}"
+
+
+def _prepare(conn):
+    """
+    다른 평가 기준의 점수를 지우고 예전 JSON 캐시를 가져옵니다 (프로세스당 한 번).
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+    """
+    global _prepared
+    with _lock:
+        if _prepared:
+            return
+        with conn:
+            removed = conn.execute(
+                "DELETE FROM score_cache WHERE version != ?", (PROMPT_VERSION,)
+            ).rowcount
+            if removed:
+                print(f"[DEBUG] 평가 기준이 바뀌어 저장된 점수 {removed}개를 버립니다")
+
+            done = conn.execute("SELECT value FROM meta WHERE key = 'score_cache_imported'").fetchone()
+            if not done:
+                saved = read_json(LEGACY_SCORE_CACHE_FILE, {}) if LEGACY_SCORE_CACHE_FILE.exists() else {}
+                if saved.get('version') == PROMPT_VERSION:
+                    conn.executemany(
+                        """INSERT OR IGNORE INTO score_cache
+                           (key, version, question, score, created_at, last_used)
+                           VALUES (?, ?, ?, ?, ?, ?)""",
+                        [
+                            (
+                                key, PROMPT_VERSION, entry.get('question', ''),
+                                json.dumps(entry['score'], ensure_ascii=False),
+                                entry.get('created_at', ''), entry.get('last_used', '')
+                            )
+                            for key, entry in saved.get('entries', {}).items() if 'score' in entry
+                        ]
+                    )
+                conn.execute("INSERT INTO meta (key, value) VALUES ('score_cache_imported', '1')")
+        _prepared = True
+
+
+def get_cached_score(question, story_content):
+    """
+    같은 질문에 저장된 점수를 찾습니다.
+
+    Args:
+        question (str): 학생의 질문
+        story_content (str): 이야기 내용
+
+    Returns:
+        dict: 저장된 점수 (없으면 None)
+    """
+    key = _make_key(question, story_content)
+
+    try:
+        conn = get_connection()
+        _prepare(conn)
+        row = conn.execute(
+            "SELECT score FROM score_cache WHERE key = ? AND version = ?", (key, PROMPT_VERSION)
+        ).fetchone()
+        if row is not None:
+            with conn:
+                conn.execute(
+                    "UPDATE score_cache SET last_used = ? WHERE key = ?",
+                    (datetime.now().isoformat(), key)
+                )
+    except Exception as e:
+        print(f"점수 캐시 조회 오류: {e}")
+        row = None
+
+    with _lock:
+        _stats['hits' if row is not None else 'misses'] += 1
+    return json.loads(row['score']) if row is not None else None
+
+
+def store_score(question, story_content, score_data):
+    """
+    점수를 캐시에 저장합니다.
+
+    Args:
+        question (str): 학생의 질문
+        story_content (str): 이야기 내용
+        score_data (dict): 분석 결과
+    """
+    key = _make_key(question, story_content)
+    now = datetime.now().isoformat()
+
+    try:
+        conn = get_connection()
+        _prepare(conn)
+        with conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO score_cache
+                   (key, version, question, score, created_at, last_used)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (key, PROMPT_VERSION, question, json.dumps(score_data, ensure_ascii=False), now, now)
+            )
+            # 최대 개수를 넘은 만큼 가장 오래 쓰이지 않은 점수부터 삭제
+            conn.execute(
+                """DELETE FROM score_cache WHERE key IN (
+                       SELECT key FROM score_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                   )""",
+                (SCORE_CACHE_MAX_ENTRIES,)
+            )
+    except Exception as e:
+        print(f"점수 캐시 저장 오류: {e}")
+
+
+def get_score_cache_stats():
+    """
+    점수 캐시 적중/실패 횟수와 저장 개수를 반환합니다.
+
+    Returns:
+        dict: {"hits", "misses", "entries", "version"}
+    """
+    try:
+        conn = get_connection()
+        _prepare(conn)
+        entries = conn.execute("SELECT COUNT(*) FROM score_cache").fetchone()[0]
+    except Exception as e:
+        print(f"점수 캐시 조회 오류: {e}")
+        entries = 0
+
+    with _lock:
+        return {**_stats, "entries": entries, "version": PROMPT_VERSION}
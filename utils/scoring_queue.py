@@ -0,0 +1,229 @@
+"""
+질문 채점 작업 큐 모듈
+학생 질문의 점수 분석을 백그라운드 작업으로 처리합니다.
+
+작업은 data/scoring_queue/ 아래에 작업 하나당 JSON 파일 하나로 저장되므로
+앱이 재시작되어도 남아 있는 작업을 이어서 처리합니다.
+"""
+
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from .file_store import read_json, write_json
+
+# 데이터 디렉토리 경로
+BASE_DIR = Path(__file__).parent.parent
+DATA_DIR = BASE_DIR / "data"
+QUEUE_DIR = DATA_DIR / "scoring_queue"
+
+# 작업 파일 확장자 (대기 중 / 처리 중)
+PENDING_SUFFIX = ".json"
+WORKING_SUFFIX = ".working"
+
+# 동시에 채점할 작업자 스레드 수
+SCORING_WORKERS = 2
+
+# 작업당 최대 시도 횟수
+MAX_ATTEMPTS = 3
+
+# 실패한 작업을 다시 큐에 넣기 전 기다리는 시간 (초, 시도할 때마다 두 배)
+RETRY_BASE_DELAY_SECONDS = 5
+
+# 처리 중 작업 파일의 임대 시간 (초). 채점 마감 시간(45초)보다 충분히 길게 잡아
+# 이 시간이 지나도록 남아 있는 처리 중 파일만 중단된 작업으로 보고 되돌림
+WORKING_LEASE_SECONDS = 300
+
+# 작업이 없을 때 중단된 작업을 확인하는 간격 (초)
+RECLAIM_INTERVAL_SECONDS = 60
+
+# 디렉토리가 없으면 생성
+QUEUE_DIR.mkdir(parents=True, exist_ok=True)
+
+_jobs = queue.Queue()
+_workers = []
+_workers_lock = threading.Lock()
+
+
+def enqueue_scoring(student_id, timestamp, question, story_content):
+    """
+    질문 채점 작업을 큐에 추가합니다.
+
+    Args:
+        student_id (str): 학번
+        timestamp (str): 채점할 대화 항목의 timestamp (항목 식별자)
+        question (str): 학생의 질문
+        story_content (str): 이야기 내용
+
+    Returns:
+        str: 작업 ID
+    """
+    start_workers()
+
+    job_id = f"{datetime.now().strftime('%Y%m%d%H%M%S%f')}_{uuid.uuid4().hex[:8]}"
+    job = {
+        "job_id": job_id,
+        "student_id": student_id,
+        "timestamp": timestamp,
+        "question": question,
+        "story_content": story_content,
+        "attempts": 0,
+        "created_at": datetime.now().isoformat()
+    }
+
+    # 원자적으로 써서 반쯤 쓰인 작업 파일이 보이지 않게 함
+    job_file = QUEUE_DIR / f"{job_id}{PENDING_SUFFIX}"
+    write_json(job_file, job)
+
+    _jobs.put(job_file)
+    print(f"[DEBUG] 채점 작업 추가: {job_id} ({student_id})")
+    return job_id
+
+
+def start_workers():
+    """
+    채점 작업자 스레드를 시작합니다 (프로세스당 한 번).
+    이전 실행에서 남은 작업 파일도 다시 큐에 넣습니다.
+    """
+    with _workers_lock:
+        if _workers:
+            return
+
+        _reclaim_stale_jobs()
+        for job_file in sorted(QUEUE_DIR.glob(f"*{PENDING_SUFFIX}")):
+            _jobs.put(job_file)
+
+        for i in range(SCORING_WORKERS):
+            worker = threading.Thread(
+                target=_worker_loop,
+                name=f"scoring-worker-{i}",
+                daemon=True
+            )
+            worker.start()
+            _workers.append(worker)
+
+
+def get_queue_depth():
+    """
+    아직 처리되지 않은 채점 작업 수를 반환합니다.
+
+    Returns:
+        int: 대기 + 처리 중 작업 수
+    """
+    return (
+        len(list(QUEUE_DIR.glob(f"*{PENDING_SUFFIX}")))
+        + len(list(QUEUE_DIR.glob(f"*{WORKING_SUFFIX}")))
+    )
+
+
+def _reclaim_stale_jobs():
+    """
+    임대 시간이 지난 처리 중 작업을 대기 상태로 되돌리고 큐에 넣습니다.
+    다른 프로세스가 지금 처리 중인 작업은 임대 시간 안이므로 건드리지 않습니다.
+
+    Returns:
+        int: 되돌린 작업 수
+    """
+    reclaimed = 0
+    now = time.time()
+    for working_file in QUEUE_DIR.glob(f"*{WORKING_SUFFIX}"):
+        try:
+            if now - working_file.stat().st_mtime < WORKING_LEASE_SECONDS:
+                continue
+            job_file = working_file.with_suffix(PENDING_SUFFIX)
+            os.replace(working_file, job_file)
+        except FileNotFoundError:
+            continue  # 그 사이 처리가 끝났거나 다른 프로세스가 되돌림
+        _jobs.put(job_file)
+        reclaimed += 1
+
+    if reclaimed:
+        print(f"[DEBUG] 중단된 채점 작업 {reclaimed}개를 다시 대기열에 넣음")
+    return reclaimed
+
+
+def _worker_loop():
+    """큐에서 작업을 꺼내 계속 처리합니다. 작업이 없으면 중단된 작업을 확인합니다."""
+    while True:
+        try:
+            job_file = _jobs.get(timeout=RECLAIM_INTERVAL_SECONDS)
+        except queue.Empty:
+            try:
+                _reclaim_stale_jobs()
+            except Exception as e:
+                print(f"채점 작업 회수 오류: {e}")
+            continue
+
+        try:
+            _process_job(job_file)
+        except Exception as e:
+            import traceback
+            print(f"채점 작업 처리 오류: {e}")
+            print(f"[ERROR] Traceback: {traceback.format_exc()}")
+        finally:
+            _jobs.task_done()
+
+
+def _process_job(job_file):
+    """
+    작업 하나를 처리합니다.
+
+    Args:
+        job_file (Path): 대기 중인 작업 파일 경로
+    """
+    from .data_manager import update_conversation_score, mark_score_failed
+    from .question_analyzer import analyze_question, FALLBACK_FEEDBACKS
+
+    # 작업 파일을 처리 중 상태로 옮겨 다른 작업자와 겹치지 않게 함
+    working_file = job_file.with_suffix(WORKING_SUFFIX)
+    try:
+        os.replace(job_file, working_file)
+        # 이름을 바꿔도 수정 시각은 그대로이므로 임대 시작 시각으로 갱신
+        os.utime(working_file)
+    except FileNotFoundError:
+        return  # 이미 다른 작업자가 가져감
+
+    job = read_json(working_file)
+
+    try:
+        score_data = analyze_question(job['question'], job['story_content'])
+        if score_data.get('feedback') in FALLBACK_FEEDBACKS:
+            # 채점 실패로 받은 기본 점수는 통계에 넣지 않고 다시 시도
+            raise RuntimeError("채점 실패 (기본 점수)")
+        if not update_conversation_score(job['student_id'], job['timestamp'], score_data):
+            # DB 오류(잠김 등)이거나 아직 저장되지 않은 항목 - 작업을 지우지 않고 다시 시도
+            raise RuntimeError("점수 기록 실패")
+        os.remove(working_file)
+        print(f"[DEBUG] 채점 작업 완료: {job['job_id']}")
+    except Exception as e:
+        job['attempts'] = job.get('attempts', 0) + 1
+        if job['attempts'] >= MAX_ATTEMPTS:
+            print(f"채점 작업 포기 ({job['job_id']}): {e}")
+            # 대기 상태로 남지 않도록 실패로 기록 (통계와 재채점에서 보임)
+            mark_score_failed(job['student_id'], job['timestamp'], str(e))
+            os.remove(working_file)
+            return
+
+        # 시도 횟수를 기록하고 다시 대기 상태로 (원자적으로 쓴 뒤 처리 중 파일 삭제)
+        write_json(job_file, job)
+        os.remove(working_file)
+        _requeue_later(job_file, RETRY_BASE_DELAY_SECONDS * 2 ** (job['attempts'] - 1))
+
+
+def _requeue_later(job_file, delay):
+    """
+    잠시 기다린 뒤 작업을 다시 큐에 넣습니다.
+    (그 사이 프로세스가 끝나도 대기 중 작업 파일은 남아 있어 다음 실행 때 처리됩니다.)
+
+    Args:
+        job_file (Path): 대기 중인 작업 파일 경로
+        delay (float): 기다릴 시간 (초)
+    """
+    timer = threading.Timer(delay, _jobs.put, args=(job_file,))
+    timer.daemon = True
+    timer.start()
+    print(f"[DEBUG] 채점 작업 {delay}초 뒤 다시 시도: {job_file.stem}")
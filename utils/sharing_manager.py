@@ -3,16 +3,20 @@
 학생들의 질문 공유 설정 및 공유된 대화 조회를 관리합니다.
 """
 
-import json
+import bisect
+import os
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from .data_manager import load_conversation, get_conversation_changes
+from .file_store import file_lock, read_json, write_json, update_json
+
 # 데이터 디렉토리 경로
 BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "data"
 SHARING_SETTINGS_FILE = DATA_DIR / "sharing_settings.json"
-CONV_DIR = DATA_DIR / "conversations"
 
 
 def initialize_sharing_settings():
@@ -20,15 +24,81 @@ def initialize_sharing_settings():
     sharing_settings.json 파일이 없으면 생성합니다.
     """
     if not SHARING_SETTINGS_FILE.exists():
-        default_data = {"sharing_settings": []}
+        default_data = _empty_settings()
         try:
-            with open(SHARING_SETTINGS_FILE, 'w', encoding='utf-8') as f:
-                json.dump(default_data, f, ensure_ascii=False, indent=2)
-            print("[DEBUG] sharing_settings.json 파일 생성됨")
+            with file_lock(SHARING_SETTINGS_FILE):
+                # 잠금을 기다리는 동안 다른 세션이 만들었으면 덮어쓰지 않음
+                if not SHARING_SETTINGS_FILE.exists():
+                    write_json(SHARING_SETTINGS_FILE, default_data, indent=2)
+                    print("[DEBUG] sharing_settings.json 파일 생성됨")
         except Exception as e:
             print(f"공유 설정 파일 생성 오류: {e}")
 
 
+def _empty_settings() -> Dict:
+    return {"sharing_settings": {}, "next_anonymous_id": 1}
+
+
+def _normalize_settings(data: Dict) -> Dict:
+    """
+    파일 내용을 {학번: 설정} 형식으로 맞춥니다.
+    예전 목록 형식이면 그동안 화면에 보이던 익명 번호(설정 순서)를 그대로 고정해 변환합니다.
+
+    Args:
+        data (dict): sharing_settings.json 내용
+
+    Returns:
+        dict: {"sharing_settings": {학번: 설정}, "next_anonymous_id": 다음 익명 번호}
+    """
+    settings = data.get('sharing_settings', {})
+    if isinstance(settings, list):
+        anonymous_ids = _legacy_anonymous_ids(settings)
+        settings = {
+            setting['student_id']: {**setting, 'anonymous_id': anonymous_ids.get(setting['student_id'])}
+            for setting in settings
+        }
+    data['sharing_settings'] = settings
+    if 'next_anonymous_id' not in data:
+        data['next_anonymous_id'] = max(
+            (setting.get('anonymous_id') or 0 for setting in settings.values()), default=0
+        ) + 1
+    return data
+
+
+# 학번 -> 공유 설정 (파일이 바뀌었을 때만 다시 읽음)
+_settings_lock = threading.Lock()
+_settings_index: Dict[str, Dict] = {}
+_settings_version = None
+
+
+def _settings_by_student() -> Dict[str, Dict]:
+    """
+    학번으로 찾는 공유 설정 색인을 반환합니다.
+    파일의 inode/mtime/크기가 바뀌었을 때만 다시 읽으므로 조회는 stat 한 번과 dict 조회입니다.
+    반환된 색인은 공유되므로 수정하지 마세요.
+
+    Returns:
+        dict: {학번: 공유 설정}
+    """
+    global _settings_index, _settings_version
+    try:
+        stat = os.stat(SHARING_SETTINGS_FILE)
+        version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        initialize_sharing_settings()
+        return {}
+
+    with _settings_lock:
+        if version != _settings_version:
+            try:
+                data = _normalize_settings(read_json(SHARING_SETTINGS_FILE, _empty_settings()))
+                _settings_index = data['sharing_settings']
+                _settings_version = version
+            except Exception as e:
+                print(f"공유 설정 로드 오류: {e}")
+        return _settings_index
+
+
 def load_sharing_settings() -> List[Dict]:
     """
     모든 학생의 공유 설정을 로드합니다.
@@ -36,15 +106,7 @@ def load_sharing_settings() -> List[Dict]:
     Returns:
         list: 공유 설정 리스트
     """
-    initialize_sharing_settings()
-
-    try:
-        with open(SHARING_SETTINGS_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return data.get('sharing_settings', [])
-    except Exception as e:
-        print(f"공유 설정 로드 오류: {e}")
-        return []
+    return [dict(setting) for setting in _settings_by_student().values()]
 
 
 def get_sharing_status(student_id: str) -> Dict:
@@ -57,11 +119,9 @@ def get_sharing_status(student_id: str) -> Dict:
     Returns:
         dict: 공유 설정 정보 (없으면 기본값)
     """
-    settings = load_sharing_settings()
-
-    for setting in settings:
-        if setting['student_id'] == student_id:
-            return setting
+    setting = _settings_by_student().get(student_id)
+    if setting is not None:
+        return dict(setting)
 
     # 기본값 반환
     return {
@@ -74,6 +134,7 @@ def get_sharing_status(student_id: str) -> Dict:
 def save_sharing_preference(student_id: str, name: str, is_shared: bool, display_as: str = "named") -> bool:
     """
     학생의 공유 설정을 저장합니다.
+    익명 번호는 학생이 처음 익명을 고를 때 한 번 매겨지고 이후에는 바뀌지 않습니다.
 
     Args:
         student_id (str): 학번
@@ -85,40 +146,36 @@ def save_sharing_preference(student_id: str, name: str, is_shared: bool, display
         bool: 성공 여부
     """
     try:
-        settings = load_sharing_settings()
-
-        # 기존 설정 찾기
-        existing_index = None
-        for i, setting in enumerate(settings):
-            if setting['student_id'] == student_id:
-                existing_index = i
-                break
-
-        # 새 설정 데이터
-        new_setting = {
-            'student_id': student_id,
-            'name': name,
-            'is_shared': is_shared,
-            'display_as': display_as,
-            'anonymous_id': None,  # 나중에 동적으로 할당
-            'last_toggled': datetime.now().isoformat()
-        }
-
-        # 기존 설정이 있으면 업데이트, 없으면 추가
-        if existing_index is not None:
-            # created_at 유지
-            if 'created_at' in settings[existing_index]:
-                new_setting['created_at'] = settings[existing_index]['created_at']
-            else:
-                new_setting['created_at'] = datetime.now().isoformat()
-            settings[existing_index] = new_setting
-        else:
-            new_setting['created_at'] = datetime.now().isoformat()
-            settings.append(new_setting)
-
-        # 저장
-        with open(SHARING_SETTINGS_FILE, 'w', encoding='utf-8') as f:
-            json.dump({'sharing_settings': settings}, f, ensure_ascii=False, indent=2)
+        existing = _settings_by_student().get(student_id)
+        if existing is not None and (existing.get('name'), existing.get('is_shared'), existing.get('display_as')) \
+                == (name, is_shared, display_as):
+            return True  # 바뀐 것이 없으면 저장하지 않음
+
+        def _update(data):
+            data = _normalize_settings(data)
+            settings = data['sharing_settings']
+            now = datetime.now().isoformat()
+            old_setting = settings.get(student_id, {})
+
+            anonymous_id = old_setting.get('anonymous_id')
+            if anonymous_id is None and display_as == 'anonymous':
+                anonymous_id = data['next_anonymous_id']
+                data['next_anonymous_id'] += 1
+
+            settings[student_id] = {
+                'student_id': student_id,
+                'name': name,
+                'is_shared': is_shared,
+                'display_as': display_as,
+                'anonymous_id': anonymous_id,
+                'last_toggled': now,
+                'created_at': old_setting.get('created_at', now)
+            }
+            return data
+
+        # 저장 (잠금 안에서 파일을 다시 읽어 고치므로 다른 학생의 동시 저장이 사라지지 않음)
+        update_json(SHARING_SETTINGS_FILE, _update, default=_empty_settings(), indent=2)
+        refresh_shared_student(student_id)
 
         print(f"[DEBUG] 공유 설정 저장 완료: {student_id}, is_shared={is_shared}")
         return True
@@ -157,95 +214,259 @@ def get_student_conversation_count(student_id: str) -> int:
     Returns:
         int: 대화 개수
     """
-    conv_file = CONV_DIR / f"{student_id}.json"
-
-    if not conv_file.exists():
-        return 0
-
     try:
-        with open(conv_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            conversations = data.get('conversations', [])
-            return len(conversations)
+        return load_conversation(student_id)['statistics']['total_questions']
     except Exception as e:
         print(f"대화 개수 조회 오류: {e}")
         return 0
 
 
-def get_shared_conversations(sort_by: str = "recent", filter_anonymous: bool = False) -> List[Dict]:
+def _legacy_anonymous_ids(settings: List[Dict]) -> Dict[str, int]:
     """
-    공유된 모든 대화를 조회합니다. 점수 정보는 제거됩니다.
+    예전 목록 형식에서 쓰던 익명 번호(공유 중인 익명 학생의 설정 순서)를 계산합니다.
 
     Args:
-        sort_by (str): 정렬 방식 ('recent' 또는 'questions')
-        filter_anonymous (bool): True이면 익명만 표시
+        settings (list): 예전 형식의 공유 설정 리스트
 
     Returns:
-        list: 공유된 학생들의 대화 데이터
+        dict: {학번: 익명 번호}
     """
-    settings = load_sharing_settings()
+    anonymous_ids = {}
+    for setting in settings:
+        if setting.get('is_shared', False) and setting.get('display_as') == 'anonymous':
+            anonymous_ids[setting['student_id']] = len(anonymous_ids) + 1
+    return anonymous_ids
 
-    # 공유 활성화된 학생만 필터링
-    shared_students = [s for s in settings if s.get('is_shared', False)]
 
-    # 익명 필터 적용
-    if filter_anonymous:
-        shared_students = [s for s in shared_students if s.get('display_as') == 'anonymous']
+def _build_feed_entry(setting: Dict) -> Optional[Dict]:
+    """
+    학생 한 명의 공유 피드 항목(점수 제거)을 만듭니다.
 
-    # 익명 ID 할당 (동적)
-    anonymous_counter = 1
-    for student in shared_students:
-        if student.get('display_as') == 'anonymous':
-            student['anonymous_id'] = anonymous_counter
-            anonymous_counter += 1
+    Args:
+        setting (dict): 학생의 공유 설정
 
-    # 각 학생의 대화 로드
-    result = []
-    for student in shared_students:
-        student_id = student['student_id']
-        conv_file = CONV_DIR / f"{student_id}.json"
+    Returns:
+        dict: 피드 항목 (공유 안 함 또는 대화가 없으면 None)
+    """
+    if not setting.get('is_shared', False):
+        return None
 
-        if not conv_file.exists():
-            continue
+    student_id = setting['student_id']
+    conv_data = load_conversation(student_id)
+    conversations = conv_data.get('conversations', [])
+    if not conversations:
+        return None
 
-        try:
-            with open(conv_file, 'r', encoding='utf-8') as f:
-                conv_data = json.load(f)
-                conversations = conv_data.get('conversations', [])
-
-                # 점수 제거
-                cleaned_conversations = [
-                    remove_scores_from_conversation(conv)
-                    for conv in conversations
-                ]
-
-                # 표시 이름 결정
-                if student.get('display_as') == 'anonymous':
-                    display_name = f"익명 학생 #{student.get('anonymous_id', '?')}"
-                else:
-                    display_name = student.get('name', '학생')
-
-                # 마지막 활동 시간
-                last_activity = None
-                if conversations:
-                    last_activity = conversations[-1].get('timestamp', '')
-
-                result.append({
-                    'student_id': student_id,
-                    'display_name': display_name,
-                    'conversations': cleaned_conversations,
-                    'question_count': len(conversations),
-                    'last_activity': last_activity
-                })
+    is_anonymous = setting.get('display_as') == 'anonymous'
+    if is_anonymous:
+        display_name = f"익명 학생 #{setting.get('anonymous_id') or '?'}"
+    else:
+        display_name = setting.get('name', '학생')
+
+    return {
+        'student_id': student_id,
+        'display_name': display_name,
+        'is_anonymous': is_anonymous,
+        'conversations': [remove_scores_from_conversation(conv) for conv in conversations],
+        'question_count': len(conversations),
+        'last_activity': conversations[-1].get('timestamp', '')
+    }
+
+
+# ============= 공유 피드 (미리 만들어 둔 점수 제거 대화 목록) =============
+
+# 정렬 방식별 정렬 키
+FEED_SORT_KEYS = {
+    "recent": lambda entry: entry.get('last_activity') or '',
+    "questions": lambda entry: entry.get('question_count', 0),
+}
+
+# 피드 자료구조를 보호하는 잠금. 대화를 읽는 일(데이터베이스, 대화 저장 버퍼 flush)은
+# 이 잠금 밖에서 하고, 잠금 안에서는 만들어 둔 항목을 끼워 넣기만 합니다.
+_feed_lock = threading.Lock()
+_feed_entries: Optional[Dict[str, Dict]] = None  # 학번 -> 피드 항목
+_feed_orders: Dict[tuple, List] = {}  # (정렬 방식, 익명만) -> [(정렬 키, 학번)] 오름차순
+_feed_requested: Dict[str, int] = {}  # 학번 -> 갱신 요청 번호 (늦게 끝난 예전 갱신이 덮어쓰지 않도록)
+_feed_applied: Dict[str, int] = {}  # 학번 -> 피드에 반영된 갱신 요청 번호
+_feed_last_id = 0  # 피드에 반영된 마지막 대화 항목 id (다른 프로세스가 추가한 대화 확인용)
+_feed_settings: Optional[Dict[str, Dict]] = None  # 피드에 반영된 공유 설정 색인
+
+
+def _rebuild_feed():
+    """
+    공유 피드 전체를 다시 만듭니다 (처음 조회할 때 한 번).
+    대화는 _feed_lock 밖에서 읽고, 그동안 갱신 요청이 들어온 학생은 끼워 넣은 뒤 다시 만듭니다.
+    """
+    global _feed_entries, _feed_last_id, _feed_settings
+
+    with _feed_lock:
+        started = dict(_feed_requested)
+
+    # 읽기 전에 기준점을 잡아 두므로 만드는 도중 추가된 대화는 다음 조회 때 반영됨
+    last_id, _ = get_conversation_changes(_feed_last_id)
+    settings = _settings_by_student()
 
+    entries = {}
+    for setting in list(settings.values()):
+        try:
+            entry = _build_feed_entry(setting)
         except Exception as e:
-            print(f"대화 로드 오류 ({student_id}): {e}")
+            print(f"대화 로드 오류 ({setting.get('student_id')}): {e}")
             continue
+        if entry:
+            entries[entry['student_id']] = entry
+
+    with _feed_lock:
+        if _feed_entries is not None:
+            return  # 다른 스레드가 먼저 만듦
+        _feed_entries = entries
+        _feed_last_id = last_id
+        _feed_settings = settings
+        for sort_by, key in FEED_SORT_KEYS.items():
+            order = sorted(
+                (key(entry), student_id) for student_id, entry in _feed_entries.items()
+            )
+            _feed_orders[(sort_by, False)] = order
+            _feed_orders[(sort_by, True)] = [
+                item for item in order if _feed_entries[item[1]]['is_anonymous']
+            ]
+        _feed_applied.update(started)
+        changed = [
+            student_id for student_id, request in _feed_requested.items()
+            if request != started.get(student_id)
+        ]
+
+    for student_id in changed:
+        refresh_shared_student(student_id)
+
+
+def _set_feed_entry(student_id: str, entry: Optional[Dict]):
+    """피드 항목 하나를 바꾸고 정렬 목록에서 그 항목의 위치만 고칩니다. _feed_lock 안에서 호출합니다."""
+    old_entry = _feed_entries.pop(student_id, None)
+
+    for (sort_by, anonymous_only), order in _feed_orders.items():
+        key = FEED_SORT_KEYS[sort_by]
+        if old_entry is not None and (not anonymous_only or old_entry['is_anonymous']):
+            index = bisect.bisect_left(order, (key(old_entry), student_id))
+            if index < len(order) and order[index][1] == student_id:
+                del order[index]
+        if entry is not None and (not anonymous_only or entry['is_anonymous']):
+            bisect.insort(order, (key(entry), student_id))
+
+    if entry is not None:
+        _feed_entries[student_id] = entry
+
+
+def refresh_shared_student(student_id: str):
+    """
+    학생 한 명의 피드 항목을 다시 만듭니다.
+    공유 학생의 대화가 기록되거나 공유 설정을 바꿨을 때 호출되며,
+    익명 번호는 바뀌지 않으므로 다른 학생의 항목은 건드리지 않습니다.
+
+    Args:
+        student_id (str): 학번
+    """
+    with _feed_lock:
+        request = _feed_requested.get(student_id, 0) + 1
+        _feed_requested[student_id] = request
+        if _feed_entries is None:
+            return  # 아직 피드를 만들지 않았으면 처음 조회할 때 만들어짐
+        in_feed = student_id in _feed_entries
+
+    setting = _settings_by_student().get(student_id)
+    if setting is None and not in_feed:
+        return
+
+    try:
+        entry = _build_feed_entry(setting) if setting else None
+    except Exception as e:
+        print(f"공유 피드 갱신 오류 ({student_id}): {e}")
+        return
+
+    with _feed_lock:
+        # 이보다 나중 요청이 이미 반영되었으면 예전 내용으로 덮어쓰지 않음
+        if request <= _feed_applied.get(student_id, 0):
+            return
+        _feed_applied[student_id] = request
+        _set_feed_entry(student_id, entry)
 
-    # 정렬
-    if sort_by == "recent":
-        result.sort(key=lambda x: x.get('last_activity', ''), reverse=True)
-    elif sort_by == "questions":
-        result.sort(key=lambda x: x.get('question_count', 0), reverse=True)
 
-    return result
+def get_shared_conversations(sort_by: str = "recent", filter_anonymous: bool = False,
+                             offset: int = 0, limit: Optional[int] = None) -> List[Dict]:
+    """
+    공유된 대화를 학생 단위로 한 페이지씩 조회합니다. 점수 정보는 제거됩니다.
+    미리 만들어 둔 피드에서 읽으므로 학생별 대화를 다시 읽지 않습니다.
+    반환된 항목은 피드와 공유되므로 수정하지 마세요.
+
+    Args:
+        sort_by (str): 정렬 방식 ('recent' 또는 'questions')
+        filter_anonymous (bool): True이면 익명만 표시
+        offset (int): 건너뛸 학생 수
+        limit (int): 가져올 최대 학생 수 (None이면 전부)
+
+    Returns:
+        list: 공유된 학생들의 대화 데이터
+    """
+    _ensure_feed()
+    with _feed_lock:
+        order = _get_feed_order(sort_by, filter_anonymous)
+
+        # 정렬 목록은 오름차순이므로 뒤에서부터 읽음
+        start = len(order) - 1 - offset
+        stop = -1 if limit is None else max(start - limit, -1)
+        return [_feed_entries[order[i][1]] for i in range(start, stop, -1)]
+
+
+def count_shared_conversations(filter_anonymous: bool = False) -> int:
+    """
+    공유 중인 학생 수를 반환합니다 (페이지 수 계산용).
+
+    Args:
+        filter_anonymous (bool): True이면 익명 공유 학생만 셈
+
+    Returns:
+        int: 학생 수
+    """
+    _ensure_feed()
+    with _feed_lock:
+        return len(_get_feed_order("recent", filter_anonymous))
+
+
+def _ensure_feed():
+    """
+    피드가 없으면 만들고, 있으면 다른 프로세스가 그 뒤에 추가한 대화와
+    바꾼 공유 설정을 반영합니다 (_feed_lock 밖에서 호출).
+    """
+    global _feed_last_id, _feed_settings
+
+    with _feed_lock:
+        built = _feed_entries is not None
+        last_id = _feed_last_id
+        old_settings = _feed_settings
+    if not built:
+        _rebuild_feed()
+        return
+
+    changed = set()
+    settings = _settings_by_student()
+    if settings is not old_settings:
+        old_settings = old_settings or {}
+        changed.update(
+            student_id for student_id in set(settings) | set(old_settings)
+            if settings.get(student_id) != old_settings.get(student_id)
+        )
+
+    new_last_id, student_ids = get_conversation_changes(last_id)
+    changed.update(student_ids)
+
+    for student_id in changed:
+        refresh_shared_student(student_id)
+
+    with _feed_lock:
+        _feed_last_id = max(_feed_last_id, new_last_id)
+        _feed_settings = settings
+
+
+def _get_feed_order(sort_by: str, filter_anonymous: bool) -> List:
+    """피드 정렬 목록을 반환합니다. _ensure_feed() 뒤에 _feed_lock 안에서 호출합니다."""
+    return _feed_orders.get((sort_by, filter_anonymous), _feed_orders[("recent", filter_anonymous)])
@@ -0,0 +1,332 @@
+"""
+질문 유사도 색인 모듈
+같은 뜻의 질문을 다르게 표현한 경우("까치는 왜 날개를 잃었어요?" /
+"까치가 날개를 잃은 이유가 뭐예요?")에도 이전 답변을 재사용할 수 있도록,
+지난 질문들의 내용어를 글자 n-gram TF-IDF로 색인하고 코사인 유사도로 찾습니다.
+모델 호출 없이 로컬에서만 동작합니다.
+
+글자가 거의 같아도 인물이나 행동이 다른 질문("농부는 왜 노래를 불렀나요?" /
+"어부는 왜 노래를 불렀나요?")에 다른 질문의 답변을 주지 않도록, 유사도가 높더라도
+두 질문의 내용어(조사와 어미를 뗀 낱말)가 서로 모두 들어 있을 때만 같은 질문으로 봅니다.
+의문사는 뜻이 같은 표현("왜" / "이유가 뭐" / "무엇 때문에")을 하나로 보고,
+행동은 시제 어미를 뗀 어간("잃었" / "잃은" / "잃었던" → "잃")으로 비교합니다.
+
+색인은 답변 캐시에 저장된 답변 중 같은 고정 프롬프트(이야기 + 작가 역할)로 받은 것으로만 만듭니다.
+"""
+
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+from .answer_cache import normalize_question, context_hash, get_cached_answers
+
+# 사용할 글자 n-gram 길이
+NGRAM_SIZES = (2, 3)
+
+# 기본 유사도 기준 (이 값 이상이고 내용어가 같으면 같은 질문으로 봄)
+# python -m utils.benchmark similarity (질문 10,000개, 의문 표현/어순/시제 어미까지 바꿔 쓴 질문):
+#   내용어 확인 없이 0.6: 바꿔 쓴 질문 적중 88.4%, 인물/행동만 다른 질문 오적중 87%
+#   내용어 확인 + 0.6:    바꿔 쓴 질문 적중 88.4%, 인물/행동만 다른 질문 오적중 0%
+#   (적중하지 않은 것은 띄어쓰기 없이 붙여 쓴 질문)
+DEFAULT_SIMILARITY_THRESHOLD = 0.6
+
+# 전체 질문의 이 비율보다 많이 등장하는 n-gram은 후보 찾기에 쓰지 않음 ("#왜#" 등)
+COMMON_NGRAM_RATIO = 0.2
+
+# 정확한 유사도를 계산할 최대 후보 수
+MAX_CANDIDATES = 50
+
+# 내용어에서 떼어 낼 어미와 조사 (긴 것부터 확인)
+_WORD_SUFFIXES = sorted([
+    "었을까요", "았을까요", "을까요", "까요", "나요", "어요", "아요", "에요", "예요", "이에요",
+    "했어요", "했나요", "해요", "습니까", "니까", "나", "니", "냐", "요",
+    "에서", "에게", "한테", "께서", "으로", "로", "은", "는", "이", "가", "을", "를",
+    "의", "에", "도", "와", "과", "만",
+], key=len, reverse=True)
+
+# 어간을 구할 때 낱말 끝에서 더 떼어 낼 시제/관형 어미 ("잃었던" → "잃었" → "잃")
+_STEM_ENDINGS = ("던", "었", "았", "였", "했", "한")
+
+# 내용어로 보지 않는 말머리 (의문사는 "왜"와 "어떻게"처럼 묻는 것이 다르므로 내용어로 봄)
+_STOP_WORDS = {
+    "그런데", "그럼", "그러면", "그리고", "근데", "정말", "진짜", "혹시", "작가님", "궁금",
+}
+
+# 같은 것을 묻는 의문 표현 -> 대표 의문사
+_QUESTION_WORDS = {
+    "왜": "왜", "어째서": "왜", "이유": "왜", "까닭": "왜", "때문": "왜",
+    "뭐": "무엇", "뭘": "무엇", "무엇": "무엇", "무슨": "무엇",
+    "누구": "누구", "누": "누구",
+    "어디": "어디", "언제": "언제", "어떻게": "어떻게",
+}
+
+
+def question_ngrams(question):
+    """
+    질문의 내용어(content_words)를 글자 n-gram 빈도로 바꿉니다.
+    어순, 조사, 어미, 의문 표현이 달라도 내용어가 같으면 같은 n-gram이 나옵니다.
+    낱말 경계는 "#"으로 표시해 서로 다른 낱말에 걸친 n-gram은 만들지 않습니다.
+
+    Args:
+        question (str): 질문
+
+    Returns:
+        Counter: {n-gram: 빈도}
+    """
+    grams = Counter()
+    for word in content_words(question):
+        text = f"#{word}#"
+        for n in NGRAM_SIZES:
+            for i in range(len(text) - n + 1):
+                grams[text[i:i + n]] += 1
+    return grams
+
+
+def content_words(question):
+    """
+    질문의 내용어(띄어쓰기 단위 낱말에서 끝의 조사/어미를 뗀 어간)를 구합니다.
+    "그런데" 같은 말머리는 빼고, 의문 표현은 대표 의문사로 바꿉니다.
+    ("이유가 뭐예요"는 "왜"와 같으므로 "왜"가 있으면 "무엇"은 뺍니다.)
+
+    Args:
+        question (str): 질문
+
+    Returns:
+        set: 내용어 집합
+    """
+    words = set()
+    for word in re.sub(r'[^\w\s]+', ' ', normalize_question(question)).split():
+        for suffix in _WORD_SUFFIXES:
+            if len(word) > len(suffix) and word.endswith(suffix):
+                word = word[:-len(suffix)]
+                break
+        while len(word) > 1 and word.endswith(_STEM_ENDINGS):
+            word = word[:-1]
+        if word in _STOP_WORDS:
+            continue
+        words.add(_QUESTION_WORDS.get(word, word))
+    if "왜" in words:
+        words.discard("무엇")
+    return words
+
+
+def same_content(question, other):
+    """
+    두 질문의 내용어가 서로 모두 들어 있는지 확인합니다.
+    내용어가 같거나, 띄어쓰기를 무시한 상대 질문의 글자 안에 들어 있으면 있는 것으로 봅니다.
+    인물, 행동, 의문사가 하나라도 다르면 False입니다.
+
+    Args:
+        question (str): 질문
+        other (str): 비교할 질문
+
+    Returns:
+        bool: 같은 내용의 질문이면 True
+    """
+    words, other_words = content_words(question), content_words(other)
+    text = re.sub(r'[\s\W_]+', '', normalize_question(question))
+    other_text = re.sub(r'[\s\W_]+', '', normalize_question(other))
+    return (all(word in other_words or word in other_text for word in words)
+            and all(word in words or word in text for word in other_words))
+
+
+class SimilarityIndex:
+    """질문 → 답변 유사도 색인 (역색인 기반 TF-IDF)"""
+
+    def __init__(self):
+        self._questions = []       # doc_id -> 질문
+        self._answers = []         # doc_id -> 답변
+        self._vectors = []         # doc_id -> Counter (n-gram 빈도)
+        self._postings = defaultdict(list)  # n-gram -> [doc_id]
+        self._seen = {}            # 정규화된 질문 -> doc_id
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._questions)
+
+    def _idf(self, gram):
+        return math.log((1 + len(self._questions)) / (1 + len(self._postings.get(gram, ())))) + 1.0
+
+    def _norm(self, vector):
+        return math.sqrt(sum((tf * self._idf(gram)) ** 2 for gram, tf in vector.items())) or 1.0
+
+    def add(self, question, answer):
+        """
+        질문과 답변을 색인에 추가합니다. 같은 질문이 이미 있으면 답변만 바꿉니다.
+
+        Args:
+            question (str): 질문
+            answer (str): 답변
+        """
+        key = normalize_question(question)
+        vector = question_ngrams(question)
+        if not vector:
+            return
+
+        with self._lock:
+            if key in self._seen:
+                self._answers[self._seen[key]] = answer
+                return
+
+            doc_id = len(self._questions)
+            self._questions.append(question)
+            self._answers.append(answer)
+            self._vectors.append(vector)
+            for gram in vector:
+                self._postings[gram].append(doc_id)
+            self._seen[key] = doc_id
+
+    def search(self, question, check_content=True):
+        """
+        가장 비슷한 이전 질문을 찾습니다.
+
+        Args:
+            question (str): 질문
+            check_content (bool): 내용어가 다른 질문은 건너뛸지 여부 (same_content)
+
+        Returns:
+            tuple: (유사도, 이전 질문, 답변) - 색인이 비었으면 None
+        """
+        vector = question_ngrams(question)
+        if not vector:
+            return None
+
+        with self._lock:
+            if not self._questions:
+                return None
+
+            common_limit = max(MAX_CANDIDATES, int(len(self._questions) * COMMON_NGRAM_RATIO))
+            query = {gram: tf * self._idf(gram) for gram, tf in vector.items()}
+            query_norm = math.sqrt(sum(w * w for w in query.values())) or 1.0
+
+            # 1. 드문 n-gram을 공유하는 질문을 후보로 모음
+            overlap = Counter()
+            for gram in query:
+                postings = self._postings.get(gram)
+                if postings and len(postings) <= common_limit:
+                    for doc_id in postings:
+                        overlap[doc_id] += 1
+            if not overlap:
+                return None
+
+            # 2. 후보에 대해서만 코사인 유사도 계산 (IDF는 질문이 추가될수록 바뀌므로 매번 계산)
+            best = None
+            for doc_id, _ in overlap.most_common(MAX_CANDIDATES):
+                if check_content and not same_content(question, self._questions[doc_id]):
+                    continue
+                doc_vector = self._vectors[doc_id]
+                dot = sum(
+                    weight * doc_vector[gram] * self._idf(gram)
+                    for gram, weight in query.items() if gram in doc_vector
+                )
+                similarity = dot / (query_norm * self._norm(doc_vector))
+                if best is None or similarity > best[0]:
+                    best = (similarity, doc_id)
+            if best is None:
+                return None
+
+            similarity, doc_id = best
+            return min(similarity, 1.0), self._questions[doc_id], self._answers[doc_id]
+
+
+# 고정 프롬프트(이야기 + 작가 역할)별 색인
+_indexes = {}
+_indexes_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}  # _indexes_lock 안에서 바꿈
+
+
+def get_similarity_index(context):
+    """
+    고정 프롬프트에 해당하는 유사도 색인을 반환합니다.
+    처음 요청될 때 같은 고정 프롬프트로 저장된 답변 캐시로 색인을 만듭니다.
+
+    Args:
+        context (str): 고정 프롬프트 (이야기 + 작가 역할)
+
+    Returns:
+        SimilarityIndex: 유사도 색인
+    """
+    key = context_hash(context)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = build_index_from_answer_cache(context)
+            _indexes[key] = index
+        return index
+
+
+def build_index_from_answer_cache(context):
+    """
+    답변 캐시에 같은 고정 프롬프트로 저장된 답변으로 유사도 색인을 만듭니다.
+    (이야기나 작가 역할이 바뀌기 전에 받은 답변은 넣지 않습니다.)
+
+    Args:
+        context (str): 고정 프롬프트 (이야기 + 작가 역할)
+
+    Returns:
+        SimilarityIndex: 유사도 색인
+    """
+    index = SimilarityIndex()
+    try:
+        for question, answer in get_cached_answers(context):
+            index.add(question, answer)
+        print(f"[DEBUG] 유사도 색인 생성: {len(index)}개 질문")
+    except Exception as e:
+        print(f"유사도 색인 생성 오류: {e}")
+    return index
+
+
+def find_similar_answer(question, context, threshold=DEFAULT_SIMILARITY_THRESHOLD):
+    """
+    비슷한 이전 질문의 답변을 찾습니다 (내용어가 다른 질문의 답변은 쓰지 않음).
+
+    Args:
+        question (str): 학생의 질문
+        context (str): 고정 프롬프트 (이야기 + 작가 역할)
+        threshold (float): 유사도 기준 (0-1)
+
+    Returns:
+        str: 이전 답변 (기준 이상으로 비슷한 질문이 없으면 None)
+    """
+    result = get_similarity_index(context).search(question)
+    if result is None or result[0] < threshold:
+        with _indexes_lock:
+            _stats['misses'] += 1
+        return None
+
+    similarity, matched_question, answer = result
+    with _indexes_lock:
+        _stats['hits'] += 1
+    print(f"[DEBUG] 유사 질문 재사용 ({similarity:.2f}): {matched_question}")
+    return answer
+
+
+def add_to_similarity_index(question, context, answer):
+    """
+    새 질문과 답변을 유사도 색인에 추가합니다.
+
+    Args:
+        question (str): 학생의 질문
+        context (str): 고정 프롬프트 (이야기 + 작가 역할)
+        answer (str): 답변
+    """
+    get_similarity_index(context).add(question, answer)
+
+
+def clear_similarity_index():
+    """유사도 색인을 모두 지웁니다. (저장된 답변을 지울 때 함께 호출)"""
+    with _indexes_lock:
+        _indexes.clear()
+
+
+def get_similarity_index_stats():
+    """
+    유사 질문 재사용 횟수와 색인된 질문 수를 반환합니다.
+
+    Returns:
+        dict: {"hits", "misses", "indexed"}
+    """
+    with _indexes_lock:
+        indexed = sum(len(index) for index in _indexes.values())
+        return {**_stats, "indexed": indexed}
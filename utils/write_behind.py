@@ -0,0 +1,347 @@
+"""
+쓰기 지연(write-behind) 버퍼 모듈
+저장 요청을 메모리에 바로 받아 두고 백그라운드 스레드가 짧은 간격으로 모아서 저장합니다.
+학생 화면을 처리하는 스레드는 디스크 쓰기를 기다리지 않고, 같은 키(학생)의 여러 저장은
+한 번의 쓰기로 합쳐지며, 모인 저장 전체가 한 번의 flush(한 트랜잭션)로 처리됩니다.
+
+저장 요청은 메모리에 넣기 전에 저널 파일(JSON Lines)에 먼저 덧붙이므로
+flush 전에 프로세스가 죽어도 다음 실행에서 저널을 다시 적용해 잃지 않습니다.
+(저널을 다시 적용해도 같은 항목이 두 번 저장되지 않도록 flush 함수는 멱등이어야 합니다.)
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from .file_store import FSYNC_MODE
+
+# flush 간격 (초)
+FLUSH_INTERVAL_SECONDS = float(os.getenv("WRITE_BEHIND_INTERVAL", "0.5"))
+
+# 버퍼에 쌓인 항목이 이만큼을 넘으면 간격을 기다리지 않고 flush
+MAX_PENDING_ITEMS = 200
+
+# flush 시간 통계를 낼 최근 flush 수
+FLUSH_HISTORY_SIZE = 100
+
+
+def _pid_alive(pid):
+    """프로세스가 아직 실행 중인지 확인합니다."""
+    try:
+        os.kill(pid, 0)
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+class WriteBehindBuffer:
+    """키별로 저장 요청을 모았다가 백그라운드에서 한 번에 저장하는 버퍼"""
+
+    def __init__(self, name, flush_fn, journal_dir, interval=FLUSH_INTERVAL_SECONDS,
+                 max_pending=MAX_PENDING_ITEMS, on_flushed=None):
+        """
+        Args:
+            name (str): 버퍼 이름 (스레드 이름, 로그용)
+            flush_fn (callable): 모인 저장을 처리하는 함수.
+                {키: {"meta": dict, "items": [항목, ...]}}를 받고, 실패하면 예외를 던짐
+            journal_dir (Path): 저널 파일을 둘 디렉토리
+            interval (float): flush 간격 (초)
+            max_pending (int): 이만큼 쌓이면 바로 flush
+            on_flushed (callable): 저장이 끝난 뒤 저장한 키 목록을 받는 함수.
+                flush 잠금을 놓은 뒤에 호출되므로 다른 잠금을 잡거나 다시 flush해도 됨
+        """
+        self.name = name
+        self.flush_fn = flush_fn
+        self.journal_dir = journal_dir
+        self.interval = interval
+        self.max_pending = max_pending
+        self.on_flushed = on_flushed
+
+        self._pending = OrderedDict()  # 키 -> {"meta": dict, "items": OrderedDict(항목 id -> 항목)}
+        self._pending_items = 0
+        self._in_flight = set()  # 지금 flush 중인 키
+        self._lock = threading.Lock()  # _pending, 저널 파일
+        self._flush_lock = threading.RLock()  # flush는 한 번에 하나 (flush 함수 안에서 다시 불러도 됨)
+        self._wake = threading.Event()
+        self._journal = None
+        # 저널 조각 이름에 넣을 이 버퍼만의 값. 컨테이너처럼 PID가 재사용되어도
+        # 이전 실행이 남긴 조각과 이름이 겹치지 않음
+        self._run_id = uuid.uuid4().hex[:8]
+        self._segment = 0
+        self._first_segment = 1  # 아직 지우지 않은 가장 오래된 저널 조각 번호
+        self._thread = None
+        self._started = False
+        self._stats = {"saves": 0, "items": 0, "coalesced": 0, "flushes": 0, "flushed_items": 0,
+                       "flush_errors": 0, "recovered_items": 0}
+        self._flush_times = []
+
+    # ----- 저널 -----
+
+    def _segment_path(self, segment):
+        return self.journal_dir / f"{os.getpid()}_{self._run_id}_{segment:06d}.jsonl"
+
+    def _open_segment(self):
+        """새 저널 조각을 엽니다. _lock 안에서 호출합니다."""
+        self._segment += 1
+        self._journal = open(self._segment_path(self._segment), 'a', encoding='utf-8')
+
+    def _append_journal(self, record):
+        """저장 요청을 저널에 덧붙입니다. _lock 안에서 호출합니다."""
+        if self._journal is None:  # close() 뒤에 들어온 요청
+            self._open_segment()
+        self._journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._journal.flush()
+        if FSYNC_MODE == "always":
+            os.fsync(self._journal.fileno())
+
+    def _recover(self):
+        """
+        이전 실행(이미 끝난 프로세스)이 남긴 저널을 읽어 버퍼에 다시 넣습니다.
+
+        Returns:
+            list: 읽은 저널 파일 (새 저널에 옮겨 적은 뒤 지움)
+        """
+        recovered = 0
+        segments = []
+        # 쓰인 순서대로 다시 적용 (같은 항목은 나중 것이 이김)
+        paths = []
+        for path in self.journal_dir.glob("*.jsonl"):
+            try:
+                paths.append((path.stat().st_mtime, path.name, path))
+            except FileNotFoundError:
+                continue  # 그 사이 다른 프로세스가 가져감
+        for _, _, path in sorted(paths):
+            try:
+                pid = int(path.stem.split("_")[0])
+            except ValueError:
+                continue
+            if pid != os.getpid() and _pid_alive(pid):
+                continue  # 다른 프로세스가 쓰는 중인 저널
+            # 동시에 시작한 다른 프로세스와 같은 저널을 두 번 복구하지 않도록 이름을 바꿔 가져옴
+            # (이 프로세스가 복구 도중 끝나면 다음 실행이 이 이름으로 다시 가져감)
+            claimed = path.with_name(f"{os.getpid()}_{self._run_id}_claimed_{path.name}")
+            try:
+                os.replace(path, claimed)
+            except FileNotFoundError:
+                continue  # 다른 프로세스가 먼저 가져감
+            segments.append(claimed)
+            with open(claimed, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # 쓰다가 끊긴 마지막 줄
+                    self._merge(record['key'], record['meta'], record['items'])
+                    recovered += len(record['items'])
+
+        if recovered:
+            print(f"[DEBUG] {self.name}: 저널에서 {recovered}개 항목 복구")
+            self._stats['recovered_items'] += recovered
+        return segments
+
+    # ----- 버퍼 -----
+
+    def start(self):
+        """이전 저널을 복구하고 백그라운드 flush 스레드를 시작합니다 (한 번만)."""
+        if self._started:
+            return
+        with self._flush_lock:
+            if self._started:
+                return
+            self.journal_dir.mkdir(parents=True, exist_ok=True)
+            old_segments = self._recover()
+            with self._lock:
+                self._open_segment()
+                # 복구한 요청을 이 프로세스의 저널로 옮겨 적은 뒤 이전 저널을 지움
+                for key, entry in self._pending.items():
+                    self._append_journal({"key": key, "meta": entry['meta'],
+                                          "items": list(entry['items'].items())})
+            for path in old_segments:
+                path.unlink(missing_ok=True)
+            # flush 함수가 다시 이 버퍼를 부를 수 있으므로 flush 전에 시작 완료로 표시
+            self._started = True
+            self.flush()
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _merge(self, key, meta, items):
+        """저장 요청을 버퍼에 합칩니다. 같은 id의 항목은 나중 것이 이깁니다. _lock 안에서 호출합니다."""
+        entry = self._pending.get(key)
+        if entry is None:
+            entry = {"meta": {}, "items": OrderedDict()}
+            self._pending[key] = entry
+        else:
+            self._stats['coalesced'] += 1
+        entry['meta'].update(meta)
+        for item_id, item in items:
+            if item_id not in entry['items']:
+                self._pending_items += 1
+            entry['items'][item_id] = item
+
+    def add(self, key, meta, items):
+        """
+        저장 요청을 받습니다. 저널에 기록한 뒤 바로 돌아오고 실제 저장은 백그라운드에서 합니다.
+
+        Args:
+            key (str): 저장 단위 키 (예: 학번)
+            meta (dict): 키에 딸린 정보 (예: 이름, 나중 값이 이김)
+            items (list): [(항목 id, 항목), ...]
+        """
+        self.start()
+        with self._lock:
+            self._append_journal({"key": key, "meta": meta, "items": items})
+            self._merge(key, meta, items)
+            self._stats['saves'] += 1
+            self._stats['items'] += len(items)
+            full = self._pending_items >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def has_pending(self, key=None):
+        """
+        아직 저장되지 않은(또는 저장 중인) 요청이 있는지 확인합니다.
+
+        Args:
+            key (str): 확인할 키 (None이면 전체)
+
+        Returns:
+            bool: 있으면 True
+        """
+        self.start()
+        with self._lock:
+            if key is None:
+                return bool(self._pending or self._in_flight)
+            return key in self._pending or key in self._in_flight
+
+    def flush_if_pending(self, key=None):
+        """
+        해당 키의 저장이 남아 있으면 지금 저장합니다 (저장 직후 데이터를 읽는 쪽에서 사용).
+
+        Args:
+            key (str): 확인할 키 (None이면 전체)
+        """
+        if self.has_pending(key):
+            self.flush()
+
+    def flush(self):
+        """
+        버퍼에 모인 저장을 지금 처리합니다.
+        실패하면 모인 저장을 버퍼로 되돌리고 저널도 남겨 다음 flush에서 다시 시도합니다.
+
+        Returns:
+            int: 저장한 항목 수
+        """
+        count, keys = self._flush_batch()
+        if keys and self.on_flushed is not None:
+            try:
+                self.on_flushed(keys)
+            except Exception as e:
+                print(f"{self.name} 저장 후 처리 오류: {e}")
+        return count
+
+    def _flush_batch(self):
+        """
+        모인 저장을 flush 함수로 처리합니다 (flush 잠금 안).
+
+        Returns:
+            tuple: (저장한 항목 수, 저장한 키 목록)
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0, []
+                batch = self._pending
+                count = self._pending_items
+                self._pending = OrderedDict()
+                self._pending_items = 0
+                self._in_flight = set(batch)
+                # 이후 요청은 새 저널 조각에 기록 (이번 batch가 저장되면 이전 조각은 지움)
+                flushed_segment = self._segment
+                if self._journal is not None:
+                    self._journal.close()
+                    self._open_segment()
+
+            start = time.perf_counter()
+            try:
+                self.flush_fn({
+                    key: {"meta": entry['meta'], "items": list(entry['items'].values())}
+                    for key, entry in batch.items()
+                })
+            except Exception as e:
+                print(f"{self.name} 저장 오류 (다음에 다시 시도): {e}")
+                with self._lock:
+                    self._stats['flush_errors'] += 1
+                    self._in_flight = set()
+                    # 실패한 batch 뒤에 새로 들어온 요청이 이기도록 batch를 앞에 두고 합침
+                    newer = self._pending
+                    self._pending = OrderedDict()
+                    self._pending_items = 0
+                    for key, entry in batch.items():
+                        self._merge(key, entry['meta'], list(entry['items'].items()))
+                    for key, entry in newer.items():
+                        self._merge(key, entry['meta'], list(entry['items'].items()))
+                return 0, []
+
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._in_flight = set()
+                self._stats['flushes'] += 1
+                self._stats['flushed_items'] += count
+                self._flush_times = (self._flush_times + [elapsed])[-FLUSH_HISTORY_SIZE:]
+
+            # 이번 batch까지의 저널 조각은 더 이상 필요 없음
+            for segment in range(self._first_segment, flushed_segment + 1):
+                try:
+                    self._segment_path(segment).unlink()
+                except FileNotFoundError:
+                    pass
+            self._first_segment = max(self._first_segment, flushed_segment + 1)
+            return count, list(batch)
+
+    def close(self):
+        """종료할 때 남은 저장을 처리하고, 모두 저장되었으면 비어 있는 저널 조각도 지웁니다."""
+        self.flush()
+        with self._lock:
+            if self._pending or self._journal is None:
+                return
+            self._journal.close()
+            self._journal = None
+            try:
+                self._segment_path(self._segment).unlink()
+            except FileNotFoundError:
+                pass
+
+    def _run(self):
+        """flush 간격마다 (또는 버퍼가 차면 바로) 모인 저장을 처리합니다."""
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"{self.name} flush 오류: {e}")
+
+    def get_stats(self):
+        """
+        버퍼 상태를 반환합니다.
+
+        Returns:
+            dict: {"pending_keys", "pending_items", "saves", "flushes", "saves_per_flush", ...}
+        """
+        with self._lock:
+            flushes = self._stats['flushes']
+            times = self._flush_times
+            return {
+                "pending_keys": len(self._pending),
+                "pending_items": self._pending_items,
+                **self._stats,
+                "saves_per_flush": round(self._stats['saves'] / flushes, 2) if flushes else 0.0,
+                "flush_ms_avg": round(sum(times) / len(times) * 1000, 1) if times else 0.0,
+            }